@@ -0,0 +1,417 @@
+"""
+benchmark harness for the load, tally, group, reconcile and backup hot paths.
+times and memory-profiles each function on the real rawdata/output files and on
+synthetically scaled copies (10x, 100x, 1000x the events and athletes), writes all
+results as json so runs on different commits can be compared, and prints a scaling
+report showing which functions grow faster than the data. --imports instead checks
+that the app modules import without the heavy scraping and plotting packages, and
+--parse measures html parser throughput over saved pages, and --memory compares
+dataset memory with and without the declared dtypes.
+
+    python gs_bench.py --scales 1 10 100 1000
+    python gs_bench.py --imports
+    python gs_bench.py --parse output/pagecache
+    python gs_bench.py --memory
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime as dt
+
+import pandas as pd
+
+import gs_getters as gsg
+import gs_util as gsu
+
+HERE: str = os.path.dirname(os.path.abspath(__file__))
+CHECK_FIELDS: list = ["the_elements", "tallbias", "style", "fast_twitch",
+                      "suffer", "greypoupon", "cool"]
+# log-log slope above this counts as super-linear in the scaling report
+SUPERLINEAR: float = 1.15
+# packages only scraping or plotting should pull in, and the modules that must not
+HEAVY_IMPORTS: tuple = ("plotly", "bs4", "html5lib", "requests", "aiohttp", "IPython")
+LIGHT_MODULES: tuple = ("gs_util", "gs_getters", "gs_plots", "gs_fetch", "main")
+# import budget for a light module: the cost of pandas itself plus this much
+IMPORT_SLACK_MS: float = 250.0
+
+def scale_frame(df: pd.DataFrame, n: int, keycol: str = None):
+    """
+    stack n copies of a frame, suffixing keycol with the copy number so every copy
+    is a distinct event, copy 0 keeps the original keys
+    :param df: pd.DataFrame to scale
+    :param n: number of copies
+    :param keycol: column made unique per copy, such as evt_html or event
+    :return: pd.DataFrame with n x rows
+    """
+    if n <= 1:
+        return df.copy()
+    parts: list = []
+    for i in range(n):
+        part = df.copy()
+        if keycol and i:
+            part[keycol] = part[keycol].astype(str) + "-g%d" % i
+        parts.append(part)
+
+    return pd.concat(parts, ignore_index=True)
+
+def build_inputs(rawdir: str, outdir: str, scale: int, workdir: str, synthetic: bool = False):
+    """
+    write scaled copies of the events, athletes and results files for one scale
+    :param rawdir: folder with the real rawdata files
+    :param outdir: folder with the real results backup
+    :param scale: multiplier for events and athletes
+    :param workdir: temp folder for the scaled files
+    :param synthetic: if True generate scale Games with gs_synth instead of copying
+    :return: dict of file names and loaded inputs for the benchmarks
+    """
+    from gs_datadict import athlete_pfx, discf, evts_byrow_pfx, evtresults_pfx
+    from gs_snapshots import latest_file
+
+    if synthetic:
+        import gs_synth
+
+        files: dict = gs_synth.write_synthetic(os.path.join(workdir, "synth_x%d" % scale),
+                                               games=scale, rawdir=rawdir)
+    else:
+        evts = pd.read_csv(latest_file(rawdir, evts_byrow_pfx))
+        aths = pd.read_csv(latest_file(rawdir, athlete_pfx))
+        rslt = pd.read_csv(latest_file(outdir, evtresults_pfx))
+
+        files: dict = {"events": os.path.join(workdir, "events_x%d.csv" % scale),
+                       "athletes": os.path.join(workdir, "athletes_x%d.csv" % scale),
+                       "results": os.path.join(workdir, "results_x%d.csv" % scale)}
+        scale_frame(evts, scale, "evt_html").to_csv(files["events"], index=False)
+        scale_frame(aths, scale).to_csv(files["athletes"], index=False)
+        scale_frame(rslt, scale, "event").to_csv(files["results"], index=False)
+
+    inputs: dict = {"files": files,
+                    "disciplines": gsg.get_list_file(os.path.join(rawdir, discf),
+                                                     chkcols=CHECK_FIELDS)}
+    inputs["events_df"] = gsg.get_olympic_data(files["events"], "events")
+    inputs["athlete_df"] = gsg.get_olympic_data(files["athletes"], "athletes")
+    inputs["evt_rslts"] = gsg.get_events_from_bak(files["results"])
+
+    return inputs
+
+def bench_cases(inputs: dict, workdir: str):
+    """
+    the functions under test, each a zero-arg callable working on fresh copies of inputs
+    :param inputs: dict from build_inputs
+    :param workdir: temp folder for backup writers
+    :return: list of (name, rows processed, callable)
+    """
+    files: dict = inputs["files"]
+    dis: list = inputs["disciplines"]
+    edf: pd.DataFrame = inputs["events_df"]
+    adf: pd.DataFrame = inputs["athlete_df"]
+    evts: list = inputs["evt_rslts"]
+    nres: int = sum(len(e) for e in evts)
+
+    def groups():
+        grp_sports, grp_medals = gsu.analyze_groups(dis, edf)
+        return gsu.count_grp_nocs(grp_medals, grp_sports)
+
+    cases: list = [
+        ("get_olympic_data.events", len(edf), lambda: gsg.get_olympic_data(files["events"], "events")),
+        ("get_olympic_data.athletes", len(adf), lambda: gsg.get_olympic_data(files["athletes"], "athletes")),
+        ("get_events_from_bak", nres, lambda: gsg.get_events_from_bak(files["results"])),
+        ("get_noc_medalct", len(edf), lambda: gsg.get_noc_medalct(edf)),
+        ("analyze_groups+count_grp_nocs", len(edf), groups),
+        ("athletes_groupby", len(adf), lambda: gsu.athletes_groupby(adf.copy())),
+        ("reconcile_eventdf_wsrc", nres, lambda: gsu.reconcile_eventdf_wsrc(evts, edf.copy())),
+        ("do_event_bak", nres, lambda: gsu.do_event_bak(os.path.join(workdir, "bak.csv"), evts)),
+        ("save_events_df", len(edf), lambda: gsu.save_events_df(edf, os.path.join(workdir, "evt.csv"))),
+    ]
+
+    return cases
+
+def time_call(fx, repeat: int = 3):
+    """
+    best-of-repeat wall time, then one more run under tracemalloc for peak memory
+    :param fx: zero-arg callable
+    :param repeat: number of timed runs
+    :return: dict with seconds, cpu_seconds and peak_kb
+    """
+    best: float = math.inf
+    best_cpu: float = math.inf
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            t0, c0 = time.perf_counter(), time.process_time()
+            fx()
+            best = min(best, time.perf_counter() - t0)
+            best_cpu = min(best_cpu, time.process_time() - c0)
+        tracemalloc.start()
+        fx()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"seconds": best, "cpu_seconds": best_cpu, "peak_kb": round(peak / 1024, 1)}
+
+def scaling_report(results: list):
+    """
+    fit the log-log slope of time against scale for each function, slope ~1 is linear,
+    well above 1 means the function is super-linear in the data size
+    :param results: list of result dicts from run_benchmarks
+    :return: dict with key=function name, val=dict of exponent and superlinear flag
+    """
+    report: dict = {}
+    for name in dict.fromkeys(r["name"] for r in results):
+        pts: list = [(math.log(r["scale"]), math.log(max(r["seconds"], 1e-7)))
+                     for r in results if r["name"] == name]
+        if len(pts) < 2:
+            continue
+        mx: float = sum(p[0] for p in pts) / len(pts)
+        my: float = sum(p[1] for p in pts) / len(pts)
+        sxx: float = sum((p[0] - mx) ** 2 for p in pts)
+        slope: float = sum((p[0] - mx) * (p[1] - my) for p in pts) / sxx if sxx else 0.0
+        report[name] = {"exponent": round(slope, 2), "superlinear": slope > SUPERLINEAR}
+
+    return report
+
+def git_commit():
+    """
+    :return: short hash of the checked-out commit, or None outside a git repo
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(scales: list, rawdir: str, outdir: str, repeat: int = 3,
+                   synthetic: bool = False):
+    """
+    run every benchmark case at every scale
+    :param scales: list of int multipliers, 1 is the real data, or number of Games
+        when synthetic
+    :param rawdir: folder with the real rawdata files
+    :param outdir: folder with the real results backups
+    :param repeat: timed runs per case, best is kept
+    :param synthetic: if True use gs_synth data sets rather than copies of the real data
+    :return: dict with meta, results and scaling sections, ready for json
+    """
+    results: list = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            print("---- scale x%d ----" % scale)
+            with contextlib.redirect_stdout(io.StringIO()):
+                inputs: dict = build_inputs(rawdir, outdir, scale, workdir, synthetic)
+            for name, rows, fx in bench_cases(inputs, workdir):
+                res: dict = {"name": name, "scale": scale, "rows": rows}
+                res.update(time_call(fx, repeat=repeat))
+                results.append(res)
+                print("    %-32s %9d rows %9.4f s %11.1f KB peak"
+                      % (name, rows, res["seconds"], res["peak_kb"]))
+
+    meta: dict = {"commit": git_commit(), "timestamp": dt.now().isoformat(timespec="seconds"),
+                  "python": platform.python_version(), "pandas": pd.__version__,
+                  "scales": scales, "repeat": repeat, "synthetic": synthetic}
+
+    return {"meta": meta, "results": results, "scaling": scaling_report(results)}
+
+def import_profile(module: str):
+    """
+    import one module in a fresh interpreter under -X importtime
+    :param module: module name, such as gs_getters
+    :return: tuple of (cumulative import ms, set of top-level packages loaded)
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                          cwd=HERE, capture_output=True, text=True, check=True)
+    total_us: int = 0
+    loaded: set = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumul, name = line[len("import time:"):].split("|")
+        if not cumul.strip().isdigit():
+            continue
+        loaded.add(name.strip().split(".")[0])
+        if name.strip() == module:
+            total_us = int(cumul)
+
+    return total_us / 1000, loaded
+
+def check_imports(modules: tuple = LIGHT_MODULES, slack_ms: float = IMPORT_SLACK_MS):
+    """
+    import-time budget: each module must load without any HEAVY_IMPORTS package and
+    within slack_ms of what importing pandas alone costs on this machine
+    :param modules: module names to check
+    :param slack_ms: allowance in ms on top of the pandas import time
+    :return: dict with key=module, val=dict of ms, heavy packages loaded and ok flag
+    """
+    base_ms, _ = import_profile("pandas")
+    print("---- import budget: pandas %.0f ms + %.0f ms ----" % (base_ms, slack_ms))
+    report: dict = {}
+    for mod in modules:
+        ms, loaded = import_profile(mod)
+        heavy: list = sorted(loaded.intersection(HEAVY_IMPORTS))
+        ok: bool = not heavy and ms <= base_ms + slack_ms
+        report[mod] = {"ms": round(ms, 1), "heavy": heavy, "ok": ok}
+        print("    %-12s %8.1f ms  %s%s" % (mod, ms, "ok" if ok else "OVER BUDGET",
+                                           "  loads " + ", ".join(heavy) if heavy else ""))
+
+    return report
+
+def saved_pages(pagedir: str):
+    """
+    collect saved event results and medalist pages, either a PageCache folder (the url
+    is in each page's json sidecar) or a mirror of the site laid out like its urls
+    :param pagedir: folder to walk
+    :return: list of (kind, args, page text), kind is "event" or "medalist"
+    """
+    pages: list = []
+    for root, _, fils in os.walk(pagedir):
+        for fil in sorted(fils):
+            if not fil.endswith((".htm", ".html")):
+                continue
+            fqf: str = os.path.join(root, fil)
+            url: str = fqf
+            meta: str = os.path.splitext(fqf)[0] + ".json"
+            if os.path.isfile(meta):
+                with open(meta, encoding='utf-8') as fh:
+                    url = json.load(fh).get("url", fqf)
+            with open(fqf, encoding='utf-8') as fh:
+                text: str = fh.read()
+            stem: str = os.path.splitext(url.rstrip("/").split("/")[-1])[0]
+            disc: str = url.rstrip("/").split("/")[-2] if "/" in url else ""
+            if stem.startswith("noc-medalist-by-sport-"):
+                pages.append(("medalist", (stem[len("noc-medalist-by-sport-"):],), text))
+            elif stem.startswith(("medals-and-ranking-", "event-ranking-")):
+                pages.append(("event", (disc, stem.split("ranking-", 1)[1]), text))
+
+    return pages
+
+def parse_benchmark(pagedir: str, repeat: int = 3):
+    """
+    pages per second and MB per second for each parser flavor over saved pages, and a
+    check that the fast lxml path returns the same frames as the html5lib parse
+    :param pagedir: folder of saved pages, see saved_pages
+    :param repeat: timed passes per flavor, best is kept
+    :return: dict with key=flavor, val=dict of seconds, pages_s, mb_s, plus mismatches
+    """
+    pages: list = saved_pages(pagedir)
+    if not pages:
+        print("no saved event or medalist pages found in %s" % pagedir)
+        return {}
+    mbytes: float = sum(len(p[2].encode('utf-8')) for p in pages) / 1e6
+
+    def parse_all(flavor: str):
+        out: list = []
+        for kind, args, text in pages:
+            if kind == "event":
+                out.append(gsg.parse_event_page(text, *args, flavor=flavor))
+            else:
+                out.append(gsg.parse_medalist_page(text, *args, flavor=flavor)[0])
+        return out
+
+    report: dict = {}
+    print("---- parser throughput: %d pages, %.2f MB ----" % (len(pages), mbytes))
+    for flavor in ("lxml", "html5lib"):
+        res: dict = time_call(lambda: parse_all(flavor), repeat=repeat)
+        res["pages_s"] = round(len(pages) / max(res["seconds"], 1e-9), 1)
+        res["mb_s"] = round(mbytes / max(res["seconds"], 1e-9), 2)
+        report[flavor] = res
+        print("    %-10s %9.4f s %9.1f pages/s %8.2f MB/s %11.1f KB peak"
+              % (flavor, res["seconds"], res["pages_s"], res["mb_s"], res["peak_kb"]))
+    with contextlib.redirect_stdout(io.StringIO()):
+        fast, full = parse_all("lxml"), parse_all("html5lib")
+    report["mismatches"] = sum(1 for a, b in zip(fast, full)
+                               if (a is None) != (b is None) or (a is not None and not a.equals(b)))
+    print("    lxml and html5lib frames differ on %d pages" % report["mismatches"])
+
+    return report
+
+def memory_benchmark(rawdir: str, outdir: str):
+    """
+    deep memory of each dataset read with plain read_csv against the same file loaded
+    with its gs_schema dtypes
+    :param rawdir: folder with the events, athletes and timeline csv files
+    :param outdir: folder with the results and medalists backups
+    :return: dict with key=dataset, val=dict of plain_kb, typed_kb, ratio
+    """
+    from gs_datadict import athlete_pfx, evts_byrow_pfx, evtresults_pfx, medalists_pfx, timelinef
+    from gs_snapshots import latest_file
+
+    fils: dict = {"events": latest_file(rawdir, evts_byrow_pfx),
+                  "athletes": latest_file(rawdir, athlete_pfx),
+                  "timeline": os.path.join(rawdir, timelinef),
+                  "results": latest_file(outdir, evtresults_pfx),
+                  "medalists": latest_file(outdir, medalists_pfx)}
+    report: dict = {}
+    print("---- memory per dataset, plain read_csv vs declared schema ----")
+    for name, fil in fils.items():
+        if not fil or not os.path.isfile(fil):
+            print("    %-10s no file" % name)
+            continue
+        plain: int = int(pd.read_csv(fil).memory_usage(index=True, deep=True).sum())
+        typed: int = int(gsg.get_olympic_data(fil, name).memory_usage(index=True, deep=True).sum())
+        report[name] = {"plain_kb": round(plain / 1024, 1), "typed_kb": round(typed / 1024, 1),
+                        "ratio": round(plain / max(typed, 1), 2)}
+        print("    %-10s %10.1f KB %10.1f KB %6.2fx smaller" % (name, plain / 1024, typed / 1024,
+                                                             plain / max(typed, 1)))
+
+    return report
+
+def print_scaling(report: dict):
+    """
+    :param report: scaling section from run_benchmarks
+    :return: None
+    """
+    print("\n---- scaling report: time ~ scale ^ exponent ----")
+    for name, fit in sorted(report.items(), key=lambda x: -x[1]["exponent"]):
+        flag: str = "  SUPER-LINEAR" if fit["superlinear"] else ""
+        print("    %-32s %5.2f%s" % (name, fit["exponent"], flag))
+
+    return
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="benchmark the gs_Tokyo2021 hot paths")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                        help="data multipliers to run, such as 1 10 100 1000")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="generate scale Games with gs_synth instead of copying real data")
+    parser.add_argument("--rawdir", default=os.path.join(HERE, "rawdata"))
+    parser.add_argument("--outdir", default=os.path.join(HERE, "output"))
+    parser.add_argument("--json", default=None,
+                        help="where to write results, default output/bench_<date>_<commit>.json")
+    parser.add_argument("--imports", action="store_true",
+                        help="only run the import-time budget check, exit 1 if it fails")
+    parser.add_argument("--parse", metavar="PAGEDIR", default=None,
+                        help="only run the parser throughput benchmark over saved pages")
+    parser.add_argument("--memory", action="store_true",
+                        help="only compare dataset memory with and without the declared schema")
+    args = parser.parse_args(argv)
+
+    if args.parse:
+        return 0 if parse_benchmark(args.parse, repeat=args.repeat) else 1
+    if args.memory:
+        memory_benchmark(args.rawdir, args.outdir)
+        return 0
+    if args.imports:
+        imports: dict = check_imports()
+        return 0 if all(v["ok"] for v in imports.values()) else 1
+
+    bench: dict = run_benchmarks(args.scales, args.rawdir, args.outdir, repeat=args.repeat,
+                                 synthetic=args.synthetic)
+    print_scaling(bench["scaling"])
+    if not args.json:
+        args.json = os.path.join(args.outdir, "bench_%s_%s.json"
+                                 % (dt.today().strftime("%Y-%m-%d"), bench["meta"]["commit"]))
+    with open(args.json, mode='w', encoding='utf-8') as fh:
+        json.dump(bench, fh, indent=1)
+    print("\nbenchmark results written to %s" % args.json)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,19 +6,39 @@ some linked to plotly, for attributes like map projections
 """
 RAWDIR: str = '/Users/bgh/dev/pydev/gs_Tokyo2021/rawdata/'
 OUTDIR: str = '/Users/bgh/dev/pydev/gs_Tokyo2021/output/'
+CACHEDIR: str = '/Users/bgh/dev/pydev/gs_Tokyo2021/output/pagecache/'
+LOADDIR: str = '/Users/bgh/dev/pydev/gs_Tokyo2021/output/loadcache/'
+SNAPDIR: str = '/Users/bgh/dev/pydev/gs_Tokyo2021/output/snapshots/'
 
 nocf: str = 'country_codes.csv'
 discf: str = 'disciplines.csv'
-evts_byrow_f: str = 'medalevents_byrow_2021-09-30.csv'
 timelinef: str = 'medals_bydate.csv'
-athlete_f: str = 'athletes_2021-09-30.csv'
-evtresults_f: str = 'resultsbak_2021-10-01.csv'
-medalists_f: str = 'medalists_2021-10-01.csv'
+# dated files are named <prefix><YYYY-MM-DD>.csv, the newest one is picked at run time
+# with gs_snapshots.latest_file, so no date is hard-coded here
+evts_byrow_pfx: str = 'medalevents_byrow_'
+athlete_pfx: str = 'athletes_'
+evtresults_pfx: str = 'resultsbak_'
+medalists_pfx: str = 'medalists_'
 
 NOC_URL: str = "https://olympics.com/tokyo-2020/olympic-games/en/results/all-sports/"
 EVT_URL: str = "https://olympics.com/tokyo-2020/olympic-games/en/results/"
 MDLST_URL: str = "https://olympics.com/tokyo-2020/olympic-games/en/results/all-sports/"\
                      "noc-medalist-by-sport-"
+# medalist page slugs that are not just the country_codes name lower-cased and hyphenated
+NOC_SLUG_FIX: dict = {"USA": "united-states"}
+
+# discipline keys that neither disciplines.csv nor events_df spell out, mapped to dis_code:
+# medalist page sport codes, and the athlete file's free-form event and category names
+KEY_ALIAS_FIX: dict = {"BKB": "BAS", "CSP": "CAN", "FBL": "FTB", "GAR": "GYM", "GLF": "GOL",
+                       "SWM": "SWI", "VBV": "BVO", "VVO": "VOL", "WLF": "WLT", "WPO": "WAP",
+                       "3on3Hoops": "BK3", "5on5Hoops": "BAS", "CourtVolleyball": "VOL",
+                       "Handball": "HAN", "BadmintonDoubles": "BDM", "GymClimbing": "CLB",
+                       "Climbing": "CLB"}
+aliasf: str = 'key_aliases.json'
+
+# medal columns in events_df, with the medal each one counts toward
+MEDAL_SLOTS: dict = {"G_NOC": "Gold", "S_NOC": "Silver", "B_NOC": "Bronze",
+                     "G2_NOC": "Gold", "B2_NOC": "Bronze"}
 
 HT_NORM: list = [{'ptype': "AdultMale", 'height': 69.1, 'stdev': 3},
                  {'ptype': "AdultFemale", 'height': 63.5, 'stdev': 2.5}]
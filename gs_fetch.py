@@ -0,0 +1,384 @@
+"""
+page fetching layer for the gs_Olympics scrapers in gs_getters.
+async path: one pooled aiohttp client per run, a fixed number of keep-alive sockets,
+per-request timeouts, and retry with backoff on 5xx responses and timeouts.
+sync path: a shared requests.Session so threaded scrapes also reuse connections.
+parsing (pandas/bs4) is handed to a thread pool so it never blocks the event loop.
+both paths go through an optional on-disk PageCache, see set_cache.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import gs_metrics as gsm
+from gs_datadict import CACHEDIR
+
+RETRY_STATUS: tuple = (500, 502, 503, 504)
+headers = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    'Access-Control-Max-Age': '3600',
+    'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:52.0) Gecko/20100101 Firefox/52.0'
+}
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+
+class PageCache:
+    """
+    local page cache keyed by url: each page is stored under the sha256 of its url as
+    <key>.html plus a <key>.json sidecar with url, ETag, Last-Modified, fetch time and size.
+    entries younger than ttl are served with no request at all, older ones are revalidated
+    with a conditional GET. max_bytes bounds the cache, least recently used pages go first:
+    sizes and use order are read from the sidecars once, then kept in memory, so a put
+    only deletes files when it takes the cache over budget.
+    offline mode serves only what is already in the cache and never touches the network.
+    """
+    def __init__(self, cachedir: str = CACHEDIR, ttl: float = None, max_bytes: int = None,
+                 offline: bool = False):
+        """
+        :param cachedir: folder for cached pages, created if missing
+        :param ttl: seconds an entry is fresh, None=never stale, 0=always revalidate
+        :param max_bytes: evict least recently used pages when total size exceeds this
+        :param offline: if True, serve only from cache
+        """
+        self.cachedir: str = cachedir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline: bool = offline
+        self.lock = threading.Lock()
+        # LRU index for max_bytes: key -> page size, least recently used first
+        self._lru: OrderedDict = OrderedDict()
+        self._total: int = 0
+        os.makedirs(cachedir, exist_ok=True)
+        if max_bytes:
+            self._load_index()
+
+    def _load_index(self):
+        """
+        one scan of the sidecars to seed the LRU index, ordered by sidecar mtime
+        :return: None
+        """
+        entries: list = []
+        for fnam in os.listdir(self.cachedir):
+            if not fnam.endswith(".json"):
+                continue
+            metaf: str = os.path.join(self.cachedir, fnam)
+            try:
+                with open(metaf, mode='r', encoding='utf-8') as fh:
+                    size: int = json.load(fh).get("size", 0)
+                entries.append((os.path.getmtime(metaf), fnam[:-5], size))
+            except (OSError, ValueError):
+                continue
+        for _, key, size in sorted(entries):
+            self._lru[key] = size
+            self._total += size
+
+        return
+
+    @staticmethod
+    def _key(url: str):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, url: str):
+        base: str = os.path.join(self.cachedir, self._key(url))
+        return base + ".html", base + ".json"
+
+    def get(self, url: str):
+        """
+        look up a cached page
+        :param url: str with full url
+        :return: tuple of (meta dict, page text) or None if url is not cached
+        """
+        bodyf, metaf = self._paths(url)
+        try:
+            with open(metaf, mode='r', encoding='utf-8') as fh:
+                meta: dict = json.load(fh)
+            with open(bodyf, mode='r', encoding='utf-8') as fh:
+                body: str = fh.read()
+        except (OSError, ValueError):
+            return None
+        os.utime(metaf)
+        if self.max_bytes:
+            with self.lock:
+                if self._key(url) in self._lru:
+                    self._lru.move_to_end(self._key(url))
+
+        return meta, body
+
+    def is_fresh(self, meta: dict):
+        """
+        :param meta: sidecar dict from get
+        :return: True if entry can be served without revalidating
+        """
+        if self.ttl is None:
+            return True
+        return time.time() - meta.get("fetched", 0) < self.ttl
+
+    @staticmethod
+    def cond_headers(meta: dict):
+        """
+        :param meta: sidecar dict from get
+        :return: dict of conditional request headers for revalidating the entry
+        """
+        hdrs: dict = {}
+        if meta.get("etag"):
+            hdrs["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            hdrs["If-Modified-Since"] = meta["last_modified"]
+        return hdrs
+
+    def put(self, url: str, body: str, resp_headers=None):
+        """
+        store a page and its validators, written to temp files then renamed into place
+        :param url: str with full url
+        :param body: str with page text
+        :param resp_headers: response headers mapping, for ETag and Last-Modified
+        :return: None
+        """
+        resp_headers = resp_headers if resp_headers else {}
+        bodyf, metaf = self._paths(url)
+        data: bytes = body.encode("utf-8")
+        meta: dict = {"url": url, "etag": resp_headers.get("ETag"),
+                      "last_modified": resp_headers.get("Last-Modified"),
+                      "fetched": time.time(), "size": len(data)}
+        tid: str = ".%d.tmp" % threading.get_ident()
+        with open(bodyf + tid, mode='wb') as fh:
+            fh.write(data)
+        with open(metaf + tid, mode='w', encoding='utf-8') as fh:
+            json.dump(meta, fh)
+        os.replace(bodyf + tid, bodyf)
+        os.replace(metaf + tid, metaf)
+        if self.max_bytes:
+            key: str = self._key(url)
+            with self.lock:
+                self._total += len(data) - self._lru.pop(key, 0)
+                self._lru[key] = len(data)
+                over: bool = self._total > self.max_bytes
+            if over:
+                self.evict()
+
+        return
+
+    def touch(self, url: str, meta: dict):
+        """
+        mark an entry as revalidated (a 304 came back), restarting its ttl
+        :param url: str with full url
+        :param meta: sidecar dict from get
+        :return: None
+        """
+        meta["fetched"] = time.time()
+        _, metaf = self._paths(url)
+        with open(metaf, mode='w', encoding='utf-8') as fh:
+            json.dump(meta, fh)
+
+        return
+
+    def evict(self):
+        """
+        drop least recently used entries until the cache is within max_bytes, working
+        from the in-memory LRU index rather than a rescan of the folder
+        :return: number of entries removed
+        """
+        removed: int = 0
+        with self.lock:
+            while self._lru and self._total > self.max_bytes:
+                key, size = self._lru.popitem(last=False)
+                base: str = os.path.join(self.cachedir, key)
+                for fil in (base + ".json", base + ".html"):
+                    if os.path.exists(fil):
+                        os.remove(fil)
+                self._total -= size
+                removed += 1
+
+        return removed
+
+def set_cache(cache):
+    """
+    install a PageCache used by get_page and fetch_one, None turns caching off
+    :param cache: PageCache instance or None
+    :return: None
+    """
+    global _cache
+    _cache = cache
+
+    return
+
+def get_cache():
+    """
+    :return: the PageCache currently installed, or None
+    """
+    return _cache
+
+def get_session(pool_size: int = 8):
+    """
+    shared requests.Session for sync fetches, created on first use. the mounted adapter
+    keeps up to pool_size keep-alive connections per host
+    :param pool_size: max pooled connections per host
+    :return: requests.Session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            _session.headers.update(headers)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+
+    return _session
+
+def _get_page(url: str, timeout: float = 20.0, retries: int = 3, backoff: float = 0.5):
+    """
+    sync fetch of one page through the shared session and PageCache, retries 5xx and timeouts
+    :param url: str with full url
+    :param timeout: seconds allowed per request
+    :param retries: number of retries after the first attempt
+    :param backoff: base delay in seconds, doubles after each failed attempt
+    :return: tuple of (http status, page text, source), source is net, cache or revalidated
+    """
+    cache = _cache
+    cached = cache.get(url) if cache else None
+    if cache and (cache.offline or (cached and cache.is_fresh(cached[0]))):
+        return (200, cached[1], "cache") if cached else (504, None, "cache")
+
+    import requests
+
+    sess = get_session()
+    cond: dict = PageCache.cond_headers(cached[0]) if cached else {}
+    for attempt in range(retries + 1):
+        try:
+            resp = sess.get(url, timeout=timeout, headers=cond)
+            if resp.status_code == 304 and cached:
+                cache.touch(url, cached[0])
+                return 200, cached[1], "revalidated"
+            if resp.status_code not in RETRY_STATUS or attempt == retries:
+                if resp.ok and cache:
+                    cache.put(url, resp.text, resp.headers)
+                return resp.status_code, resp.text if resp.ok else None, "net"
+        except (requests.Timeout, requests.ConnectionError):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
+
+    return 0, None, "net"
+
+def get_page(url: str, timeout: float = 20.0, retries: int = 3, backoff: float = 0.5):
+    """
+    sync fetch of one page through the shared session, retries 5xx and timeouts.
+    each fetch is logged to gs_metrics when metrics are on.
+    :param url: str with full url
+    :param timeout: seconds allowed per request
+    :param retries: number of retries after the first attempt
+    :param backoff: base delay in seconds, doubles after each failed attempt
+    :return: tuple of (http status, page text), text is None if page was not fetched
+    """
+    t0 = time.perf_counter()
+    status, text, source = _get_page(url, timeout, retries, backoff)
+    gsm.record_url(url, time.perf_counter() - t0, status, len(text) if text else 0, source)
+
+    return status, text
+
+async def _fetch_one(client, url: str, timeout: float = 20.0, retries: int = 3,
+                    backoff: float = 0.5):
+    """
+    async fetch of one page with the pooled client, retries 5xx and timeouts
+    :param client: aiohttp.ClientSession shared by all fetches in this run
+    :param url: str with full url
+    :param timeout: seconds allowed per request
+    :param retries: number of retries after the first attempt
+    :param backoff: base delay in seconds, doubles after each failed attempt
+    :return: tuple of (http status, page text, source), source is net, cache or revalidated
+    """
+    cache = _cache
+    cached = cache.get(url) if cache else None
+    if cache and (cache.offline or (cached and cache.is_fresh(cached[0]))):
+        return (200, cached[1], "cache") if cached else (504, None, "cache")
+
+    import aiohttp
+
+    req_timeout = aiohttp.ClientTimeout(total=timeout)
+    cond: dict = PageCache.cond_headers(cached[0]) if cached else {}
+    status: int = 0
+    for attempt in range(retries + 1):
+        try:
+            async with client.get(url, timeout=req_timeout, headers=cond) as resp:
+                status = resp.status
+                if status == 304 and cached:
+                    cache.touch(url, cached[0])
+                    return 200, cached[1], "revalidated"
+                if status not in RETRY_STATUS:
+                    text = await resp.text() if status < 400 else None
+                    if text is not None and cache:
+                        cache.put(url, text, resp.headers)
+                    return status, text, "net"
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+            status = 0
+        if attempt < retries:
+            await asyncio.sleep(backoff * 2 ** attempt)
+    print("fetch_one: giving up on %s after %d attempts" %(url, retries + 1))
+
+    return status, None, "net"
+
+async def fetch_one(client, url: str, timeout: float = 20.0, retries: int = 3,
+                    backoff: float = 0.5):
+    """
+    async fetch of one page with the pooled client, retries 5xx and timeouts.
+    each fetch is logged to gs_metrics when metrics are on.
+    :param client: aiohttp.ClientSession shared by all fetches in this run
+    :param url: str with full url
+    :param timeout: seconds allowed per request
+    :param retries: number of retries after the first attempt
+    :param backoff: base delay in seconds, doubles after each failed attempt
+    :return: tuple of (http status, page text), status 0 if every attempt timed out
+    """
+    t0 = time.perf_counter()
+    status, text, source = await _fetch_one(client, url, timeout, retries, backoff)
+    gsm.record_url(url, time.perf_counter() - t0, status, len(text) if text else 0, source)
+
+    return status, text
+
+async def fetch_and_parse(jobs: list, max_conns: int = 8, timeout: float = 20.0,
+                          retries: int = 3, parse_workers: int = 4):
+    """
+    fetch every url in jobs over one pooled client holding at most max_conns sockets,
+    and parse each page in a thread pool as soon as it arrives
+    :param jobs: list of (url, parse_fx) where parse_fx(status, text) returns the parsed result
+    :param max_conns: size of the connection pool, total open sockets never exceeds this
+    :param timeout: seconds allowed per request
+    :param retries: number of retries on 5xx or timeout
+    :param parse_workers: threads used to run parse_fx off the event loop
+    :return: list of parse_fx results, in the same order as jobs
+    """
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    connector = aiohttp.TCPConnector(limit=max_conns, keepalive_timeout=30)
+    with ThreadPoolExecutor(max_workers=parse_workers) as parse_pool:
+        async with aiohttp.ClientSession(connector=connector, headers=headers) as client:
+
+            async def do_job(url, parse_fx):
+                status, text = await fetch_one(client, url, timeout, retries)
+                return await loop.run_in_executor(parse_pool, parse_fx, status, text)
+
+            results = await asyncio.gather(*[do_job(url, fx) for url, fx in jobs])
+
+    return list(results)
+
+def run_fetch_and_parse(jobs: list, **kwargs):
+    """
+    sync entry point for fetch_and_parse, runs a fresh event loop for the batch
+    :param jobs: list of (url, parse_fx) tuples, see fetch_and_parse
+    :return: list of parse_fx results in job order
+    """
+    return asyncio.run(fetch_and_parse(jobs, **kwargs))
@@ -3,47 +3,86 @@ the  module in gs_Olympics app involving data acquisition via HTML page reads (s
 TODO: move IO Fx's in gs_util to here, move general util Fx's from here to gs_util.
 """
 import csv
+import hashlib
+import os
+import pickle
+import threading
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from itertools import groupby
 from urllib.error import HTTPError
+from urllib.parse import urlsplit
 
 import numpy as np
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
 
-from gs_datadict import EVT_URL, MDLST_URL
+import gs_fetch as gsf
+import gs_schema as gsc
+import gs_util as gsu
+from gs_datadict import EVT_URL, LOADDIR, MDLST_URL, MEDAL_SLOTS, NOC_SLUG_FIX
 
+# load_cached in-process memo: key -> ((mtime, size), pickled data)
+_load_memo: dict = {}
 # 4 disciplines use different URL folder struct from others
 evtrnk_lst: list = ["3x3-basketball", "surfing", "beach-volleyball", "karate"]
-headers = {
-    'Access-Control-Allow-Origin': '*',
-    'Access-Control-Allow-Methods': 'GET',
-    'Access-Control-Allow-Headers': 'Content-Type',
-    'Access-Control-Max-Age': '3600',
-    'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:52.0) Gecko/20100101 Firefox/52.0'
-}
+
+class HostThrottle:
+    """
+    per-host rate limiter shared by scraper worker threads. each host gets a 'next slot'
+    time, a worker claims the slot and sleeps until it arrives, so requests to one host
+    are spaced at least 1/max_rate seconds apart no matter how many workers are running.
+    """
+    def __init__(self, max_rate: float = 4.0):
+        """
+        :param max_rate: max requests per second to any one host, 0 or None to disable
+        """
+        self.interval: float = 1.0 / max_rate if max_rate else 0.0
+        self.lock = threading.Lock()
+        self.next_slot: dict = {}
+
+    def wait(self, url: str):
+        """
+        block the calling thread until it is ok to send a request to the host in url
+        :param url: str with full url about to be requested
+        :return: None
+        """
+        if not self.interval:
+            return
+        host: str = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+        return
 
 def get_olympic_data(fil, typ: str = ""):
     """
     1. read raw Olympic event data into pandas DataFrames
     2. read file with final standings for Olympic medal events
     3. reads file with Olympic athlete age, height and weight data
+    4. reads a results or medalists backup
+    columns are typed by the gs_schema declaration for the dataset: shared categoricals
+    for string keys, narrow integers and float32 for numbers
     :param fil: string with path and name of .csv file
     :param typ: which olympic dataset to import
     :return: pd.DataFrame
     """
-    if typ.startswith("timeline"):
+    dataset: str = gsc.dataset_for(typ)
+    if dataset == "timeline":
         df = pd.read_csv(fil, skipinitialspace=True)
-    elif typ.startswith("athletes"):
-        types = {"age": np.float32, "ht_in": float, "ht_lbs": float}
-        df = pd.read_csv(fil, dtype=types)
-        df['dob'] = pd.to_datetime(df['dob'], errors="coerce", format="%Y-%m-%d")
-    elif typ.startswith("events"):
+    elif dataset:
         df = pd.read_csv(fil)
     else:
         print("unknown type of Olympic data requested: %s" %typ)
         return 1
 
-    return df
+    return gsc.apply_schema(df, dataset)
 
 def get_list_file(discfil, chkcols: list = None):
     """
@@ -53,7 +92,7 @@ def get_list_file(discfil, chkcols: list = None):
     :param chkcols: list of checkmark fields to be converted to type bool
     :return: list of dict
     """
-    with open(discfil, mode='r') as infile:
+    with gsu.open_text(discfil) as infile:
         csrdr = csv.DictReader(infile)
         if 'country_name' in csrdr.fieldnames:
             tmp: dict = {}
@@ -75,6 +114,120 @@ def get_list_file(discfil, chkcols: list = None):
                 tmp.append(row)
     return tmp
 
+def load_cached(fil, typ: str = "", chkcols: list = None, cachedir: str = LOADDIR):
+    """
+    cached front end for get_olympic_data and get_list_file. the parsed, typed result
+    is pickled to a sidecar in cachedir keyed by the source's path, mtime and size, and
+    the pickle bytes are also memoized in-process. both keys carry gs_schema's
+    SCHEMA_VERSION, so frames typed under an older schema are never served. a changed source file misses both
+    and is re-parsed from csv. each call unpickles a fresh object, so callers that
+    modify what they get back never affect later loads.
+    :param fil: fq name of source csv
+    :param typ: dataset type for get_olympic_data (events, athletes, timeline), or ""
+        to load with get_list_file
+    :param chkcols: checkmark columns for get_list_file
+    :param cachedir: folder for sidecar files, created if missing
+    :return: pd.DataFrame, list of dict or dict, same as the uncached getter
+    """
+    fstat = os.stat(fil)
+    src: str = os.path.abspath(fil)
+    memo_key: tuple = (src, typ, tuple(chkcols) if chkcols else None, gsc.SCHEMA_VERSION)
+    stamp: tuple = (fstat.st_mtime_ns, fstat.st_size)
+
+    hit = _load_memo.get(memo_key)
+    if hit and hit[0] == stamp:
+        return _unpickle(hit[1], typ)
+
+    os.makedirs(cachedir, exist_ok=True)
+    sidecar: str = os.path.join(cachedir, hashlib.sha1(repr(memo_key).encode()).hexdigest() + ".pkl")
+    blob = None
+    if os.path.isfile(sidecar):
+        with open(sidecar, mode='rb') as fh:
+            side_stamp, blob = pickle.load(fh)
+        if side_stamp != stamp:
+            blob = None
+
+    if blob is None:
+        if typ:
+            data = get_olympic_data(fil, typ)
+        else:
+            data = get_list_file(fil, chkcols=chkcols)
+        if isinstance(data, int):
+            return data
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        tmpf: str = sidecar + ".tmp"
+        with open(tmpf, mode='wb') as fh:
+            pickle.dump((stamp, blob), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpf, sidecar)
+    _load_memo[memo_key] = (stamp, blob)
+
+    return _unpickle(blob, typ)
+
+def _unpickle(blob: bytes, typ: str):
+    """
+    a frame unpickles with its own copies of the categorical dtypes, conform puts it
+    back on the shared ones so codes line up with frames loaded since
+    """
+    data = pickle.loads(blob)
+    dataset: str = gsc.dataset_for(typ)
+    if dataset and isinstance(data, pd.DataFrame):
+        gsc.conform(data, dataset)
+
+    return data
+
+def get_results_columnar(fil):
+    """
+    single vectorized read of a Parquet or Arrow IPC results backup
+    :param fil: fq name of .parquet, .arrow or .feather file written by save_results_columnar
+    :return: pd.DataFrame with categorical discipline, event and NOC columns
+    """
+    if str(fil).endswith(".parquet"):
+        rdf: pd.DataFrame = pd.read_parquet(fil)
+    else:
+        rdf: pd.DataFrame = pd.read_feather(fil)
+
+    return gsc.apply_schema(rdf, "results")
+
+def iter_event_slices(rdf: pd.DataFrame):
+    """
+    split a results frame into per-event slices. event boundaries are found by comparing
+    each row's discipline and event codes to the next row's, so the only Python loop is
+    over events, never over rows
+    :param rdf: pd.DataFrame from get_results_columnar, rows for an event are contiguous
+    :return: generator of pd.DataFrame, one slice per event
+    """
+    if len(rdf) == 0:
+        return
+    dcode = pd.factorize(rdf["discipline"])[0]
+    ecode = pd.factorize(rdf["event"])[0]
+    brk = np.flatnonzero((dcode[1:] != dcode[:-1]) | (ecode[1:] != ecode[:-1])) + 1
+    bounds = np.concatenate(([0], brk, [len(rdf)]))
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        yield rdf.iloc[start:stop]
+
+def iter_events_from_bak(bak):
+    """
+    stream event results from a backup file one event at a time, rows for an event
+    are contiguous in the backup so only the current event is ever held in memory.
+    columnar backups (.parquet, .arrow, .feather) are read in one pass and sliced,
+    json lines archives (.jsonl, .jsonl.gz, ...) from stage_archive are read line by line.
+    :param bak: a backup file of results
+    :return: generator of list of dict, one list per event
+    """
+    if str(bak).endswith((".parquet", ".arrow", ".feather")):
+        for evtdf in iter_event_slices(get_results_columnar(bak)):
+            yield evtdf.to_dict("records")
+        return
+    if ".jsonl" in os.path.basename(str(bak)):
+        # stage_archive writes one event per line
+        yield from gsu.iter_jsonl(bak)
+        return
+
+    with gsu.open_text(bak) as infile:
+        csrdr = csv.DictReader(infile)
+        for _, rows in groupby(csrdr, key=lambda r: (r['discipline'], r['event'])):
+            yield list(rows)
+
 def get_events_from_bak(bak):
     """
     build event results from backup, reads a flat file of results for all events into a
@@ -82,20 +235,32 @@ def get_events_from_bak(bak):
     :param bak: a backup file of results
     :return:
     """
-    flatlst = get_list_file(bak)
-    evt_list: list = []
-    evttmp: list = []
-    lim = len(flatlst) - 1
-    for x in range(len(flatlst)):
-        evttmp.append(flatlst[x])
-        if x < lim:
-            if flatlst[x+1]['event'] != flatlst[x]['event']:
-                evt_list.append(evttmp)
-                evttmp: list = []
-        elif x == lim:
-            evt_list.append(evttmp)
-
-    return evt_list
+    return list(iter_events_from_bak(bak))
+
+def tally_noc_medals(mdf: pd.DataFrame):
+    """
+    one vectorized pass over the medal columns: G_NOC, S_NOC, B_NOC plus the G2_NOC and
+    B2_NOC duplicate-medal columns are melted into one long NOC-medal frame and counted
+    :param mdf: DataFrame with medal winners for each Olympic event
+    :return: pd.DataFrame indexed by NOC with Gold, Silver, Bronze, Total counts plus
+        rank_gold (gold-first standings) and rank_total (total-first), sorted by rank_gold
+    """
+    slots: list = [c for c in MEDAL_SLOTS if c in mdf.columns]
+    mlong = mdf[slots].melt(var_name="slot", value_name="NOC").dropna(subset=["NOC"])
+    mlong["medal"] = mlong["slot"].map(MEDAL_SLOTS)
+    tally = mlong.groupby(["NOC", "medal"], observed=True).size().unstack(fill_value=0)
+    tally = tally.reindex(columns=["Gold", "Silver", "Bronze"], fill_value=0)
+    tally.columns.name = None
+    tally["Total"] = tally["Gold"] + tally["Silver"] + tally["Bronze"]
+
+    # gold-first ranks on golds, then silvers, then bronzes; ties share the higher rank
+    base: int = int(tally["Total"].max()) + 1 if len(tally) else 1
+    gold_key = (tally["Gold"] * base + tally["Silver"]) * base + tally["Bronze"]
+    tally["rank_gold"] = gold_key.rank(method="min", ascending=False).astype(int)
+    tally["rank_total"] = tally["Total"].rank(method="min", ascending=False).astype(int)
+    tally = tally.sort_values(["rank_gold", "rank_total"], kind="stable")
+
+    return tally
 
 def get_noc_medalct(mdf):
     """
@@ -103,45 +268,241 @@ def get_noc_medalct(mdf):
         keys=3-letter NOC (country) codes, values are medal counts
     2: correct counts where multiple medals were awarded for single event:
         two bronze in most combat events, and a dual gold in one athletic event
+    counts come from tally_noc_medals, which handles the duplicate-medal columns.
 
     :param mdf: DataFrame with medal winners for each Olympic event
     :return: list with 3 dicts for Gold, Silver, and Bronze counts
     """
-    def get_medals(edf, typ: str='G'):
+    def tie_order(prize: str):
         """
-        inner function to correct medal counts
-        :param edf: pd.DataFrame
-        :param typ: str of Gold, Silver, or Bronze
-        :return:
+        inner function, NOCs in the order the per-column counts first list them: each
+        medal column by descending count, ties in order of first appearance, and the
+        duplicate-medal column's NOCs not already seen on the end
+        :param prize: str of Gold, Silver, or Bronze
+        :return: list of NOC
         """
-        mdldct: dict = edf[typ + "_NOC"].value_counts().to_dict()
-        if typ in ['G', 'B']:
-            dup_mdl: str = typ + "2_NOC"
-            tmpdct: dict = edf[dup_mdl].value_counts().to_dict()
-
-            for k, v in tmpdct.items():
-                if k in mdldct:
-                    mdldct[k] = mdldct[k] + v
-                else:
-                    mdldct[k] = v
-            # sort dict by descending values (medal counts)
-        mdldct = {k: mdldct[k] for k in sorted(mdldct, key=lambda x: mdldct.get(x), reverse=True)}
-
-        return mdldct
-
-    mdls: list = [['Gold', None], ['Silver', None], ['Bronze', None]]
-    for prize in ['G', 'S', 'B']:
-        dctnm: dict = get_medals(mdf, typ=prize)
-        if prize.startswith('G'):
-            mdls[0][1] = dctnm
-        elif prize.startswith('S'):
-            mdls[1][1] = dctnm
-        else:
-            mdls[2][1] = dctnm
+        order: dict = {}
+        for slot in [c for c, mdl in MEDAL_SLOTS.items() if mdl == prize and c in mdf.columns]:
+            col: pd.Series = mdf[slot].dropna()
+            cnts = col.value_counts().reindex(pd.unique(col))
+            for noc in cnts.sort_values(ascending=False, kind="stable").index:
+                order.setdefault(noc, None)
+
+        return list(order)
+
+    tally: pd.DataFrame = tally_noc_medals(mdf)
+    mdls: list = []
+    for prize in ['Gold', 'Silver', 'Bronze']:
+        # sort dict by descending values (medal counts), ties keep tie_order
+        cnts = tally.loc[tally[prize] > 0, prize]
+        cnts = cnts.reindex([noc for noc in tie_order(prize) if noc in cnts.index])
+        cnts = cnts.sort_values(ascending=False, kind="stable")
+        mdls.append([prize, cnts.to_dict()])
 
     return mdls
 
-def simple_event_entry(disc, event, debug: bool=False):
+def event_url(disc, event, base_url: str = EVT_URL):
+    """
+    build the results page url for one medal event
+    :param disc: html name of Olympic discipline
+    :param event: html name of medal event
+    :param base_url: root of results pages, defaults to EVT_URL
+    :return: str with full url
+    """
+    # a few disciplines for Tokyo2020 use a different results screen url format...
+    if disc in evtrnk_lst:
+        sfx: str = "/event-ranking-"
+    else:
+        sfx: str = "/medals-and-ranking-"
+
+    return base_url + str(disc) + sfx + str(event) + ".htm"
+
+def _cell_text(cell):
+    """
+    :param cell: lxml td or th element
+    :return: str with the cell text, whitespace collapsed the way pd.read_html does
+    """
+    return " ".join(cell.text_content().split())
+
+def find_table(doc, match: str = None, table_id: str = None):
+    """
+    locate the one table wanted on a parsed page, by id or by text it contains.
+    like pd.read_html(match=...), a table is skipped if a table nested in it also matches
+    :param doc: lxml.html root element of the page
+    :param match: plain text the table must contain, such as "Medals and Ranking"
+    :param table_id: id attribute of the table, checked instead of match
+    :return: lxml table element, or None unless exactly one table matched
+    """
+    if table_id:
+        tbls: list = doc.xpath("//table[@id=$tid]", tid=table_id)
+    else:
+        tbls: list = [t for t in doc.iter("table") if match in t.text_content()]
+        tbls = [t for t in tbls
+                if not any(match in n.text_content() for n in t.iterdescendants("table"))]
+
+    return tbls[0] if len(tbls) == 1 else None
+
+def table_rows(tbl):
+    """
+    one pass over a table's rows collecting the header, the cell text, and the alt text
+    of any images in each row (medal icons on the Olympics site carry the place in alt)
+    :param tbl: lxml table element
+    :return: tuple of (header list, list of row lists, list of alt lists), None if the
+        table has merged cells or ragged rows and needs the full html5lib parse
+    """
+    header: list = None
+    rows: list = []
+    alts: list = []
+    for tr in tbl.iter("tr"):
+        if next(tr.iterancestors("table")) is not tbl:
+            continue
+        cells: list = [c for c in tr if c.tag in ("td", "th")]
+        if not cells:
+            continue
+        if any(c.get("colspan", "1") != "1" or c.get("rowspan", "1") != "1" for c in cells):
+            return None
+        if header is None and not rows and all(c.tag == "th" for c in cells):
+            header = [_cell_text(c) for c in cells]
+            continue
+        rows.append([_cell_text(c) for c in cells])
+        alts.append([img.get("alt") for img in tr.iter("img")])
+    if header is None or any(len(r) != len(header) for r in rows):
+        return None
+
+    return header, rows, alts
+
+def _read_table_html5lib(page: str, match: str = None, table_id: str = None,
+                         want_alts: bool = False):
+    """
+    slow but forgiving fallback for read_table: pd.read_html with html5lib, plus a
+    BeautifulSoup pass for image alt text only if the caller wants it
+    :return: tuple of (pd.DataFrame, list of alt lists per row), or None
+    """
+    kwargs: dict = {"attrs": {"id": table_id}} if table_id else {"match": match}
+    try:
+        frames: list = pd.read_html(StringIO(page), flavor="html5lib", **kwargs)
+    except ValueError:
+        return None
+    if len(frames) != 1:
+        return None
+
+    alts: list = []
+    if want_alts:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(page, 'html5lib')
+        tablex = soup.find("table", {"id": table_id}) if table_id else soup
+        for tr in tablex.find_all("tr"):
+            if tr.find_all("td"):
+                alts.append([img.get("alt") for img in tr.find_all("img")])
+
+    return frames[0], alts
+
+def read_table(page: str, match: str = None, table_id: str = None, flavor: str = "lxml",
+               want_alts: bool = False):
+    """
+    parse just the target table out of a page: lxml builds the tree once, the table is
+    found by id or text, and cells plus img alt text come out in a single walk of its
+    rows. merged cells, ragged rows, or a page lxml chokes on fall back to html5lib.
+    :param page: str with html of the page
+    :param match: plain text the table must contain, used if table_id not given
+    :param table_id: id attribute of the table
+    :param flavor: "lxml" for the fast path with fallback, "html5lib" to skip it
+    :param want_alts: html5lib fallback only collects img alt text if True
+    :return: tuple of (pd.DataFrame, list of alt lists per row), None if not found
+    """
+    parsed = None
+    if flavor == "lxml":
+        try:
+            import lxml.html
+            from lxml.etree import ParserError
+
+            doc = lxml.html.fromstring(page)
+            tbl = find_table(doc, match=match, table_id=table_id)
+            parsed = table_rows(tbl) if tbl is not None else None
+        except (ImportError, ValueError, ParserError):
+            parsed = None
+    if parsed is None:
+        return _read_table_html5lib(page, match, table_id, want_alts)
+
+    header, rows, alts = parsed
+    # TextParser is what read_html uses to build its frames, so dtypes come out the same
+    tdf: pd.DataFrame = pd.io.parsers.TextParser([header] + rows, header=0).read()
+
+    return tdf, alts
+
+def normalize_standings(rdf: pd.DataFrame):
+    """
+    vectorized cleanup of raw standings from parse_event_page(normalize=False): split the
+    NOC prefix off the entrant, and make final_place an int with 0 for "DNS", "DNF", etc.
+    meant to run once over the concatenated raw frames of many events
+    :param rdf: pd.DataFrame with discipline, event, entrant, entrant_col, final_place
+    :return: pd.DataFrame with discipline, event, NOC, Name, final_place
+    """
+    entrant = rdf["entrant"].astype(str)
+    # individual events list "NOC First Last", team and boat events "NOCTeam Name"
+    is_name = rdf["entrant_col"].eq("Name").to_numpy()
+    ndf: pd.DataFrame = rdf[["discipline", "event"]].copy()
+    ndf["NOC"] = entrant.str[:3].where(rdf["entrant"].notna())
+    ndf["Name"] = pd.Series(np.where(is_name, entrant.str.partition(" ")[2].str[1:],
+                                     entrant.str[3:]), index=rdf.index).where(rdf["entrant"].notna())
+    # housekeeping on standings: may contain "DNS", "DNF", etc strings...
+    # ties are listed as "=3", keep the digits so they are not lost with the strings
+    place = rdf["final_place"].astype(str).str.extract(r"(\d+)", expand=False)
+    ndf["final_place"] = pd.to_numeric(place, errors="coerce").fillna(0).astype(int)
+    ndf = ndf.fillna(0)
+    ndf.set_index(['discipline', 'event', 'final_place'], drop=False, inplace=True)
+
+    return ndf
+
+def normalize_event_frames(frames: list):
+    """
+    normalize the raw standings of many events in one normalize_standings call, then
+    cut the records back into events by row counts, which the cleanup never changes
+    :param frames: list of raw pd.DataFrame from parse_event_page(normalize=False)
+    :return: list of list of dict, one list per frame in the same order
+    """
+    if not frames:
+        return []
+    recs: list = normalize_standings(pd.concat(frames, ignore_index=True)).to_dict("records")
+    ends = np.cumsum([len(f) for f in frames])
+    starts = np.concatenate(([0], ends[:-1]))
+
+    return [recs[start:stop] for start, stop in zip(starts, ends)]
+
+def parse_event_page(page: str, disc, event, flavor: str = "lxml", normalize: bool = True):
+    """
+    parse the final standings table out of a results page already fetched as text
+    :param page: str with html of the event results page
+    :param disc: html name of Olympic discipline
+    :param event: html name of medal event
+    :param flavor: "lxml" for the fast table reader, "html5lib" for the full parse
+    :param normalize: False returns raw standings so normalize_standings can run once
+        over many events, see iter_event_results
+    :return: pd.DataFrame with discipline, event, NOC, Name, final_place or None on errors
+    """
+    if disc in evtrnk_lst:
+        parsed = read_table(page, match="Event Ranking", flavor=flavor)
+    else:
+        parsed = read_table(page, match="Medals and Ranking", flavor=flavor)
+    if parsed is None:
+        print("simple_event_entry: html parsing errors...\n")
+        return None
+
+    respdf: pd.DataFrame = parsed[0]
+    respdf.dropna(axis='columns', inplace=True, thresh=5)
+    entrant_col: str = next((c for c in ("Name", "Team", "Boat") if c in respdf.columns), None)
+    rawdf = pd.DataFrame({"discipline": disc, "event": event,
+                          "entrant": respdf[entrant_col] if entrant_col else None,
+                          "entrant_col": entrant_col,
+                          "final_place": respdf["Rank" if "Rank" in respdf.columns
+                                                else "final_place"]},
+                         index=respdf.index)
+
+    return normalize_standings(rawdf) if normalize else rawdf
+
+def simple_event_entry(disc, event, debug: bool=False, base_url: str = EVT_URL,
+                       throttle: HostThrottle = None, page: str = None, normalize: bool = True):
     """
       Names and NOCs entered for a specific medal event
       Beautiful Soup requires dealing with 4 types of objects:
@@ -152,117 +513,192 @@ def simple_event_entry(disc, event, debug: bool=False):
               BeautifulSoup represents the html document as a whole, and
                   can be dealt with as a Tag
 
+      pages are fetched through the shared, pooled session in gs_fetch so repeated
+      calls reuse keep-alive connections instead of a new handshake per event.
 
       :param disc: official name of Olympic discipline
       :param event: official name of medal_event
       :param debug: if True prints status of current disc and event being processed
+      :param base_url: root of results pages, defaults to EVT_URL, can point to a local server
+      :param throttle: optional HostThrottle shared by concurrent callers
+      :param page: html text of the results page if already fetched, skips the request
+      :param normalize: False returns raw standings, see parse_event_page
       :return:
       """
-    import re
-
-    def chknum(y):
-        """
-        check if var is all numeric, else return 0
-        :param y: field to check for numeric
-        :return:
-        """
-        if re.search("[0-9]", y):
-            return y
-        else:
-            return 0
-
-    def get_splt(nam):
-        """
-        inner fx to find split position for name field scraped from web
-        :param nam: str Name field from Dataframe of scraped olympic entries
-        :return: position to use for splicing the field
-        """
-        splt = str(nam).partition(" ")[2]
-        return splt[1:]
-
-    # a few disciplines for Tokyo2020 use a different results screen url format...
-    if disc in evtrnk_lst:
-        sfx: str = "/event-ranking-"
-    else:
-        sfx: str = "/medals-and-ranking-"
-    fqurl = EVT_URL + str(disc) + sfx + str(event) + ".htm"
+    fqurl = event_url(disc, event, base_url)
     if debug:
         print("getting %s results for event: %s" %(disc, event))
-    try:
-        if disc in evtrnk_lst:
-            pandas_resp = pd.read_html(fqurl, match="Event Ranking", flavor="html5lib")
-        else:
-            pandas_resp = pd.read_html(fqurl, match="Medals and Ranking", flavor="html5lib")
-    except HTTPError as err:
-        if err.code == 404:
+    if page is None:
+        if throttle:
+            throttle.wait(fqurl)
+        status, page = gsf.get_page(fqurl)
+        cache = gsf.get_cache()
+        if status == 404:
             print("404 Error on url: %s" %fqurl)
             respdf = pd.DataFrame({'discipline': [], })
             return respdf
-        else:
-            raise
-
-    if len(pandas_resp) == 1:
-        respdf = pandas_resp[0].copy(deep=True)
-        respdf.dropna(axis='columns', inplace=True, thresh=5)
-
-        if 'Name' in respdf.columns:
-            respdf['NOC'] = respdf['Name'].apply(lambda x: str(x)[0:3])
-            respdf['Name'] = respdf['Name'].apply(lambda x: get_splt(x))
-        elif 'Team' in respdf.columns:
-            respdf['NOC'] = respdf['Team'].apply(lambda x: str(x)[0:3])
-            respdf['Name'] = respdf['Team'].apply(lambda x: str(x)[3:])
-            respdf.drop(columns=['Team'], inplace=True)
-        elif 'Boat' in respdf.columns:
-            respdf['NOC'] = respdf['Boat'].apply(lambda x: str(x)[0:3])
-            respdf['Name'] = respdf['Boat'].apply(lambda x: str(x)[3:])
-            respdf.drop(columns=['Boat'], inplace=True)
-
-        respdf['event'] = event
-        respdf['discipline'] = disc
-        if 'Rank' in respdf.columns:
-            respdf = respdf.rename(columns={"Rank": "final_place"})
-
-        # housekeeping on standings: may contain "DNS", "DNF", etc strings...
-        respdf['final_place'] = respdf['final_place'].astype(str)
-        respdf['final_place'] = respdf['final_place'].apply(lambda x: chknum(x))
-        respdf['final_place'] = respdf['final_place'].astype(float)
-        respdf['final_place'] = respdf['final_place'].astype(int)
-        respdf.fillna(0, inplace=True)
-
-        respdf = respdf.reindex(["discipline", "event", "NOC", "Name", "final_place"], axis=1)
-        respdf.set_index(['discipline', 'event', 'final_place'], drop=False, inplace=True)
-    else:
-        print("simple_event_entry: html parsing errors...\n")
-        return None
+        elif page is None and cache is not None and cache.offline:
+            # offline and not in the page cache: skip this event, the rest can still run
+            print("offline, no cached page for %s %s: %s" %(disc, event, fqurl))
+            return pd.DataFrame({'discipline': [], })
+        elif page is None:
+            raise HTTPError(fqurl, status, "failed to fetch event page", None, None)
 
-    return respdf
+    return parse_event_page(page, disc, event, normalize=normalize)
 
-def process_disc_and_event(dis, gdf: pd.DataFrame):
+def get_event_keys(dis, gdf: pd.DataFrame):
     """
-    gets the final standings for all events for the list of disciplines passed in
-    as dis. calls simple_event_entry with pandas read_html to scrape data
-    and then processes to generate complete lists for sports at Olympics
+    list the (discipline html, event html) pairs to scrape, in discipline order and
+    sorted by gender and event name within each discipline
     :param dis: list of dict, each entry an Olympic "discipline"
     :param gdf: pd.DataFrame with info on all Olympic events, such as event url ending
-    :return:
+    :return: list of tuple
     """
-    event_lst: list = []
+    evt_keys: list = []
     for y in range(len(dis)):
         dis_url = dis[y]['htmlq']
         dis_name = dis[y]['discipline']
         tmpdf: pd.DataFrame = gdf.loc[gdf['Sport'] == dis_name]
-        tmpdf.sort_values(by=['Gender', 'Event'], inplace=True)
+        tmpdf = tmpdf.sort_values(by=['Gender', 'Event'])
         for x in range(len(tmpdf)):
-            evt_url = tmpdf.iat[x, 5]
-            edf: pd.DataFrame = simple_event_entry(dis_url, evt_url, debug=True)
-            if not len(edf) == 0:
-                evtrecs = edf.to_dict("records")
-                event_lst.append(evtrecs)
-    print("\n    sourcing event results complete, %d events scraped\n" %len(event_lst))
+            evt_keys.append((dis_url, tmpdf.iat[x, 5]))
 
-    return event_lst
+    return evt_keys
 
-def get_all_medalists(country: str="united-states"):
+def iter_event_results(dis, gdf: pd.DataFrame, workers: int = 1, max_rate: float = 4.0,
+                       base_url: str = EVT_URL, checkpoint: str = None, batch: int = 16):
+    """
+    generator version of process_disc_and_event: yields the final standings for one
+    event at a time, in discipline/event order.
+    with workers > 1 a thread pool scrapes at most 2 x workers events ahead of the
+    consumer, so memory stays flat however many events are scraped.
+    raw standings are cleaned by one normalize_standings call per batch of events, and
+    with a checkpoint file each batch is appended to it in one write. events already in
+    the checkpoint are not fetched again, so a rerun after a crash or Ctrl-C only
+    scrapes the events that are still missing.
+    :param dis: list of dict, each entry an Olympic "discipline"
+    :param gdf: pd.DataFrame with info on all Olympic events, such as event url ending
+    :param workers: number of concurrent scraper threads, 1 for sequential
+    :param max_rate: max requests per second sent to one host across all workers
+    :param base_url: root of results pages, defaults to EVT_URL
+    :param checkpoint: optional resultsbak-format csv used to persist and resume the scrape
+    :param batch: number of events normalized and checkpointed together
+    :return: generator of list of dict, one list per event with its final standings
+    """
+    evt_keys: list = get_event_keys(dis, gdf)
+    throttle = HostThrottle(max_rate)
+
+    done: dict = {}
+    if checkpoint and os.path.isfile(checkpoint):
+        for evtrecs in iter_events_from_bak(checkpoint):
+            # csv gives every field back as str, type final_place as a fresh scrape does
+            for rec in evtrecs:
+                rec['final_place'] = int(float(rec['final_place'] or 0))
+            done[(evtrecs[0]['discipline'], evtrecs[0]['event'])] = evtrecs
+        print("    checkpoint %s has %d events, skipping those" %(checkpoint, len(done)))
+
+    def fetch_one(key: tuple):
+        edf = simple_event_entry(key[0], key[1], debug=True, base_url=base_url,
+                                 throttle=throttle, normalize=False)
+        return edf if edf is not None and len(edf) > 0 else None
+
+    def flush(ready: list):
+        """
+        normalize the raw frames in ready together and checkpoint them
+        :param ready: list of raw pd.DataFrame or, for checkpointed events, list of dict
+        :return: list of list of dict, one per entry in ready
+        """
+        raw: list = [x for x in ready if isinstance(x, pd.DataFrame)]
+        fresh: list = normalize_event_frames(raw)
+        if checkpoint and fresh:
+            wmode: str = "a" if os.path.isfile(checkpoint) else "w"
+            gsu.save_dcts_tocsv([rec for evtrecs in fresh for rec in evtrecs], checkpoint,
+                                wmode=wmode)
+        fresh_it = iter(fresh)
+        return [next(fresh_it) if isinstance(x, pd.DataFrame) else x for x in ready]
+
+    lookahead: int = workers * 2 if workers > 1 else 0
+    pending: deque = deque()
+    pool = ThreadPoolExecutor(max_workers=max(workers, 1))
+
+    def in_order():
+        # drain oldest first so events come out in the same order they went in
+        for key in evt_keys:
+            pending.append((key, None if key in done else pool.submit(fetch_one, key)))
+            while len(pending) > lookahead:
+                key, fut = pending.popleft()
+                yield done.pop(key) if fut is None else fut.result()
+        while pending:
+            key, fut = pending.popleft()
+            yield done.pop(key) if fut is None else fut.result()
+
+    evt_count: int = 0
+    ready: list = []
+    try:
+        for res in in_order():
+            if res is not None:
+                ready.append(res)
+            if len(ready) >= batch:
+                out: list = flush(ready)
+                ready = []
+                for evtrecs in out:
+                    evt_count += 1
+                    yield evtrecs
+        out: list = flush(ready)
+        ready = []
+        for evtrecs in out:
+            evt_count += 1
+            yield evtrecs
+    finally:
+        # on a crash or Ctrl-C, events parsed but not yet in a full batch still get saved
+        if checkpoint and ready:
+            flush(ready)
+        pool.shutdown(wait=True, cancel_futures=True)
+    print("\n    sourcing event results complete, %d events\n" %evt_count)
+
+def process_disc_and_event(dis, gdf: pd.DataFrame, workers: int = 1, max_rate: float = 4.0,
+                           base_url: str = EVT_URL, checkpoint: str = None):
+    """
+    gets the final standings for all events for the list of disciplines passed in
+    as dis. calls simple_event_entry with pandas read_html to scrape data
+    and then processes to generate complete lists for sports at Olympics.
+    collects iter_event_results into a list, see there for workers and checkpoint.
+    :param dis: list of dict, each entry an Olympic "discipline"
+    :param gdf: pd.DataFrame with info on all Olympic events, such as event url ending
+    :param workers: number of concurrent scraper threads, 1 for sequential
+    :param max_rate: max requests per second sent to one host across all workers
+    :param base_url: root of results pages, defaults to EVT_URL
+    :param checkpoint: optional resultsbak-format csv used to persist and resume the scrape
+    :return: list of list of dict, one list per event with its final standings
+    """
+    return list(iter_event_results(dis, gdf, workers=workers, max_rate=max_rate,
+                                   base_url=base_url, checkpoint=checkpoint))
+
+def parse_medalist_page(page: str, country: str="united-states", flavor: str = "lxml"):
+    """
+    parse the medalist table and medal icons out of a NOC medalist page fetched as text.
+    the table and the alt text of its medal icons come from one read_table pass.
+    :param page: str with html of the noc-medalist-by-sport page
+    :param country: slug of the NOC, used for messages
+    :param flavor: "lxml" for the fast table reader, "html5lib" for the full parse
+    :return: pd.DataFrame with all medalists for country, and the same as list of dict
+    """
+    parsed = read_table(page, table_id="medal-standings-table", flavor=flavor, want_alts=True)
+    if parsed is None:
+        print("no medal-standings-table found for %s \n" % country)
+        return pd.DataFrame(), []
+    pd_res, row_alts = parsed
+
+    # page gives medal icons rather than just place or number, alt text holds the place
+    places: list = [next((a for a in alts if a in ("1", "2", "3")), None) for alts in row_alts]
+    pd_res['Medal'] = pd.Series(places, index=pd_res.index, dtype=object).map(
+        {'1': "gold", '2': "silver", "3": "bronze"})
+    evt_sum = pd_res.to_dict("records")
+    print("sourced %d medalists for %s \n" %(len(evt_sum),country))
+
+    return pd_res, evt_sum
+
+def get_all_medalists(country: str="united-states", page: str = None):
     """
     mixture of pandas and bs4 to scrape medalist info from Olympics site.
     uses requests as well- short brief on requests parms:
@@ -272,8 +708,9 @@ def get_all_medalists(country: str="united-states"):
         cookies – (optional) CookieJar object to send with the Request.
         auth – (optional) AuthObject to enable Basic HTTP Auth.
         timeout – (optional) Float describing the timeout of the request.
-    - I learned to use the headers included as constant at top of this file, a hacker
+    - I learned to use the headers included as constant at top of gs_fetch, a hacker
     told me it can reduce the incidence of scrapes being rejected/messed with!!
+    requests go through the pooled session in gs_fetch, which carries these headers.
 
     soup accepts these parsers:  "lxml", "lxml-xml", "html.parser", or "html5lib"
 
@@ -281,39 +718,128 @@ def get_all_medalists(country: str="united-states"):
     (gold,silver, or bronze), also has "alt" text 1,2, or 3 to indicate place.
     example: <img class="medal-icon" src="../medals/big/1.png" alt="1">
     :param country: defaults to united states, identifies which NOCs athletes to list
+    :param page: html text of the medalist page if already fetched, skips the request
     :return: pd.DataFrame with all medalists for country plus what event and medal
     """
+    if page is None:
+        full_url = MDLST_URL + country + ".htm"
+        status, page = gsf.get_page(full_url)
+        if page is None:
+            raise HTTPError(full_url, status, "failed to fetch medalist page", None, None)
 
-    def medl(x):
-        """
-        inner function to replace Medal 'ordinal' (1, 2, or 3) with medal type name
-        :param x: str of '1', '2', or '3'
-        :return: "gold", "silver" or "bronze"
-        """
-        return {'1': "gold", '2': "silver", "3": "bronze"}[x]
-
-    full_url = MDLST_URL + country + ".htm"
-    page = requests.get(full_url, headers=headers)
-    soup = BeautifulSoup(page.text, 'html5lib')
-    pd_res = pd.read_html(page.text)[0]
-
-    places = []
-    tablex = soup.find("table", {"id":"medal-standings-table"})
-    for tr in tablex.findAll("tr"):
-        tds = tr.findAll("td")
-        for elem in tds:
-            # page gives medal icons rather than just place or number, workaround:
-            try:
-                placetxt = elem.find('img')['alt']
-                if str(placetxt) in ["1", "2", "3"]:
-                    places.append(placetxt)
-            except (HTTPError, TypeError) as err:
-                print("exception caught while reading medalists...")
-                pass
-
-    pd_res['Medal'] = places
-    pd_res['Medal'] = pd_res['Medal'].apply(lambda x: medl(x))
-    evt_sum = pd_res.to_dict("records")
-    print("sourced %d medalists for %s \n" %(len(evt_sum),country))
+    return parse_medalist_page(page, country)
 
-    return pd_res, evt_sum
\ No newline at end of file
+def noc_slug(noc: str, countries: dict):
+    """
+    medalist page slug for an NOC, built from its country_codes name, such as
+    "Côte d'Ivoire" -> "cote-d-ivoire", unless NOC_SLUG_FIX has the site's own slug
+    :param noc: 3-letter NOC code
+    :param countries: dict of key=NOC, val=country name, from get_list_file(nocf)
+    :return: str slug for MDLST_URL
+    """
+    if noc in NOC_SLUG_FIX:
+        return NOC_SLUG_FIX[noc]
+    name: str = unicodedata.normalize("NFKD", countries.get(noc, noc))
+    name = name.encode("ascii", "ignore").decode("ascii").lower()
+
+    return "-".join("".join(c if c.isalnum() else " " for c in name).split())
+
+def medal_nocs(medals):
+    """
+    NOCs that won at least one medal
+    :param medals: output of get_noc_medalct, or the tally_noc_medals DataFrame
+    :return: list of 3-letter NOC codes, in medal table order for a tally
+    """
+    if isinstance(medals, pd.DataFrame):
+        return medals.index[medals["Total"] > 0].tolist()
+
+    return list(dict.fromkeys(noc for _, cnts in medals for noc in cnts))
+
+def get_medalists(slugs: list = None, medals=None, countries: dict = None,
+                  max_conns: int = 8, bakfile: str = None):
+    """
+    batched get_all_medalists: fetch the medalist pages for many NOCs concurrently over
+    one pooled client and return them as a single table with an NOC column.
+    pass slugs, or medals plus countries to scrape every medal-winning NOC.
+    :param slugs: list of medalist page slugs, such as "united-states"
+    :param medals: output of get_noc_medalct or tally_noc_medals, used if slugs not given
+    :param countries: dict of key=NOC, val=country name, maps slugs back to NOC codes
+    :param max_conns: size of the shared connection pool
+    :param bakfile: if given, the combined medalists are written to this csv once
+    :return: pd.DataFrame with all medalists plus NOC column, and the same as list of dict
+    """
+    countries = countries if countries else {}
+    slug_noc: dict = {noc_slug(noc, countries): noc for noc in countries}
+    slug_noc.update({v: k for k, v in NOC_SLUG_FIX.items()})
+    if slugs is None:
+        slugs = [noc_slug(noc, countries) for noc in medal_nocs(medals)]
+
+    def mdl_parser(slug: str):
+        def parse_fx(status, page):
+            if page is None:
+                print("%d Error on medalist page for %s" %(status, slug))
+                return None
+            mdf = parse_medalist_page(page, slug)[0]
+            mdf.insert(0, "NOC", slug_noc.get(slug, slug))
+            return mdf
+        return parse_fx
+
+    jobs: list = [(MDLST_URL + slug + ".htm", mdl_parser(slug)) for slug in slugs]
+    parsed: list = gsf.run_fetch_and_parse(jobs, max_conns=max_conns)
+    missed: list = [slug for slug, mdf in zip(slugs, parsed) if mdf is None]
+    frames: list = [mdf for mdf in parsed if mdf is not None and len(mdf) > 0]
+    mdl_df: pd.DataFrame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    mdl_lst: list = mdl_df.to_dict("records")
+    gsc.apply_schema(mdl_df, "medalists")
+    print("\n    sourced %d medalists for %d of %d NOCs\n" %(len(mdl_lst), len(slugs) - len(missed),
+                                                          len(slugs)))
+    if missed:
+        print("    no medalist page for: %s\n" % ", ".join(missed))
+    if bakfile and mdl_lst:
+        gsu.save_dcts_tocsv(mdl_lst, bakfile)
+
+    return mdl_df, mdl_lst
+
+def scrape_events_and_medalists(dis, gdf: pd.DataFrame, countries: list = None,
+                                max_conns: int = 8, base_url: str = EVT_URL):
+    """
+    one-pass async scrape of every event results page plus the medalist pages for a
+    list of NOCs. all pages share one pooled client holding at most max_conns sockets,
+    parsing runs in worker threads so the event loop only moves bytes.
+    :param dis: list of dict, each entry an Olympic "discipline"
+    :param gdf: pd.DataFrame with info on all Olympic events
+    :param countries: list of NOC slugs for medalist pages, such as "united-states"
+    :param max_conns: size of the shared connection pool
+    :param base_url: root of results pages, defaults to EVT_URL
+    :return: list of list of dict with event standings, list of medalist DataFrames
+    """
+    def evt_parser(disc, event):
+        def parse_fx(status, page):
+            if page is None:
+                print("%d Error on url: %s" %(status, event_url(disc, event, base_url)))
+                return None
+            return parse_event_page(page, disc, event, normalize=False)
+        return parse_fx
+
+    def mdl_parser(country):
+        def parse_fx(status, page):
+            if page is None:
+                print("%d Error on medalist page for %s" %(status, country))
+                return None
+            return parse_medalist_page(page, country)[0]
+        return parse_fx
+
+    evt_keys: list = get_event_keys(dis, gdf)
+    jobs: list = [(event_url(d, e, base_url), evt_parser(d, e)) for d, e in evt_keys]
+    countries = countries if countries else []
+    jobs.extend([(MDLST_URL + c + ".htm", mdl_parser(c)) for c in countries])
+
+    parsed: list = gsf.run_fetch_and_parse(jobs, max_conns=max_conns)
+    # standings are cleaned in one pass over every event rather than once per page
+    event_lst: list = normalize_event_frames([edf for edf in parsed[:len(evt_keys)]
+                                              if edf is not None and len(edf) > 0])
+    mdl_lst: list = [x for x in parsed[len(evt_keys):] if x is not None]
+    print("\n    async sourcing complete, %d events and %d NOC medalist pages\n"
+          %(len(event_lst), len(mdl_lst)))
+
+    return event_lst, mdl_lst
@@ -0,0 +1,356 @@
+"""
+one alias index for the keys the datasets use for the same discipline and event.
+events_df has Sport ("3on3 Basketball") and disc_html ("3x3-basketball"), disciplines.csv
+has htmlq and dis_code ("BK3"), medalists_*.csv puts a medal-page sport code in its
+Sport column, and athletes has free-form category and event names ("3on3Hoops").
+every spelling is normalized and mapped to a dis_code, and every event name to its
+(disc_html, evt_html) key, so a lookup is one dict read. ids are gs_vocab ids of the
+dis_code and event_key vocabularies, so keyed frames merge on ints in a single pass.
+
+    idx = gsk.load_index(RAWDIR)
+    idx.disc("3on3Hoops")                                   # 'BK3'
+    mdf = idx.merge(medalist_df, "medalists", events_df, "events", on="evt_id")
+    python gs_keys.py --outdir output/
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+import gs_vocab as gsv
+from gs_datadict import (KEY_ALIAS_FIX, LOADDIR, OUTDIR, RAWDIR, aliasf, discf,
+                         evts_byrow_pfx, medalists_pfx, timelinef)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+GENDER_TOKENS: dict = {"men": "Men", "women": "Women", "mixed": "Mixed"}
+# per dataset: column giving the discipline (first that resolves wins), the event
+# column and the gender column. exact means the pair is already (disc_html, evt_html)
+KEY_SPEC: dict = {
+    "events": {"disc": ["Sport"], "exact": ("disc_html", "evt_html")},
+    "results": {"exact": ("discipline", "event")},
+    "medalists": {"disc": ["Sport"], "event": "Event", "gender": None},
+    "athletes": {"disc": ["event", "category"], "event": "event", "gender": "gender"},
+    "timeline": {"disc": ["dis_code"]},
+}
+
+def norm_key(val):
+    """
+    :param val: discipline name, code or html name in any spelling
+    :return: str lower case letters and digits only, "" for blanks
+    """
+    if val is None or val is pd.NA or (isinstance(val, float) and val != val):
+        return ""
+
+    return "".join(TOKEN_RE.findall(str(val).lower()))
+
+def event_tokens(name, gender=None):
+    """
+    split an event name into a gender and an order-free name, so "Women's 200m
+    Breaststroke", "women-s-200m-breaststroke" and "Skeet Women" line up
+    :param name: event name or evt_html
+    :param gender: gender to use if the name has none
+    :return: tuple of (gender or "", name key)
+    """
+    toks: list = TOKEN_RE.findall(str(name).lower()) if isinstance(name, str) else []
+    found: list = [GENDER_TOKENS[t] for t in toks if t in GENDER_TOKENS]
+    rest: list = sorted(t for t in toks if t not in GENDER_TOKENS and t != "s")
+    gend = found[0] if found else gender
+    if gend is None or gend is pd.NA or (isinstance(gend, float) and gend != gend):
+        gend = ""
+
+    return str(gend), " ".join(rest)
+
+def _lut(uniq_ids: list):
+    # id per unique value, plus -1 at the end for the -1 codes of missing values
+    return np.append(np.asarray(uniq_ids, dtype=np.int32), np.int32(-1))
+
+class AliasIndex:
+    """
+    alias -> dis_code and event name -> (disc_html, evt_html) maps, built once from
+    disciplines.csv and events_df and saved as json. all lookups are dict reads,
+    the vectorized helpers resolve each distinct value once and expand by codes.
+    """
+    def __init__(self, disc: dict = None, html: dict = None, event: dict = None,
+                 evt_disc: dict = None, stamp: dict = None):
+        """
+        :param disc: normalized alias -> dis_code
+        :param html: dis_code -> disc_html
+        :param event: "disc_html|gender|name key" -> [disc_html, evt_html]
+        :param evt_disc: "disc_html|evt_html" -> dis_code
+        :param stamp: source file stamps the index was built from
+        """
+        self.disc_map: dict = disc or {}
+        self.html: dict = html or {}
+        self.event_map: dict = event or {}
+        self.evt_disc: dict = evt_disc or {}
+        self.stamp: dict = stamp or {}
+
+    @classmethod
+    def build(cls, dis: list, edf: pd.DataFrame, tldf: pd.DataFrame = None, stamp: dict = None):
+        """
+        :param dis: list of dict from disciplines.csv
+        :param edf: events_df
+        :param tldf: optional medal timeline, adds its discipline names
+        :param stamp: source file stamps to save with the index
+        :return: AliasIndex
+        """
+        idx = cls(stamp=stamp)
+        for d in dis:
+            code: str = d["dis_code"]
+            idx.html.setdefault(code, d["htmlq"])
+            # alt_names can be a name, a code or both, such as SOF-Softball
+            alt: str = d.get("alt_names") or ""
+            alts: list = [alt] + alt.split("-") if alt else []
+            for alias in [d["discipline"], code] + alts:
+                idx.add_disc(alias, code)
+        # an htmlq shared by several disciplines (equestrian) is left to the event level
+        by_html: dict = {}
+        for code, html in idx.html.items():
+            by_html.setdefault(html, []).append(code)
+        for html, codes in by_html.items():
+            if len(codes) == 1:
+                idx.add_disc(html, codes[0])
+        for alias, code in KEY_ALIAS_FIX.items():
+            idx.disc_map[norm_key(alias)] = code
+        if tldf is not None:
+            for alias, code in zip(tldf["discipline"], tldf["dis_code"]):
+                idx.add_disc(alias, code)
+
+        rows: list = list(zip(edf["Sport"].astype(str), edf["disc_html"].astype(str),
+                              edf["evt_html"].astype(str), edf["Event"].astype(str),
+                              edf["Gender"].astype(str)))
+        per_gender: dict = {}
+        per_name: dict = {}
+        for sport, html, evt, name, gend in rows:
+            idx.evt_disc[html + "|" + evt] = idx.disc(sport)
+            for nam in (name, evt):
+                tok_g, tok = event_tokens(nam, gend)
+                idx.event_map.setdefault("|".join((html, tok_g, tok)), [html, evt])
+                per_name.setdefault((html, tok), set()).add(evt)
+            per_gender.setdefault((html, gend), set()).add(evt)
+        # a name unique in its discipline resolves without a gender, and a discipline
+        # with one event for a gender resolves from the gender alone (team sports)
+        for (html, tok), evts in per_name.items():
+            if len(evts) == 1:
+                idx.event_map.setdefault("|".join((html, "", tok)), [html, next(iter(evts))])
+        for (html, gend), evts in per_gender.items():
+            if len(evts) == 1:
+                idx.event_map.setdefault("|".join((html, gend, "")), [html, next(iter(evts))])
+
+        return idx
+
+    def add_disc(self, alias, code: str):
+        """
+        :param alias: any spelling of a discipline, blanks are skipped
+        :param code: dis_code it stands for, an alias already taken is not moved
+        :return: None
+        """
+        key: str = norm_key(alias)
+        if key:
+            self.disc_map.setdefault(key, code)
+
+    def disc(self, alias):
+        """
+        :param alias: discipline name, dis_code, htmlq, medal-page code or athlete name
+        :return: dis_code, None if it does not resolve
+        """
+        return self.disc_map.get(norm_key(alias))
+
+    def event(self, html: str, name, gender=None):
+        """
+        :param html: disc_html of the discipline
+        :param name: event name or evt_html
+        :param gender: gender if the name does not carry one
+        :return: (disc_html, evt_html) tuple, None if it does not resolve
+        """
+        gend, tok = event_tokens(name, gender)
+        for key in ((html, gend, tok), (html, "", tok), (html, gend, "")):
+            hit = self.event_map.get("|".join(key))
+            if hit:
+                return tuple(hit)
+
+        return None
+
+    def disc_ids(self, values):
+        """
+        :param values: pd.Series or list of discipline aliases
+        :return: np.ndarray of dis_code vocab ids, -1 where unresolved
+        """
+        codes, uniq = pd.factorize(pd.Series(values))
+        dis: list = [self.disc(u) for u in uniq]
+        voc = gsv.vocab("dis_code", [d for d in dis if d])
+
+        return _lut([voc.get(d) if d else -1 for d in dis])[codes]
+
+    def event_ids(self, htmls, names, genders=None):
+        """
+        :param htmls: disc_html per row
+        :param names: event name or evt_html per row
+        :param genders: optional gender per row
+        :return: np.ndarray of event_key vocab ids, -1 where unresolved
+        """
+        genders = genders if genders is not None else [None] * len(names)
+        codes, uniq = pd.MultiIndex.from_arrays(
+            [pd.Series(htmls, dtype=object), pd.Series(names, dtype=object),
+             pd.Series(genders, dtype=object)]).factorize()
+        keys: list = [self.event(h, n, g) if isinstance(h, str) else None for h, n, g in uniq]
+        voc = gsv.vocab("event_key", [k for k in keys if k])
+
+        return _lut([voc.get(k) if k else -1 for k in keys])[codes]
+
+    def with_keys(self, df: pd.DataFrame, dataset: str):
+        """
+        :param df: frame from one of the KEY_SPEC datasets
+        :param dataset: events, results, medalists, athletes or timeline
+        :return: copy of df with int32 dis_id and evt_id columns, -1 where unresolved
+        """
+        spec: dict = KEY_SPEC[dataset]
+        out: pd.DataFrame = df.copy(deep=False)
+        dis_id: np.ndarray = np.full(len(df), -1, dtype=np.int32)
+        for col in spec.get("disc", []):
+            miss = dis_id < 0
+            dis_id[miss] = self.disc_ids(df[col])[miss]
+        evt_id: np.ndarray = np.full(len(df), -1, dtype=np.int32)
+        if "exact" in spec:
+            hcol, ecol = spec["exact"]
+            codes, uniq = pd.MultiIndex.from_arrays([df[hcol].astype(object),
+                                                     df[ecol].astype(object)]).factorize()
+            keys: list = [tuple(k) for k in uniq]
+            evt_id = _lut(gsv.vocab("event_key", keys).ids(keys))[codes]
+            if "disc" not in spec:
+                dvoc = gsv.vocab("dis_code")
+                dis_id = _lut([dvoc.get(self.evt_disc.get(h + "|" + e)) for h, e in keys])[codes]
+        elif "event" in spec:
+            dvoc = gsv.vocab("dis_code")
+            htmls: list = [self.html.get(dvoc.value(i)) if i >= 0 else None for i in dis_id]
+            gend = df[spec["gender"]].astype(object) if spec.get("gender") else None
+            evt_id = self.event_ids(htmls, df[spec["event"]].astype(object), gend)
+            # a resolved event names its own discipline, which beats a shared code (EQU)
+            evoc = gsv.vocab("event_key")
+            hit = np.flatnonzero(evt_id >= 0)
+            found: list = [dvoc.get(self.evt_disc.get("|".join(evoc.value(i)))) for i in evt_id[hit]]
+            dis_id[hit] = np.where(np.asarray(found) >= 0, found, dis_id[hit])
+        out["dis_id"] = dis_id
+        out["evt_id"] = evt_id
+
+        return out
+
+    def merge(self, left: pd.DataFrame, lset: str, right: pd.DataFrame, rset: str,
+              on: str = "evt_id", how: str = "inner", **kwargs):
+        """
+        key both frames and merge them on the int id column in one pass, rows that
+        did not resolve (-1) are left out of the match
+        :param left: left frame
+        :param lset: KEY_SPEC name of left
+        :param right: right frame
+        :param rset: KEY_SPEC name of right
+        :param on: evt_id or dis_id
+        :param how: merge type, as for pd.merge
+        :return: merged pd.DataFrame
+        """
+        lkey: pd.DataFrame = self.with_keys(left, lset)
+        rkey: pd.DataFrame = self.with_keys(right, rset)
+        rkey = rkey[rkey[on] >= 0].drop(columns=[c for c in ("dis_id", "evt_id") if c != on])
+
+        return lkey.merge(rkey, on=on, how=how, **kwargs)
+
+    def save(self, path: str):
+        """
+        :param path: json file to write, written to a temp file then moved into place
+        :return: None
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmpf: str = path + ".tmp"
+        with open(tmpf, mode='w', encoding='utf-8') as fh:
+            json.dump({"stamp": self.stamp, "disc": self.disc_map, "html": self.html,
+                       "event": self.event_map, "evt_disc": self.evt_disc}, fh)
+        os.replace(tmpf, path)
+
+        return
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        :param path: json file written by save
+        :return: AliasIndex
+        """
+        with open(path, encoding='utf-8') as fh:
+            raw: dict = json.load(fh)
+
+        return cls(raw["disc"], raw["html"], raw["event"], raw["evt_disc"], raw["stamp"])
+
+def load_index(rawdir: str = RAWDIR, cachedir: str = LOADDIR):
+    """
+    the saved alias index if it was built from the current disciplines, events and
+    timeline files, otherwise rebuild and save it
+    :param rawdir: folder with disciplines.csv, the newest events file and the timeline
+    :param cachedir: folder for key_aliases.json
+    :return: AliasIndex
+    """
+    import gs_getters as gsg
+    from gs_snapshots import latest_file
+
+    srcs: dict = {"disciplines": os.path.join(rawdir, discf),
+                  "events": latest_file(rawdir, evts_byrow_pfx),
+                  "timeline": os.path.join(rawdir, timelinef)}
+    stamp: dict = {k: [os.path.basename(f), os.stat(f).st_mtime_ns, os.stat(f).st_size]
+                   for k, f in srcs.items() if f and os.path.isfile(f)}
+    path: str = os.path.join(cachedir, aliasf)
+    if os.path.isfile(path):
+        idx: AliasIndex = AliasIndex.load(path)
+        if idx.stamp == stamp:
+            return idx
+
+    tldf = gsg.load_cached(srcs["timeline"], "timeline") if "timeline" in stamp else None
+    idx = AliasIndex.build(gsg.load_cached(srcs["disciplines"]),
+                           gsg.load_cached(srcs["events"], "events"), tldf, stamp=stamp)
+    idx.save(path)
+
+    return idx
+
+def coverage(idx: AliasIndex, df: pd.DataFrame, dataset: str):
+    """
+    :param idx: AliasIndex
+    :param df: frame to key
+    :param dataset: KEY_SPEC name
+    :return: dict with rows and the share of rows whose discipline and event resolved
+    """
+    kdf: pd.DataFrame = idx.with_keys(df, dataset)
+    nrows: int = max(len(kdf), 1)
+
+    return {"rows": len(kdf), "disc_pct": round(100 * (kdf["dis_id"] >= 0).sum() / nrows, 1),
+            "event_pct": round(100 * (kdf["evt_id"] >= 0).sum() / nrows, 1)}
+
+def main(argv: list = None):
+    import gs_getters as gsg
+    from gs_datadict import athlete_pfx, evtresults_pfx
+    from gs_snapshots import latest_file
+
+    parser = argparse.ArgumentParser(description="build the key alias index, show how much of each dataset it keys")
+    parser.add_argument("--rawdir", default=RAWDIR)
+    parser.add_argument("--outdir", default=OUTDIR, help="folder with results and medalists backups")
+    parser.add_argument("--cachedir", default=LOADDIR)
+    args = parser.parse_args(argv)
+
+    gsv.load_reference(args.rawdir)
+    idx: AliasIndex = load_index(args.rawdir, args.cachedir)
+    print("    %d discipline aliases, %d event aliases" % (len(idx.disc_map), len(idx.event_map)))
+    fils: dict = {"events": latest_file(args.rawdir, evts_byrow_pfx),
+                  "athletes": latest_file(args.rawdir, athlete_pfx),
+                  "timeline": os.path.join(args.rawdir, timelinef),
+                  "results": latest_file(args.outdir, evtresults_pfx),
+                  "medalists": latest_file(args.outdir, medalists_pfx)}
+    for name, fil in fils.items():
+        if fil and os.path.isfile(fil):
+            cov: dict = coverage(idx, gsg.get_olympic_data(fil, name), name)
+            print("    %-10s %7d rows %6.1f%% discipline %6.1f%% event"
+                  % (name, cov["rows"], cov["disc_pct"], cov["event_pct"]))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+lightweight instrumentation for the main.py pipeline: wall time, cpu time, peak
+python memory (tracemalloc), max process RSS and row counts per stage, plus timing
+for each scraped URL. off by default, switch on with enable() or by setting the
+GS_METRICS environment variable to 1. GS_METRICS_FILE overrides the report path.
+
+    with gsm.stage("load_events") as st:
+        events_df = gsg.load_cached(fqf, "events")
+        st["rows"] = len(events_df)
+    gsm.report(OUTDIR + "metrics.json")
+"""
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime as dt
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ENABLED: bool = os.environ.get("GS_METRICS", "") not in ("", "0")
+_stages: list = []
+_urls: list = []
+_lock = threading.Lock()
+
+def enable(on: bool = True):
+    """
+    turn metrics collection on or off for this process
+    :param on: True to collect
+    :return: None
+    """
+    global ENABLED
+    ENABLED = on
+
+    return
+
+def max_rss_kb():
+    """
+    :return: max resident set size of this process so far in KB, None if unavailable
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports KB, macOS reports bytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+@contextmanager
+def stage(name: str, rows: int = None):
+    """
+    time one pipeline stage. the yielded dict is the stage record, set rec["rows"]
+    inside the block to log how many rows the stage produced
+    :param name: stage name for the report
+    :param rows: row count if already known
+    :return: context manager yielding the stage record dict
+    """
+    rec: dict = {"stage": name, "rows": rows}
+    if not ENABLED:
+        yield rec
+        return
+
+    started_trace: bool = not tracemalloc.is_tracing()
+    if started_trace:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    rec["start"] = dt.now().isoformat(timespec="milliseconds")
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        yield rec
+    finally:
+        rec["wall_s"] = round(time.perf_counter() - t0, 4)
+        rec["cpu_s"] = round(time.process_time() - c0, 4)
+        rec["py_peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        rec["rss_max_kb"] = max_rss_kb()
+        if started_trace:
+            tracemalloc.stop()
+        with _lock:
+            _stages.append(rec)
+
+def record_url(url: str, seconds: float, status: int, nbytes: int = 0, source: str = "net"):
+    """
+    log one page fetch, called by gs_fetch for every url it serves
+    :param url: str with full url
+    :param seconds: wall time for the fetch
+    :param status: http status returned
+    :param nbytes: size of the page text
+    :param source: net, cache or revalidated
+    :return: None
+    """
+    if not ENABLED:
+        return
+    with _lock:
+        _urls.append({"url": url, "seconds": round(seconds, 4), "status": status,
+                      "bytes": nbytes, "source": source})
+
+    return
+
+def url_summary(urls: list):
+    """
+    :param urls: list of url records
+    :return: dict with count, total and percentile fetch times and the 5 slowest urls
+    """
+    if not urls:
+        return {"count": 0}
+    secs: list = sorted(u["seconds"] for u in urls)
+    pick = lambda q: secs[min(len(secs) - 1, int(q * len(secs)))]
+
+    return {"count": len(secs), "total_s": round(sum(secs), 3), "p50_s": pick(0.5),
+            "p95_s": pick(0.95), "max_s": secs[-1],
+            "by_source": {s: sum(1 for u in urls if u["source"] == s)
+                          for s in sorted({u["source"] for u in urls})},
+            "slowest": sorted(urls, key=lambda u: -u["seconds"])[:5]}
+
+def report(path: str = None):
+    """
+    print a stage summary and write the full report as json
+    :param path: json file to write, GS_METRICS_FILE env var takes precedence
+    :return: dict with the report, or None if metrics are off
+    """
+    if not ENABLED:
+        return None
+    path = os.environ.get("GS_METRICS_FILE") or path
+    with _lock:
+        rpt: dict = {"created": dt.now().isoformat(timespec="seconds"),
+                     "stages": list(_stages), "urls": list(_urls),
+                     "url_summary": url_summary(_urls)}
+
+    print("\n------ pipeline metrics ------")
+    for rec in rpt["stages"]:
+        rows: str = "%9d rows" % rec["rows"] if rec.get("rows") is not None else " " * 14
+        print("    %-24s %8.3f s wall %8.3f s cpu %10.1f KB peak %s"
+              % (rec["stage"], rec["wall_s"], rec["cpu_s"], rec["py_peak_kb"], rows))
+    if rpt["urls"]:
+        us: dict = rpt["url_summary"]
+        print("    %d urls fetched, %.2f s total, p95 %.3f s" % (us["count"], us["total_s"], us["p95_s"]))
+    if path:
+        with open(path, mode='w', encoding='utf-8') as fh:
+            json.dump(rpt, fh, indent=1, default=str)
+        print("    metrics written to %s\n" % path)
+
+    return rpt
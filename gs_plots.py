@@ -5,22 +5,40 @@ import sys
 
 import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.io as pio
 
 from gs_datadict import GS_COLOR, TRACE_COLRS, HT_NORM
 
-pio.renderers.default = 'browser'
-# pio.templates.default = "plotly"
-pd.options.plotting.backend = "plotly"
+# plotly takes longer to import than everything else in the app combined, so it is
+# loaded by load_plotly the first time a chart is drawn rather than at import
+go = None
+pio = None
 pltly_cfg = {"displayModeBar": False, "showTips": False}
 
+def load_plotly():
+    """
+    import plotly graph_objects and io on first use and apply the app's plotly settings.
+    every fx in this module that draws calls this before touching go or pio
+    :return: plotly.graph_objects module
+    """
+    global go, pio
+    if go is None:
+        import plotly.graph_objects as pgo
+        import plotly.io as ppio
+
+        ppio.renderers.default = 'browser'
+        # ppio.templates.default = "plotly"
+        pd.options.plotting.backend = "plotly"
+        go, pio = pgo, ppio
+
+    return go
+
 def create_layout():
     """
     creates a plotly graph_objects Layout object instance, with styles which can be
     leveraged by all plots in this app
     :return: go.Figure instance
     """
+    load_plotly()
 
     gs_lyt: go.Layout = go.Layout(
         height=900,
@@ -72,6 +90,7 @@ def plot_global(odf):
     :param odf:
     :return:
     """
+    load_plotly()
     fig = go.Figure(go.Scattergeo(odf, locations="iso_alpha",
                                   color="continent",  # column to set color of markers
                                   hover_name="country",  # column added to hover information
@@ -86,12 +105,16 @@ def plot_global(odf):
 
     return fig
 
-def sort_noc_mdls(mdl: list):
+def sort_noc_mdls(mdl):
     """
     get total medal count for NOCs, sort by descending order
-    :param mdl: list of dict, one for each of Gold, Silver, Bronze
+    :param mdl: list of dict, one for each of Gold, Silver, Bronze, or the DataFrame
+        from gs_getters.tally_noc_medals which already carries totals
     :return: dict of medal count keyed on NOC
     """
+    if isinstance(mdl, pd.DataFrame):
+        return mdl["Total"].sort_values(ascending=False, kind="stable").to_dict()
+
     mdlct: dict = {}
     for x in range(3):
         tmpl = mdl[x][1]
@@ -114,6 +137,7 @@ def medals_barplot(mdllst: list, allnoc: list, slctnoc: list=None):
     :param slctnoc: subset list of NOCs to plot, 8 or less to avoid crowding
     :return:
     """
+    load_plotly()
 
     # use list of NOCs from parm 'select', else just get top 5
     if slctnoc:
@@ -171,6 +195,7 @@ def plot_groups(p_d: dict, d_e: dict):
     :param d_e: dict of key=discipline, val=events
     :return:
     """
+    load_plotly()
 
     # catlst= x-axis categories, sprtlst=stacked bars, sprtcnt= y-axis bar size
     catlst: list = []
@@ -250,6 +275,7 @@ def plot_athlete_avg(padf: pd.DataFrame):
     :param padf: precalculated subset from athlete_df
     :return:
     """
+    load_plotly()
 
     ballteam = ["TeamSports"]
     trk_fld = ["Athletics"]
@@ -366,6 +392,7 @@ def height_vs_norm(adf: pd.DataFrame):
     :param adf: pd.DataFrame with select athlete heights to plot against adult avg.
     :return:
     """
+    load_plotly()
 
     # might need this if I decide to put a secondary y axis for the scatter plots:
     from plotly.subplots import make_subplots
@@ -0,0 +1,141 @@
+"""
+declared dtypes for the Olympic frames: events_df, athlete_df, the medal timeline,
+event results and medalists. string keys load as categoricals drawn from one
+process-wide dtype per domain, kept in gs_vocab (all NOC columns share the "noc" dtype,
+and so on), so a value has the same integer code in every frame and group-bys and joins
+run on codes.
+counts load as the narrowest integer that holds them, measures as float32.
+
+    edf = gsc.apply_schema(pd.read_csv(fil), "events")
+    gsc.memory_report({"events": edf, "athletes": adf})
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+import gs_vocab as gsv
+
+# column kinds: "int" narrowest integer (float32 if any are missing), "float" float32,
+# "date" datetime, "str" left as is, anything else names a shared categorical domain
+SCHEMAS: dict = {
+    "events": {"Sport": "sport", "Event": "event", "Gender": "gender", "Medal_Date": "medal_date",
+               "disc_html": "disc_html", "evt_html": "evt_html", "Entries": "int", "NOCs": "int",
+               "Gold": "str", "G_NOC": "noc", "Silver": "str", "S_NOC": "noc",
+               "Bronze": "str", "B_NOC": "noc", "Bronze2": "str", "B2_NOC": "noc",
+               "Gold2": "str", "G2_NOC": "noc"},
+    "athletes": {"category": "ath_category", "event": "ath_event", "gender": "gender",
+                 "NOC": "noc", "name": "str", "dob": "date", "age": "float", "ht_in": "float",
+                 "wt_lbs": "float", "medal": "medal"},
+    # the per-day columns of the timeline (7/24/21 ...) are not named, see DEFAULT_KIND
+    "timeline": {"dis_code": "dis_code", "discipline": "str", "medal_events": "int"},
+    "results": {"discipline": "disc_html", "event": "evt_html", "NOC": "noc", "Name": "str",
+                "final_place": "int"},
+    "medalists": {"NOC": "noc", "Name": "str", "Sport": "dis_code", "Event": "str",
+                  "Medal": "medal"},
+}
+# kind for numeric columns a schema does not name
+DEFAULT_KIND: dict = {"timeline": "float"}
+# bump when apply_schema converts a kind differently, the declared schemas are hashed in
+SCHEMA_REVISION: int = 2
+SCHEMA_VERSION: str = hashlib.sha1(repr((SCHEMA_REVISION, SCHEMAS, DEFAULT_KIND))
+                                   .encode()).hexdigest()[:12]
+
+def dataset_for(typ: str):
+    """
+    :param typ: dataset type as passed to get_olympic_data, such as events or athletes
+    :return: SCHEMAS key it starts with, None if there is none
+    """
+    for name in SCHEMAS:
+        if typ and typ.startswith(name):
+            return name
+
+    return None
+
+def domain_dtype(domain: str, values=None):
+    """
+    shared categorical dtype for a domain, from the gs_vocab registry. values not yet
+    interned are added on the end, so a code once handed out always means the same value
+    :param domain: domain name such as noc, sport or gender
+    :param values: optional iterable of values the dtype must hold
+    :return: CategoricalDtype
+    """
+    return gsv.vocab(domain, values).dtype
+
+def narrow_int(col: pd.Series):
+    """
+    :param col: numeric or numeric-looking pd.Series
+    :return: smallest signed integer dtype that holds it, float32 if values are missing
+    """
+    num: pd.Series = pd.to_numeric(col, errors="coerce")
+    if num.isna().any():
+        return num.astype(np.float32)
+
+    return pd.to_numeric(num.astype(np.int64), downcast="integer")
+
+def apply_schema(df: pd.DataFrame, dataset: str):
+    """
+    convert a frame to its declared dtypes in place of its loaded ones. columns the
+    schema does not name are left alone, unless numeric with a DEFAULT_KIND
+    :param df: pd.DataFrame as read from csv, html or a backup
+    :param dataset: events, athletes, timeline, results or medalists
+    :return: the same pd.DataFrame with converted columns
+    """
+    schema: dict = SCHEMAS[dataset]
+    for col in df.columns:
+        kind: str = schema.get(col)
+        if kind is None:
+            if dataset not in DEFAULT_KIND or not pd.api.types.is_numeric_dtype(df[col]):
+                continue
+            kind = DEFAULT_KIND[dataset]
+        if kind == "str":
+            continue
+        elif kind == "int":
+            df[col] = narrow_int(df[col])
+        elif kind == "float":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(np.float32)
+        elif kind == "date":
+            df[col] = pd.to_datetime(df[col], errors="coerce", format="%Y-%m-%d")
+        else:
+            df[col] = df[col].astype(domain_dtype(kind, df[col].unique()))
+
+    # later columns may have added values to a domain, bring the earlier ones up to the
+    # final dtype so columns of one domain compare and join on the same codes
+    return conform(df, dataset)
+
+def conform(df: pd.DataFrame, dataset: str):
+    """
+    bring categorical columns up to the current shared dtype of their domain, such as
+    after unpickling or after a later load added values. codes are not renumbered
+    :param df: pd.DataFrame that went through apply_schema
+    :param dataset: schema name
+    :return: the same pd.DataFrame
+    """
+    for col, kind in SCHEMAS[dataset].items():
+        if col in df.columns and isinstance(df[col].dtype, CategoricalDtype):
+            dtyp: CategoricalDtype = domain_dtype(kind, df[col].cat.categories)
+            # dtype == ignores category order, codes only line up if the order matches
+            if not df[col].cat.categories.equals(dtyp.categories):
+                df[col] = df[col].cat.set_categories(dtyp.categories)
+
+    return df
+
+def memory_report(frames: dict):
+    """
+    print rows and deep memory use per dataset
+    :param frames: dict with key=dataset name, val=pd.DataFrame
+    :return: dict with key=dataset name, val=bytes
+    """
+    usage: dict = {}
+    print("\n---- memory use of loaded frames ----")
+    for name, df in frames.items():
+        if not isinstance(df, pd.DataFrame):
+            continue
+        usage[name] = int(df.memory_usage(index=True, deep=True).sum())
+        ncat: int = sum(isinstance(t, CategoricalDtype) for t in df.dtypes)
+        print("    %-12s %7d rows %9.1f KB  %d of %d columns categorical"
+              % (name, len(df), usage[name] / 1024, ncat, len(df.columns)))
+    print("")
+
+    return usage
@@ -0,0 +1,310 @@
+"""
+date-keyed snapshot store for the dated backups main.py writes (resultsbak_<date>.csv,
+medalists_<date>.csv, medalevents_byrow_<date>.csv, athletes_<date>.csv).
+each row is hashed, a row is stored once in its kind's pool however many snapshots
+contain it, and a snapshot itself is just the ordered row hashes plus its columns, so
+a daily backup costs only the rows that changed. "latest" resolves to the newest
+snapshot, and diff compares two snapshots on their hash arrays.
+
+    python gs_snapshots.py ingest output/
+    python gs_snapshots.py list
+    python gs_snapshots.py diff resultsbak 2021-09-30 2021-10-04 --key discipline event final_place
+    python gs_snapshots.py export medalists latest medalists.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+import gs_util as gsu
+from gs_datadict import OUTDIR, SNAPDIR
+
+DATE_RE = re.compile(r"_(\d{4}-\d{2}-\d{2})(?=\.)")
+# snapshot kind -> dated file name prefix
+SNAP_KINDS: dict = {"resultsbak": "resultsbak_", "medalists": "medalists_",
+                    "medalevents_byrow": "medalevents_byrow_", "athletes": "athletes_"}
+
+def file_date(fil: str):
+    """
+    :param fil: file name such as resultsbak_2021-10-04.csv
+    :return: str date as YYYY-MM-DD, None if the name has no date
+    """
+    mtch = DATE_RE.search(os.path.basename(str(fil)))
+
+    return mtch.group(1) if mtch else None
+
+def dated_files(folder: str, prefix: str):
+    """
+    :param folder: folder to look in
+    :param prefix: file name prefix, such as resultsbak_
+    :return: list of (date, file name) oldest first, compressed backups included
+    """
+    fils: list = []
+    if os.path.isdir(folder):
+        for fil in os.listdir(folder):
+            dte = file_date(fil)
+            if dte and fil.startswith(prefix) and ".csv" in fil:
+                fils.append((dte, fil))
+
+    return sorted(fils)
+
+def latest_file(folder: str, prefix: str):
+    """
+    newest dated backup for a prefix, so loaders are never pointed at a stale file
+    :param folder: folder to look in, such as OUTDIR
+    :param prefix: file name prefix, such as resultsbak_
+    :return: fq name of the newest file, None if there is none
+    """
+    fils: list = dated_files(folder, prefix)
+
+    return os.path.join(folder, fils[-1][1]) if fils else None
+
+def row_hashes(df: pd.DataFrame):
+    """
+    vectorized 64-bit hash per row, salted with the column names so the same values
+    under a different layout do not match
+    :param df: pd.DataFrame of str values
+    :return: np.ndarray of uint64, one per row
+    """
+    salt: int = int.from_bytes(hashlib.blake2b("\x1f".join(df.columns).encode("utf-8"),
+                                               digest_size=8).digest(), "little")
+
+    return pd.util.hash_pandas_object(df, index=False).to_numpy() ^ np.uint64(salt)
+
+class SnapshotStore:
+    """
+    one folder per kind holding pool.jsonl.gz (every distinct row once, as hash and
+    values) and per snapshot <date>.json (columns, row count) plus <date>.npy (the
+    ordered row hashes). a snapshot identical to an earlier one points at its hashes.
+    """
+    def __init__(self, root: str = SNAPDIR):
+        """
+        :param root: folder for the store, created on first write
+        """
+        self.root: str = root
+        self._pools: dict = {}
+
+    def _path(self, kind: str, name: str = ""):
+        return os.path.join(self.root, kind, name)
+
+    def dates(self, kind: str):
+        """
+        :param kind: snapshot kind, such as resultsbak
+        :return: list of snapshot dates oldest first
+        """
+        if not os.path.isdir(self._path(kind)):
+            return []
+
+        return sorted(f[:-5] for f in os.listdir(self._path(kind))
+                      if f.endswith(".json") and file_date("_" + f))
+
+    def latest(self, kind: str):
+        """
+        :param kind: snapshot kind
+        :return: newest snapshot date, None if the kind has no snapshots
+        """
+        dts: list = self.dates(kind)
+
+        return dts[-1] if dts else None
+
+    def resolve(self, kind: str, date: str = "latest"):
+        """
+        :param kind: snapshot kind
+        :param date: YYYY-MM-DD, "latest" or "previous" (the one before latest)
+        :return: snapshot date that exists in the store
+        """
+        dts: list = self.dates(kind)
+        if date in ("latest", "previous"):
+            idx: int = -1 if date == "latest" else -2
+            if len(dts) < -idx:
+                raise KeyError("no %s snapshot for %s" % (date, kind))
+            return dts[idx]
+        if date not in dts:
+            raise KeyError("no %s snapshot for %s" % (kind, date))
+
+        return date
+
+    def pool(self, kind: str):
+        """
+        :param kind: snapshot kind
+        :return: dict with key=row hash, val=list of row values, cached per store
+        """
+        if kind not in self._pools:
+            rows: dict = {}
+            if os.path.isfile(self._path(kind, "pool.jsonl.gz")):
+                for rec in gsu.iter_jsonl(self._path(kind, "pool.jsonl.gz")):
+                    rows[int(rec["h"], 16)] = rec["r"]
+            self._pools[kind] = rows
+
+        return self._pools[kind]
+
+    def hashes(self, kind: str, date: str = "latest"):
+        """
+        :param kind: snapshot kind
+        :param date: snapshot date or "latest"
+        :return: tuple of (manifest dict, np.ndarray of uint64 row hashes in file order)
+        """
+        date = self.resolve(kind, date)
+        with open(self._path(kind, date + ".json"), encoding='utf-8') as fh:
+            mnf: dict = json.load(fh)
+
+        return mnf, np.load(self._path(kind, mnf["hashes"] + ".npy"))
+
+    def put(self, kind: str, df: pd.DataFrame, date: str):
+        """
+        store a snapshot, only rows not already in the pool are written
+        :param kind: snapshot kind
+        :param df: pd.DataFrame, values are stored as str
+        :param date: YYYY-MM-DD the snapshot is filed under
+        :return: dict with date, rows and new_rows
+        """
+        os.makedirs(self._path(kind), exist_ok=True)
+        sdf: pd.DataFrame = df.astype(str)
+        hsh: np.ndarray = row_hashes(sdf)
+        pool: dict = self.pool(kind)
+
+        uniq, first = np.unique(hsh, return_index=True)
+        known: np.ndarray = np.fromiter(pool, dtype=np.uint64, count=len(pool))
+        fresh: np.ndarray = np.sort(first[~np.isin(uniq, known)])
+        if len(fresh):
+            recs: list = sdf.iloc[fresh].to_numpy().tolist()
+            with gsu.JsonlWriter(self._path(kind, "pool.jsonl.gz"), mode="a") as jsw:
+                for idx, rec in zip(fresh, recs):
+                    jsw.write({"h": "%016x" % hsh[idx], "r": rec})
+                    pool[int(hsh[idx])] = rec
+
+        # reuse the hash array of an identical earlier snapshot rather than a new copy
+        hashes_from: str = date
+        for dte in reversed(self.dates(kind)):
+            if dte == date:
+                continue
+            mnf, prev = self.hashes(kind, dte)
+            if mnf["columns"] == list(sdf.columns) and np.array_equal(prev, hsh):
+                hashes_from = mnf["hashes"]
+            break
+        if hashes_from == date:
+            np.save(self._path(kind, date + ".npy"), hsh)
+        mnf: dict = {"date": date, "columns": list(sdf.columns), "rows": len(sdf),
+                     "new_rows": int(len(fresh)), "hashes": hashes_from}
+        with open(self._path(kind, date + ".json"), mode='w', encoding='utf-8') as fh:
+            json.dump(mnf, fh, indent=1)
+
+        return mnf
+
+    def put_file(self, kind: str, fil: str, date: str = None):
+        """
+        :param kind: snapshot kind
+        :param fil: csv backup, plain or compressed
+        :param date: defaults to the date in the file name
+        :return: manifest dict from put
+        """
+        date = date or file_date(fil)
+        if not date:
+            raise ValueError("no date in %s, pass date=" % fil)
+        df: pd.DataFrame = pd.read_csv(fil, dtype=str, keep_default_na=False)
+
+        return self.put(kind, df, date)
+
+    def get(self, kind: str, date: str = "latest"):
+        """
+        :param kind: snapshot kind
+        :param date: snapshot date, "latest" or "previous"
+        :return: pd.DataFrame of str values, rows in the order they were stored
+        """
+        mnf, hsh = self.hashes(kind, date)
+        pool: dict = self.pool(kind)
+
+        return pd.DataFrame([pool[int(h)] for h in hsh], columns=mnf["columns"])
+
+    def diff(self, kind: str, old: str = "previous", new: str = "latest", key: list = None):
+        """
+        rows added and removed between two snapshots, found from the hash arrays alone.
+        with key columns, a removed row and an added row sharing a key count as changed
+        :param kind: snapshot kind
+        :param old: earlier snapshot date, default the one before latest
+        :param new: later snapshot date, default latest
+        :param key: optional list of columns identifying a row, such as discipline, event
+        :return: dict of pd.DataFrame: added, removed, and changed if key given
+        """
+        omnf, ohsh = self.hashes(kind, old)
+        nmnf, nhsh = self.hashes(kind, new)
+        pool: dict = self.pool(kind)
+        added = pd.DataFrame([pool[int(h)] for h in nhsh[~np.isin(nhsh, ohsh)]],
+                             columns=nmnf["columns"])
+        removed = pd.DataFrame([pool[int(h)] for h in ohsh[~np.isin(ohsh, nhsh)]],
+                               columns=omnf["columns"])
+        out: dict = {"added": added, "removed": removed}
+        if key:
+            changed = removed.merge(added, on=key, suffixes=("_old", "_new"))
+            out["changed"] = changed
+            out["added"] = added[~added.set_index(key).index.isin(changed.set_index(key).index)]
+            out["removed"] = removed[~removed.set_index(key).index.isin(changed.set_index(key).index)]
+
+        return out
+
+    def ingest(self, folder: str = OUTDIR):
+        """
+        file every dated backup in folder that is not yet in the store
+        :param folder: folder with resultsbak_<date>.csv and the like
+        :return: list of manifest dicts for the snapshots added
+        """
+        added: list = []
+        for kind, prefix in SNAP_KINDS.items():
+            have: set = set(self.dates(kind))
+            for dte, fil in dated_files(folder, prefix):
+                if dte not in have:
+                    mnf: dict = self.put_file(kind, os.path.join(folder, fil), dte)
+                    mnf["kind"] = kind
+                    added.append(mnf)
+                    have.add(dte)
+
+        return added
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="date-keyed snapshots of the gs_Tokyo2021 backups")
+    parser.add_argument("--root", default=SNAPDIR, help="snapshot store folder")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_ing = sub.add_parser("ingest", help="file dated backups from a folder")
+    p_ing.add_argument("folder", nargs="?", default=OUTDIR)
+    sub.add_parser("list", help="show snapshots per kind")
+    p_dif = sub.add_parser("diff", help="rows added, removed or changed between two dates")
+    p_dif.add_argument("kind", choices=list(SNAP_KINDS))
+    p_dif.add_argument("old", nargs="?", default="previous")
+    p_dif.add_argument("new", nargs="?", default="latest")
+    p_dif.add_argument("--key", nargs="+", default=None, help="columns identifying a row")
+    p_exp = sub.add_parser("export", help="write a snapshot back out as csv")
+    p_exp.add_argument("kind", choices=list(SNAP_KINDS))
+    p_exp.add_argument("date", default="latest")
+    p_exp.add_argument("out")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.root)
+    if args.cmd == "ingest":
+        for mnf in store.ingest(args.folder):
+            print("    %-18s %s %7d rows %7d new" % (mnf["kind"], mnf["date"], mnf["rows"],
+                                                     mnf["new_rows"]))
+    elif args.cmd == "list":
+        for kind in SNAP_KINDS:
+            for dte in store.dates(kind):
+                mnf, _ = store.hashes(kind, dte)
+                print("    %-18s %s %7d rows %7d new" % (kind, dte, mnf["rows"], mnf["new_rows"]))
+    elif args.cmd == "diff":
+        dif: dict = store.diff(args.kind, args.old, args.new, key=args.key)
+        for part, df in dif.items():
+            print("---- %s: %d rows ----" % (part, len(df)))
+            if len(df):
+                print(df.head(20).to_string(index=False))
+    elif args.cmd == "export":
+        df: pd.DataFrame = store.get(args.kind, args.date)
+        df.to_csv(args.out, index=False)
+        print("    wrote %d rows to %s" % (len(df), args.out))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+deterministic generator of synthetic Olympic data for scale testing. produces files
+with the same columns as the real medalevents_byrow, resultsbak, athletes and
+medalists files, for any number of Games, so every loader and analysis function in
+gs_getters and gs_util can be stress-tested offline.
+quirks of the real data are kept: dual golds (G2) and double bronzes (B2) with the
+matching tied places in results, DNS/DNF entries with final_place 0, 'nan' strings
+in empty medal columns, and athletes with missing height or weight.
+event names, athlete category/event keys and athlete medal values (Gold, Silver,
+Bronze, G-S, a place or missing) are drawn from the real files, so loaders build the
+same categoricals and take the same code paths as on production data.
+
+    python gs_synth.py --games 40 --seed 7 --outdir /tmp/synth
+"""
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+HERE: str = os.path.dirname(os.path.abspath(__file__))
+# disciplines where every event awards two bronze medals
+TWO_BRONZE: tuple = ("boxing", "judo", "taekwondo", "wrestling", "karate")
+SYLLABLES: np.ndarray = np.array(["ka", "ro", "mi", "ten", "sa", "lu", "vo", "ber", "an",
+                                  "del", "ko", "ri", "zan", "mar", "ti", "el", "nu", "gor"])
+GENDERS: np.ndarray = np.array(["Men", "Women", "Mixed"])
+EVT_COLS: list = ["Sport", "Event", "Gender", "Medal_Date", "disc_html", "evt_html",
+                  "Entries", "NOCs", "Gold", "G_NOC", "Silver", "S_NOC", "Bronze", "B_NOC",
+                  "Bronze2", "B2_NOC", "Gold2", "G2_NOC"]
+
+def load_vocab(rawdir: str = os.path.join(HERE, "rawdata")):
+    """
+    disciplines and NOC codes used to label synthetic data, from the real rawdata files
+    :param rawdir: folder with disciplines.csv and country_codes.csv
+    :return: disciplines DataFrame, np.ndarray of NOC codes
+    """
+    dis = pd.read_csv(os.path.join(rawdir, "disciplines.csv"))
+    nocs = pd.read_csv(os.path.join(rawdir, "country_codes.csv"))["NOC"].dropna().unique()
+
+    return dis, nocs
+
+def load_domains(rawdir: str = os.path.join(HERE, "rawdata")):
+    """
+    value domains of the real events and athletes files, newest dated file of each
+    :param rawdir: folder with medalevents_byrow_<date>.csv and athletes_<date>.csv
+    :return: dict with evt_names: key=Sport, val=np.ndarray of real Event names, and
+        ath_keys: DataFrame of the real athlete (category, event) pairs
+    """
+    evtf: str = sorted(glob.glob(os.path.join(rawdir, "medalevents_byrow_*.csv")))[-1]
+    athf: str = sorted(glob.glob(os.path.join(rawdir, "athletes_*.csv")))[-1]
+    edf = pd.read_csv(evtf, usecols=["Sport", "Event"])
+    adf = pd.read_csv(athf, usecols=["category", "event", "NOC"])
+    adf = adf[adf["NOC"] != "ALL"]
+
+    return {"evt_names": {k: g.unique() for k, g in edf.groupby("Sport")["Event"]},
+            "ath_keys": adf[["category", "event"]].drop_duplicates().reset_index(drop=True)}
+
+def make_names(rng, n: int):
+    """
+    vectorized fake athlete names in the site's 'SURNAME Given' form
+    :param rng: np.random.Generator
+    :param n: number of names
+    :return: np.ndarray of str
+    """
+    syl = SYLLABLES
+    picks = rng.integers(0, len(syl), size=(n, 5))
+    sur = np.char.upper(np.char.add(np.char.add(syl[picks[:, 0]], syl[picks[:, 1]]),
+                                    syl[picks[:, 2]]))
+    given = np.char.capitalize(np.char.add(syl[picks[:, 3]], syl[picks[:, 4]]))
+
+    return np.char.add(np.char.add(sur, " "), given)
+
+def gen_events(games: int, rng, dis: pd.DataFrame, nocs: np.ndarray, first_year: int = 1896,
+               events_scale: int = 1, evt_names: dict = None):
+    """
+    one row per medal event in medalevents_byrow layout, for every Games
+    :param games: number of Games to generate
+    :param rng: np.random.Generator
+    :param dis: disciplines DataFrame with discipline, htmlq and medal_events columns
+    :param nocs: array of NOC codes
+    :param first_year: year of the first Games, later Games are 4 years apart
+    :param events_scale: multiplier on each discipline's medal_events per Games
+    :param evt_names: optional dict from load_domains, key=Sport, val=real Event names,
+        cycled through for each discipline. without it events are named "Event n"
+    :return: pd.DataFrame
+    """
+    per_games = dis.loc[dis.index.repeat(dis["medal_events"].fillna(1).astype(int) * events_scale)]
+    per_games = per_games.reset_index(drop=True)
+    n_evt: int = len(per_games) * games
+    game_no = np.repeat(np.arange(games), len(per_games))
+    year = first_year + 4 * game_no
+    evt_no = np.tile(per_games.groupby("htmlq").cumcount().to_numpy(), games)
+    gender = GENDERS[rng.choice(3, size=n_evt, p=[0.47, 0.47, 0.06])]
+    evt_name = np.char.add("Event ", evt_no.astype(str)).astype(object)
+    if evt_names:
+        sport = np.tile(per_games["discipline"].to_numpy(), games)
+        for spt, names in evt_names.items():
+            rows = sport == spt
+            evt_name[rows] = names[evt_no[rows] % len(names)]
+
+    edf = pd.DataFrame({
+        "Sport": np.tile(per_games["discipline"].to_numpy(), games),
+        "Event": evt_name,
+        "Gender": gender,
+        "Medal_Date": pd.to_datetime({"year": year, "month": 7, "day": 24}) +
+                      pd.to_timedelta(rng.integers(0, 16, size=n_evt), unit="D"),
+        "disc_html": np.tile(per_games["htmlq"].to_numpy(), games),
+    })
+    mdate = edf["Medal_Date"].dt
+    edf["Medal_Date"] = (mdate.month.astype(str) + "/" + mdate.day.astype(str) + "/" +
+                         mdate.strftime("%y"))
+    edf["evt_html"] = (np.char.lower(gender) + "-s-event-" + evt_no.astype(str) + "-" +
+                       year.astype(str))
+    edf["Entries"] = rng.integers(8, 90, size=n_evt)
+    edf["NOCs"] = np.minimum(edf["Entries"], rng.integers(8, 60, size=n_evt))
+
+    # medalists: random NOC per slot, dual gold in ~1% of events, two bronze in combat
+    slots = rng.choice(len(nocs), size=(n_evt, 5))
+    names = make_names(rng, n_evt * 5).reshape(n_evt, 5)
+    two_gold = rng.random(n_evt) < 0.01
+    two_bronze = edf["disc_html"].isin(TWO_BRONZE).to_numpy() | (rng.random(n_evt) < 0.01)
+    for col, noc_col, k in [("Gold", "G_NOC", 0), ("Silver", "S_NOC", 1), ("Bronze", "B_NOC", 2),
+                            ("Bronze2", "B2_NOC", 3), ("Gold2", "G2_NOC", 4)]:
+        edf[col] = names[:, k]
+        edf[noc_col] = nocs[slots[:, k]]
+    edf.loc[two_gold, ["Silver", "S_NOC"]] = "nan"
+    edf.loc[~two_gold, ["Gold2", "G2_NOC"]] = "nan"
+    edf.loc[~two_bronze, ["Bronze2", "B2_NOC"]] = "nan"
+
+    return edf[EVT_COLS]
+
+def gen_results(edf: pd.DataFrame, rng, nocs: np.ndarray):
+    """
+    final standings for every event in resultsbak layout, medal places agree with edf,
+    tied places follow G2/B2, and ~5% of non-medal entries are DNS/DNF (final_place 0)
+    :param edf: events DataFrame from gen_events
+    :param rng: np.random.Generator
+    :param nocs: array of NOC codes
+    :return: pd.DataFrame with discipline, event, NOC, Name, final_place
+    """
+    entries = edf["Entries"].to_numpy()
+    n: int = int(entries.sum())
+    evt_idx = np.repeat(np.arange(len(edf)), entries)
+    pos = np.arange(n) - np.repeat(np.cumsum(entries) - entries, entries)
+
+    rdf = pd.DataFrame({"discipline": edf["disc_html"].to_numpy()[evt_idx],
+                        "event": edf["evt_html"].to_numpy()[evt_idx],
+                        "NOC": nocs[rng.choice(len(nocs), size=n)],
+                        "Name": make_names(rng, n)})
+
+    # lay out medal rows at the top of each event: G, G2?, S?, B, B2?
+    two_gold = (edf["G2_NOC"] != "nan").to_numpy()
+    two_bronze = (edf["B2_NOC"] != "nan").to_numpy()
+    layout: list = [("Gold", "G_NOC", 1, np.ones(len(edf), bool)),
+                    ("Gold2", "G2_NOC", 1, two_gold),
+                    ("Silver", "S_NOC", 2, ~two_gold),
+                    ("Bronze", "B_NOC", 3, np.ones(len(edf), bool)),
+                    ("Bronze2", "B2_NOC", 3, two_bronze)]
+    place = pos + 1
+    nmedal = np.zeros(len(edf), dtype=int)
+    for name_col, noc_col, medal_place, used in layout:
+        rows = (np.cumsum(entries) - entries + nmedal)[used]
+        rdf.loc[rows, "Name"] = edf.loc[used, name_col].to_numpy()
+        rdf.loc[rows, "NOC"] = edf.loc[used, noc_col].to_numpy()
+        place[rows] = medal_place
+        nmedal += used
+    others = pos >= nmedal[evt_idx]
+    place[others] = pos[others] + 1
+    place[others & (rng.random(n) < 0.05)] = 0
+    rdf["final_place"] = place
+
+    return rdf
+
+def gen_medalists(edf: pd.DataFrame, dis: pd.DataFrame):
+    """
+    medalists file layout: Name, Sport (dis_code), Event as the site lists it, such as
+    "Women's 800m", and Medal in the site's lower case
+    :param edf: events DataFrame from gen_events
+    :param dis: disciplines DataFrame with discipline and dis_code
+    :return: pd.DataFrame
+    """
+    codes = edf["Sport"].map(dis.set_index("discipline")["dis_code"])
+    event = np.where(edf["Gender"] == "Mixed", "Mixed " + edf["Event"],
+                     edf["Gender"] + "'s " + edf["Event"])
+    event = pd.Series(event, index=edf.index)
+    parts: list = []
+    for col, medal in [("Gold", "gold"), ("Gold2", "gold"), ("Silver", "silver"),
+                       ("Bronze", "bronze"), ("Bronze2", "bronze")]:
+        won = edf[col] != "nan"
+        parts.append(pd.DataFrame({"Name": edf.loc[won, col], "Sport": codes[won],
+                                   "Event": event[won], "Medal": medal}))
+
+    return pd.concat(parts, ignore_index=True)
+
+def gen_athletes(rdf: pd.DataFrame, rng, n: int = None, ath_keys: pd.DataFrame = None):
+    """
+    athlete rows in athletes layout, sampled from the results, ~15% missing height and
+    ~40% missing weight, plus precalculated NOC 'ALL' average rows per event and gender.
+    medal is Gold, Silver or Bronze, G-S for ~2% of gold medalists, the place as text
+    for 4th to 7th and missing otherwise, as in the real file
+    :param rdf: results DataFrame from gen_results
+    :param rng: np.random.Generator
+    :param n: number of athletes, defaults to one per 10 result rows
+    :param ath_keys: optional real (category, event) pairs from load_domains to draw
+        athlete keys from, without it the results' discipline and event are used
+    :return: pd.DataFrame
+    """
+    n = n if n else max(len(rdf) // 10, 1)
+    pick = rng.choice(len(rdf), size=n, replace=len(rdf) < n)
+    src = rdf.iloc[pick].reset_index(drop=True)
+    gender = np.where(rng.random(n) < 0.52, "Men", "Women")
+    ht = np.where(gender == "Men", rng.normal(72, 3.5, n), rng.normal(66.5, 3, n)).round(1)
+    wt = np.where(gender == "Men", rng.normal(180, 25, n), rng.normal(140, 20, n)).round(1)
+    age = rng.uniform(16, 40, n).round(1)
+    dob = pd.Timestamp("2021-07-23") - pd.to_timedelta((age * 365.25).astype(int), unit="D")
+    place = src["final_place"].to_numpy()
+    medal = np.select([place == 1, place == 2, place == 3], ["Gold", "Silver", "Bronze"],
+                      default=place.astype(str)).astype(object)
+    medal[(place == 1) & (rng.random(n) < 0.02)] = "G-S"
+    medal[(place < 1) | (place > 7)] = np.nan
+    if ath_keys is not None:
+        keys = ath_keys.iloc[rng.choice(len(ath_keys), size=n)].reset_index(drop=True)
+    else:
+        keys = src[["discipline", "event"]].set_axis(["category", "event"], axis=1)
+
+    adf = pd.DataFrame({"category": keys["category"], "event": keys["event"], "gender": gender,
+                        "NOC": src["NOC"], "name": src["Name"], "dob": dob.strftime("%Y-%m-%d"),
+                        "age": age, "ht_in": ht, "wt_lbs": wt, "medal": medal})
+    adf.loc[rng.random(n) < 0.15, "ht_in"] = np.nan
+    adf.loc[rng.random(n) < 0.40, "wt_lbs"] = np.nan
+
+    avg = adf.groupby(["category", "event", "gender"], as_index=False)[["age", "ht_in", "wt_lbs"]].mean()
+    avg = avg.round(1).assign(NOC="ALL", name="average", dob="", medal=np.nan)
+
+    return pd.concat([adf, avg[adf.columns]], ignore_index=True)
+
+def write_synthetic(outdir: str, games: int = 10, seed: int = 48, events_scale: int = 1,
+                    rawdir: str = os.path.join(HERE, "rawdata")):
+    """
+    generate and write a full synthetic data set, same seed gives identical files
+    :param outdir: folder to write into, created if missing
+    :param games: number of Games
+    :param seed: random seed
+    :param events_scale: multiplier on medal events per discipline per Games
+    :param rawdir: folder with the real disciplines and country code files
+    :return: dict with key=dataset, val=fq file name
+    """
+    rng = np.random.default_rng(seed)
+    dis, nocs = load_vocab(rawdir)
+    domains: dict = load_domains(rawdir)
+    edf = gen_events(games, rng, dis, nocs, events_scale=events_scale,
+                     evt_names=domains["evt_names"])
+    rdf = gen_results(edf, rng, nocs)
+    files: dict = {"events": os.path.join(outdir, "medalevents_byrow_synth.csv"),
+                   "results": os.path.join(outdir, "resultsbak_synth.csv"),
+                   "athletes": os.path.join(outdir, "athletes_synth.csv"),
+                   "medalists": os.path.join(outdir, "medalists_synth.csv")}
+    os.makedirs(outdir, exist_ok=True)
+    edf.to_csv(files["events"], index=False)
+    rdf.to_csv(files["results"], index=False)
+    gen_athletes(rdf, rng, ath_keys=domains["ath_keys"]).to_csv(files["athletes"], index=False)
+    gen_medalists(edf, dis).to_csv(files["medalists"], index=False)
+    print("synthetic data: %d Games, %d events, %d result rows written to %s"
+          % (games, len(edf), len(rdf), outdir))
+
+    return files
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="generate synthetic multi-Games Olympic data")
+    parser.add_argument("--games", type=int, default=10, help="number of Games")
+    parser.add_argument("--events-scale", type=int, default=1,
+                        help="multiplier on medal events per discipline per Games")
+    parser.add_argument("--seed", type=int, default=48)
+    parser.add_argument("--outdir", default=os.path.join(HERE, "output", "synth"))
+    args = parser.parse_args(argv)
+    write_synthetic(args.outdir, games=args.games, seed=args.seed, events_scale=args.events_scale)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
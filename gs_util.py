@@ -5,47 +5,214 @@ describe_xxxx - give characteristics of dataframe or list with one type of Olymp
 reconcile_xxxx or cleanup_xxxx - true-up one data set with another, fix errors or missings
 """
 
+import bz2
 import csv
+import gzip
 import json
+import lzma
 import os
+from collections import deque
+
+import numpy as np
 import pandas as pd
 from pandas.api.types import CategoricalDtype
 
-from gs_datadict import OUTDIR
+import gs_schema as gsc
+import gs_vocab as gsv
+from gs_datadict import MEDAL_SLOTS, OUTDIR
+
+RESULT_COLS: list = ["discipline", "event", "NOC", "Name", "final_place"]
+# events_df medal columns compared by reconcile, as (athlete, NOC) pairs
+RECON_PAIRS: list = [("Gold", "G_NOC"), ("Gold2", "G2_NOC"), ("Silver", "S_NOC"),
+                     ("Bronze", "B_NOC"), ("Bronze2", "B2_NOC")]
+# (final_place, nth tied finisher at that place) -> events_df medal slot
+MEDAL_PLACES = pd.DataFrame({"final_place": [1, 1, 2, 3, 3], "tie": [0, 1, 0, 0, 1],
+                             "slot": ["Gold", "Gold2", "Silver", "Bronze", "Bronze2"]})
+# backup file suffixes that turn on compression, .zst needs the zstandard package
+BAK_CODECS: tuple = (".gz", ".bz2", ".xz", ".zst")
+BAK_BUFFER: int = 1 << 20
+
+def open_text(fil: str, mode: str = "rt", codec: str = None):
+    """
+    open a plain or compressed csv backup as text, compression is picked by file suffix
+    :param fil: fq file name
+    :param mode: "rt", "wt" or "at"
+    :param codec: one of BAK_CODECS to override the suffix, "" for no compression
+    :return: text file object with newline="" as the csv module expects
+    """
+    if codec is None:
+        codec = next((c for c in BAK_CODECS if str(fil).endswith(c)), "")
+    if codec == ".gz":
+        return gzip.open(fil, mode, encoding="utf-8", newline="")
+    if codec == ".bz2":
+        return bz2.open(fil, mode, encoding="utf-8", newline="")
+    if codec == ".xz":
+        return lzma.open(fil, mode, encoding="utf-8", newline="")
+    if codec == ".zst":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard package is needed for .zst backups: "
+                              "pip install zstandard") from None
+        return zstandard.open(fil, mode, encoding="utf-8", newline="")
+
+    return open(fil, mode.replace("t", ""), encoding="utf-8", newline="", buffering=BAK_BUFFER)
+
+class BackupWriter:
+    """
+    csv backup written through one buffered handle. rows go to a temp file next to the
+    target which is renamed over it on commit, so a crash part way through leaves the
+    previous backup untouched rather than a truncated one. suffix .gz, .bz2, .xz or .zst
+    compresses. use as a context manager: commit on success, abort on an exception.
+    """
+    def __init__(self, savefile: str, fieldnames: list = None):
+        """
+        :param savefile: fq name of the backup to write
+        :param fieldnames: csv columns, default is the keys of the first row written
+        """
+        self.savefile: str = savefile
+        self.fieldnames: list = fieldnames
+        self.rows: int = 0
+        self.tmpfile: str = os.path.join(os.path.dirname(os.path.abspath(savefile)),
+                                         ".%s.%d.tmp" % (os.path.basename(savefile), os.getpid()))
+        codec: str = next((c for c in BAK_CODECS if str(savefile).endswith(c)), "")
+        self.fh = open_text(self.tmpfile, "wt", codec=codec)
+        self.writer = None
+
+    def write_rows(self, rows):
+        """
+        :param rows: iterable of dict, such as the list of results for one event
+        :return: None
+        """
+        rows = iter(rows)
+        if self.writer is None:
+            first = next(rows, None)
+            if first is None:
+                return
+            self.writer = csv.DictWriter(self.fh, fieldnames=self.fieldnames or list(first.keys()),
+                                         dialect='unix', quoting=csv.QUOTE_MINIMAL)
+            self.writer.writeheader()
+            self.writer.writerow(first)
+            self.rows += 1
+        for row in rows:
+            self.writer.writerow(row)
+            self.rows += 1
+
+        return
+
+    def commit(self):
+        """
+        flush and close the temp file, then rename it over the backup
+        :return: number of rows written
+        """
+        self.fh.close()
+        os.replace(self.tmpfile, self.savefile)
+
+        return self.rows
+
+    def abort(self):
+        """
+        close and delete the temp file, any existing backup is left as it was
+        :return: None
+        """
+        self.fh.close()
+        if os.path.exists(self.tmpfile):
+            os.remove(self.tmpfile)
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+def drain(evts):
+    """
+    run a stream of events through whatever stages are chained on it, discarding output
+    :param evts: iterable of events, typically a chain of stage_xxxx generators
+    :return: None
+    """
+    deque(evts, maxlen=0)
+
+    return
+
+def stage_count(evts, edct: dict):
+    """
+    pipeline stage: count medal events per discipline into edct as events stream past
+    :param evts: iterable of list of dict, each list has all results for one event
+    :param edct: dict updated in place, key=Discipline 'html' name, value=number of events
+    :return: generator passing each event through unchanged
+    """
+    for lstx in evts:
+        edct[lstx[0]['discipline']] = edct.get(lstx[0]['discipline'], 0) + 1
+        yield lstx
+    print("    found %d events in %d Disciplines \n" %(sum(edct.values()), len(edct)))
+
+def stage_backup(evts, bakfil):
+    """
+    pipeline stage: write each event's final standings to a results backup as it passes.
+    one BackupWriter handle for the whole stream, the backup only replaces any earlier
+    file of the same name once the stream has been fully consumed
+    :param evts: iterable of list of dict, each list has all results for one event
+    :param bakfil: fq name of the results backup to write, .gz etc to compress
+    :return: generator passing each event through unchanged
+    """
+    print("\n    saving final standings for each event as %s" % bakfil)
+    bkw = BackupWriter(bakfil)
+    try:
+        for evtx in evts:
+            bkw.write_rows(evtx)
+            yield evtx
+    except BaseException:
+        bkw.abort()
+        raise
+    print("    backup completed for %d results rows \n" % bkw.commit())
+
+def stage_archive(evts, archf: str):
+    """
+    pipeline stage: archive each event as one json line as it streams past, the archive
+    replaces any earlier file of the same name once the stream has been fully consumed
+    :param evts: iterable of list of dict, each list has all results for one event
+    :param archf: str with name of the json lines archive, such as results.jsonl.gz
+    :return: generator passing each event through unchanged
+    """
+    print("\n    archiving event results as %s" % archf)
+    jsw = JsonlWriter(archf, mode="w")
+    try:
+        for evtx in evts:
+            jsw.write(evtx)
+            yield evtx
+    except BaseException:
+        jsw.abort()
+        raise
+    print("    archived %d events \n" % jsw.commit())
 
 def count_events(elist):
     """
     from list-list-dict with event results we read direct from source,
     count medal events per each Discipline.
-    :param elist: list of list of dict, 2nd level list has all results for one event
+    :param elist: iterable of list of dict, 2nd level list has all results for one event
     :return: dict with key=Discipline 'html' name, value=number of medal events
     """
     print("\ncounting medal events per discipline from source data")
     edct: dict = {}
-    dis_cnt: int = 0
-    for lstx in elist:
-        if lstx[0]['discipline'] not in edct:
-            dis_cnt += 1
-            edct[lstx[0]['discipline']] = 1
-        else:
-            edct[lstx[0]['discipline']] += 1
-    print("    found %d events in %d Disciplines \n" %(sum(edct.values()), dis_cnt))
+    drain(stage_count(elist, edct))
 
     return edct
 
 def get_uniques(lst):
     """
-    simple Fx to return sorted and unique elements from a list
+    simple Fx to return sorted and unique elements from a list. for NOCs, disciplines
+    and other shared keys use gs_vocab, Vocab.present gives the same list
     :param lst:
     :return:
     """
-    tmplst: list = []
-    for item in lst:
-        if item not in tmplst:
-            tmplst.append(item)
-    tmplst = sorted(tmplst)
-
-    return tmplst
+    return sorted(set(lst))
 
 def save_df_tocsv(df: pd.DataFrame, savefile: str="eventdata.csv", wmode: str="w"):
     """
@@ -65,35 +232,141 @@ def save_df_tocsv(df: pd.DataFrame, savefile: str="eventdata.csv", wmode: str="w
 
 def save_dcts_tocsv(lstdct, savefile: str = "eventdata.csv", wmode: str = "w"):
     """
-    saves each dict in list of discipline or event results
+    saves each dict in list of discipline or event results. "w" writes the whole file
+    atomically through a BackupWriter, "a" appends through one handle
     :param lstdct: list of dict, each dict an individual result in an event
-    :param savefile: name of csv file for archive
+    :param savefile: name of csv file for archive, .gz etc to compress
     :param wmode: write mode for file, w for first item, a (append) for rest
     :return:
     """
-    if isinstance(lstdct, list):
-        fh = open(savefile, wmode)
-        keys = lstdct[0].keys()
-        dict_writer = csv.DictWriter(fh, fieldnames=keys, dialect='unix', quoting=csv.QUOTE_MINIMAL)
+    if isinstance(lstdct, list) and lstdct:
         if wmode == "w":
-            dict_writer.writeheader()
-        for dct in lstdct:
-            dict_writer.writerow(dct)
-        fh.close()
+            with BackupWriter(savefile) as bkw:
+                bkw.write_rows(lstdct)
+        else:
+            with open_text(savefile, "at") as fh:
+                dict_writer = csv.DictWriter(fh, fieldnames=lstdct[0].keys(), dialect='unix',
+                                             quoting=csv.QUOTE_MINIMAL)
+                dict_writer.writerows(lstdct)
 
     return
 
-def save_tojson(tweets: list, savefil: str):
+def _json_default(obj):
+    """
+    json.dumps fallback for values pandas leaves in records: numpy scalars, timestamps
+    :param obj: value json could not serialize
+    :return: plain python equivalent
+    """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+
+    return str(obj)
+
+class JsonlWriter:
+    """
+    json lines archive, one record per line, so repeated appends still give a valid
+    file. lines are buffered and written a chunk at a time. .gz, .bz2, .xz or .zst suffix
+    compresses. mode "w" writes a temp file renamed over the archive on commit, like
+    BackupWriter; mode "a" appends to the archive directly.
+    """
+    def __init__(self, savefil: str, mode: str = "a", chunk: int = 1000):
+        """
+        :param savefil: str with name of file, such as results_2021-10-04.jsonl.gz
+        :param mode: "a" to append to the archive, "w" to replace it
+        :param chunk: lines buffered between writes
+        """
+        self.savefil: str = savefil
+        self.chunk: int = chunk
+        self.count: int = 0
+        self.lines: list = []
+        self.outf: str = savefil
+        if mode == "w":
+            self.outf = os.path.join(os.path.dirname(os.path.abspath(savefil)),
+                                     ".%s.%d.tmp" % (os.path.basename(savefil), os.getpid()))
+        codec: str = next((c for c in BAK_CODECS if str(savefil).endswith(c)), "")
+        self.fh = open_text(self.outf, mode + "t", codec=codec)
+
+    def write(self, rec):
+        """
+        :param rec: dict, or list of dict to keep one event per line
+        :return: None
+        """
+        self.lines.append(json.dumps(rec, separators=(',', ':'), default=_json_default))
+        if len(self.lines) >= self.chunk:
+            self.flush()
+
+        return
+
+    def flush(self):
+        if self.lines:
+            self.fh.write("\n".join(self.lines) + "\n")
+            self.fh.flush()
+            self.count += len(self.lines)
+            self.lines = []
+
+        return
+
+    def commit(self):
+        """
+        write any buffered lines, close, and for mode "w" rename over the archive
+        :return: number of lines written
+        """
+        self.flush()
+        self.fh.close()
+        if self.outf != self.savefil:
+            os.replace(self.outf, self.savefil)
+
+        return self.count
+
+    def abort(self):
+        """
+        close without the buffered lines, for mode "w" the temp file is deleted
+        :return: None
+        """
+        self.fh.close()
+        if self.outf != self.savefil and os.path.exists(self.outf):
+            os.remove(self.outf)
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
+
+def save_tojson(recs, savefil: str, mode: str = "a", chunk: int = 1000):
+    """
+    archive records as json lines with a JsonlWriter, memory use is one chunk of lines
+    however many records are streamed in
+    :param recs: iterable of dict, or of list of dict to keep one event per line
+    :param savefil: str with name of file, .gz, .bz2, .xz or .zst to compress
+    :param mode: "a" to append to the archive, "w" to replace it
+    :param chunk: lines buffered between writes
+    :return: number of lines written
+    """
+    with JsonlWriter(savefil, mode=mode, chunk=chunk) as jsw:
+        for rec in recs:
+            jsw.write(rec)
+
+    return jsw.count
+
+def iter_jsonl(archf: str):
     """
-    called by save_recs to save a large batch of tweets to file.
-    easy to chunk any junk and serialize to json
-    :param tweets: list of dict, each dict a set of fields for one tweet
-    :param savefil: str with name of file
-    :return: 0 if success
+    stream records back out of a save_tojson archive one line at a time
+    :param archf: str with name of plain or compressed json lines file
+    :return: generator of whatever each line holds, dict or list of dict
     """
-    fh_j = open(savefil, mode='a+', encoding='utf-8', newline='')
-    json.dump(tweets, fh_j, separators=(',', ':'))
-    return fh_j.close()
+    with open_text(archf) as fh_j:
+        for line in fh_j:
+            if line.strip():
+                yield json.loads(line)
 
 def save_events_df(edf: pd.DataFrame, savef: str):
     """
@@ -126,20 +399,49 @@ def do_event_bak(bakfil, elst):
     """
     little fx to write event result detail to file
     :param bakfil:
-    :param elst:
+    :param elst: iterable of list of dict, one list per event
     :return:
     """
-    print("\n    saving final standings for each event as %s" % bakfil)
-    first: bool = True
-    for evtx in elst:
-        if first:
-            save_dcts_tocsv(evtx, savefile=bakfil)
-            first = False
-        else:
-            save_dcts_tocsv(evtx, savefile=bakfil, wmode="a")
+    drain(stage_backup(elst, bakfil))
 
     return
 
+def results_to_frame(evts):
+    """
+    flatten a stream of event results into one typed, columnar DataFrame: discipline,
+    event and NOC on the shared gs_schema categoricals, final_place as a narrow int
+    :param evts: iterable of list of dict, one list per event
+    :return: pd.DataFrame with one row per final standing
+    """
+    cols: dict = {c: [] for c in RESULT_COLS}
+    for evtx in evts:
+        for rec in evtx:
+            for c in RESULT_COLS:
+                cols[c].append(rec.get(c))
+    rdf = pd.DataFrame(cols)
+    rdf["Name"] = rdf["Name"].astype(str)
+    rdf["final_place"] = pd.to_numeric(rdf["final_place"], errors="coerce").fillna(0)
+
+    return gsc.apply_schema(rdf, "results")
+
+def save_results_columnar(evts, savef: str):
+    """
+    backup event results as Parquet (.parquet) or Arrow IPC (.arrow or .feather),
+    categoricals are stored dictionary-encoded so files are a fraction of the csv size
+    :param evts: iterable of list of dict with event results, or a DataFrame from
+        results_to_frame
+    :param savef: fq filename, extension picks the format
+    :return: pd.DataFrame that was written
+    """
+    rdf = evts if isinstance(evts, pd.DataFrame) else results_to_frame(evts)
+    if str(savef).endswith(".parquet"):
+        rdf.to_parquet(savef, index=False, compression="zstd")
+    else:
+        rdf.to_feather(savef, compression="zstd")
+    print("backup completed for %d result rows as %s \n" %(len(rdf), savef))
+
+    return rdf
+
 def show_metadata(meta: dict):
     """
     simple function to print metadata created with athlete analysis
@@ -173,8 +475,7 @@ def describe_basics(dis: list, edf: pd.DataFrame):
     for k, v in sprt_mdls.items():
         print("    %d medal events in %s" % (v, k))
 
-    primes: list = [d['primary'] for d in dis]
-    primes = get_uniques(primes)
+    primes: list = gsv.vocab("primary").present([d['primary'] for d in dis])
 
     print("\nI designated a higher level 'Primary group' for each discipline")
     print("    %d primary groups..." %len(primes))
@@ -192,66 +493,94 @@ def describe_basics(dis: list, edf: pd.DataFrame):
 
     return primdct
 
+def build_group_index(dis: list, edf: pd.DataFrame):
+    """
+    one-time join of disciplines onto events_df: every medal awarded is tagged with its
+    discipline's primary and secondary group and trait flags, then counted per NOC.
+    group breakdowns are then lookups on this index instead of rescans of edf.
+    :param dis: list of disciplines with primary and secondary groups and trait columns
+    :param edf: events dataframe
+    :return: pd.DataFrame indexed (primary, secondary, disc_html, NOC) with Gold, Silver,
+        Bronze, Total counts plus the discipline name and boolean trait columns
+    """
+    ddf = pd.DataFrame(dis)
+    traits: list = [c for c in ddf.columns if ddf[c].dtype == bool]
+    slots: list = [c for c in MEDAL_SLOTS if c in edf.columns]
+    # Sport names one disciplines.csv row, disc_html does not: the three equestrian
+    # disciplines share htmlq "equestrian" and a join on it would count medals 3 times
+    mlong = edf[["Sport", "disc_html"] + slots].melt(id_vars=["Sport", "disc_html"],
+                                                      var_name="slot", value_name="NOC")
+    mlong = mlong.dropna(subset=["NOC"])
+    mlong["Sport"] = mlong["Sport"].astype(str)
+    mlong["medal"] = mlong["slot"].map(MEDAL_SLOTS)
+    cnt = mlong.groupby(["Sport", "disc_html", "NOC", "medal"], observed=True).size()
+    cnt = cnt.unstack(fill_value=0).reindex(columns=["Gold", "Silver", "Bronze"], fill_value=0)
+    cnt.columns.name = None
+    cnt["Total"] = cnt["Gold"] + cnt["Silver"] + cnt["Bronze"]
+
+    dcols: list = ["discipline", "primary", "secondary"] + traits
+    gidx = cnt.reset_index().merge(ddf[dcols], left_on="Sport", right_on="discipline",
+                                   how="left").drop(columns="Sport")
+    gidx = gidx.set_index(["primary", "secondary", "disc_html", "NOC"]).sort_index()
+
+    return gidx
+
+def group_noc_counts(gidx: pd.DataFrame, group=True, level: str = "primary",
+                     medal: str = "Total"):
+    """
+    NOC medal breakdown for one group, looked up from the index made by build_group_index
+    :param gidx: group index DataFrame
+    :param group: value to select, such as "combat" for level primary, True for a trait
+    :param level: primary, secondary, disc_html, or a boolean trait column like tallbias
+    :param medal: Gold, Silver, Bronze or Total
+    :return: dict with key=NOC, val=medal count, sorted descending
+    """
+    if level in gidx.index.names:
+        if group not in gidx.index.get_level_values(level):
+            return {}
+        sel = gidx.xs(group, level=level)
+    else:
+        sel = gidx[gidx[level] == group]
+    nocs = sel.groupby(level="NOC")[medal].sum()
+    nocs = nocs[nocs > 0].sort_values(ascending=False, kind="stable")
+
+    return nocs.to_dict()
+
 def analyze_groups(dis: list, edf: pd.DataFrame):
     """
     get info on primary and secondary level sports groups I created
     :param dis: list of disciplines with primary and secondary groups
     :param edf: events dataframe
-    :return:
+    :return: dict of medal events per primary group, and the group medal index from
+        build_group_index (pass both to count_grp_nocs)
     """
-    primes: list = [disx['primary'] for disx in dis]
-    primes: list = get_uniques(primes)
-    # append grp_sports and grp_medals for each Sport in a primary group
-    grp_sports: dict = {}
-    grp_mdls: list = []
-    for p in primes:
-        #  for each sport in group, collect results for events
-        p_sports = [x['htmlq'] for x in dis if x['primary']==p]
-        evt_count: int = 0
-        sprt_mdls: list = []
-        for spx in p_sports:
-            # .loc with columns list in brackets SHOULD return a df, buggy though...
-            tmp_df: pd.DataFrame = edf.loc[edf["disc_html"]== spx, ["G_NOC", "S_NOC", "B_NOC", "G2_NOC", "B2_NOC"]]
-            evt_count += len(tmp_df)
-            prime_g: list = tmp_df.G_NOC.to_list()
-            prime_s: list = tmp_df.S_NOC.to_list()
-            prime_b: list = tmp_df.B_NOC.to_list()
-
-            for altmdl in ["G2_NOC", "B2_NOC"]:
-                nocmdl  = tmp_df.loc[tmp_df[altmdl].notna(), [altmdl]]
-                if len(nocmdl) >= 1:
-                    altm_lst = nocmdl[altmdl].to_list()
-                    prime_g.extend(altm_lst)
-            sprt_mdls.append([spx, prime_g, prime_s, prime_b])
-
-        grp_mdls.append(sprt_mdls)
-        grp_sports.update({p: evt_count})
+    gidx: pd.DataFrame = build_group_index(dis, edf)
+
+    ddf = pd.DataFrame(dis)[["discipline", "primary"]]
+    evt_ct = edf["Sport"].astype(str).value_counts().rename("events")
+    ddf = ddf.merge(evt_ct, left_on="discipline", right_index=True, how="left").fillna({"events": 0})
+    grp_sports: dict = ddf.groupby("primary")["events"].sum().astype(int).to_dict()
 
     for k, v in grp_sports.items():
         print("primary group %s had %d medal events" %(k, v))
 
-    return grp_sports, grp_mdls
+    return grp_sports, gidx
 
-def count_grp_nocs(g_m: list, g_s: dict):
+def count_grp_nocs(g_m: pd.DataFrame, g_s: dict):
     """
     aggregate medals by NOC for each primary group
-    :param g_m: list of n(groups) length with list for each sport with noc medals
+    :param g_m: group medal index from analyze_groups / build_group_index
     :param g_s: dict with key=group name, val=num of medal events
-    :return:
+    :return: list of dict, one per group in g_s order, key=NOC, val=medal count
     """
+    grp_tot = g_m.groupby(level=["primary", "NOC"])["Total"].sum()
     grp_noc_ct: list = []
-    for gnam, mdls in zip(g_s.keys(), g_m):
-        noc_dct: dict = {}
-        slen: int = len(mdls)
-        for x in range(slen):
-            for y in [1, 2, 3]:
-                nocs: list = mdls[x][y]
-                for z in nocs:
-                    if z in noc_dct:
-                        noc_dct[z] += 1
-                    else:
-                        noc_dct[z] = 1
-        grp_noc_ct.append(noc_dct)
+    for gnam in g_s.keys():
+        if gnam in grp_tot.index.get_level_values("primary"):
+            nocs = grp_tot.xs(gnam, level="primary")
+            grp_noc_ct.append(nocs.sort_values(ascending=False, kind="stable").to_dict())
+        else:
+            grp_noc_ct.append({})
 
     return grp_noc_ct
 
@@ -264,12 +593,13 @@ def analyze_events(dis: list, edf: pd.DataFrame):
     """
 
     eg_df = edf.copy(deep=True)         # df copy we can modify and leave original OK
+    # pd.Categorical rather than astype: astype to a categorical with the same values in
+    # another order is a no-op, and the load-time categoricals are in gs_vocab id order
     meta_dct: dict = {}
 
-    sports: list = [disx['discipline'] for disx in dis]
-    sports = get_uniques(sports)
+    sports: list = gsv.vocab("sport").present([disx['discipline'] for disx in dis])
     meta_dct["Sports"] = len(sports)
-    eg_df["Sport"] = eg_df["Sport"].astype(CategoricalDtype(sports))
+    eg_df["Sport"] = pd.Categorical(eg_df["Sport"], categories=sports)
 
     mdls_bysport: dict = eg_df["Sport"].value_counts().to_dict()
     meta_dct["Events_by_Sport"] = mdls_bysport.items()
@@ -277,25 +607,21 @@ def analyze_events(dis: list, edf: pd.DataFrame):
     evt_gender_dct: dict = eg_df["Gender"].value_counts().to_dict()
     gend_cat = list(evt_gender_dct.keys())
     meta_dct["Events_by_Gender"] = evt_gender_dct.items()
-    eg_df["Gender"] = eg_df["Gender"].astype(CategoricalDtype(gend_cat))
+    eg_df["Gender"] = pd.Categorical(eg_df["Gender"], categories=gend_cat)
 
     # one event awarded two gold, several awarded two bronze, the rest just gold, silver, bronze
-    gNOCs: list = eg_df["G_NOC"].value_counts().keys().to_list()
-    gNOCs.extend(eg_df["G2_NOC"].value_counts().keys().to_list())
-    gNOCs = get_uniques(gNOCs)
-    eg_df["G_NOC"] = eg_df["G_NOC"].astype(CategoricalDtype(gNOCs))
-
-    sNOCs: list = eg_df["S_NOC"].value_counts().keys().to_list()
-    sNOCs = get_uniques(sNOCs)
-    eg_df["S_NOC"] = eg_df["S_NOC"].astype(CategoricalDtype(sNOCs))
-
-    bNOCs: list = eg_df["B_NOC"].value_counts().keys().to_list()
-    bNOCs.extend(eg_df["B2_NOC"].value_counts().keys().to_list())
-    bNOCs = get_uniques(bNOCs)
-    eg_df["B_NOC"] = eg_df["B_NOC"].astype(CategoricalDtype(bNOCs))
-
-    all_NOCs = gNOCs + sNOCs + bNOCs
-    all_NOCs = get_uniques(all_NOCs)
+    # NOC columns share one categorical dtype, so list the NOCs present, not the categories
+    noc = gsv.vocab("noc")
+    gNOCs: list = noc.present(eg_df["G_NOC"], eg_df["G2_NOC"])
+    eg_df["G_NOC"] = pd.Categorical(eg_df["G_NOC"], categories=gNOCs)
+
+    sNOCs: list = noc.present(eg_df["S_NOC"])
+    eg_df["S_NOC"] = pd.Categorical(eg_df["S_NOC"], categories=sNOCs)
+
+    bNOCs: list = noc.present(eg_df["B_NOC"], eg_df["B2_NOC"])
+    eg_df["B_NOC"] = pd.Categorical(eg_df["B_NOC"], categories=bNOCs)
+
+    all_NOCs: list = noc.present(*[eg_df[c] for c in ["G_NOC", "G2_NOC", "S_NOC", "B_NOC", "B2_NOC"]])
     meta_dct["Gold_medal_NOCs"] = len(gNOCs)
     meta_dct["Silver_medal_NOCs"] = len(sNOCs)
     meta_dct["Bronze_Unique_Countries"] = len(bNOCs)
@@ -322,46 +648,75 @@ def describe_athlete_data(tdf: pd.DataFrame):
 
     return
 
+def _fill_key(col: pd.Series, fill: str):
+    """
+    fillna for a group key that may be categorical, adding fill as a category if needed
+    """
+    if isinstance(col.dtype, CategoricalDtype) and fill not in col.cat.categories:
+        col = col.cat.add_categories([fill])
+
+    return col.fillna(fill)
+
+def athlete_stats(adf: pd.DataFrame, by: list = None, per: str = None,
+                  within: tuple = ("ht_in", "wt_lbs")):
+    """
+    age, height and weight stats per group in one grouped pass, never copying or changing
+    adf beyond the few columns it reads. precalculated rows (NOC "ALL") are left out.
+    each basis in within restricts every stat to rows where that measure is present, so
+    "ht_in" gives the stats of athletes with a known height; None means all rows.
+    :param adf: athlete_df
+    :param by: group columns, default event and gender
+    :param per: optional extra group column such as NOC, category or medal
+    :param within: bases to compute, each becomes a block of rows in the result
+    :return: tidy pd.DataFrame indexed by group columns plus basis, with columns n,
+        avg_age, avg_ht, min_ht, max_ht, avg_wt, min_wt, max_wt. groups without any row
+        for a basis are dropped
+    """
+    keys: list = list(by or ["event", "gender"]) + ([per] if per else [])
+    mask = adf["NOC"].ne("ALL").to_numpy()
+    # athletes without a medal have a blank medal field
+    groups: list = [_fill_key(adf[k][mask], "No") if k == "medal" else adf[k][mask] for k in keys]
+
+    cols: dict = {}
+    for basis in within:
+        present = adf[basis][mask].notna() if basis else pd.Series(True, index=groups[0].index)
+        for msr in ("age", "ht_in", "wt_lbs"):
+            cols[(str(basis), msr)] = adf[msr][mask].where(present) if basis else adf[msr][mask]
+        cols[(str(basis), "n")] = present
+    agg: pd.DataFrame = pd.DataFrame(cols).groupby(groups, observed=True).agg(
+        {c: (["sum"] if c[1] == "n" else ["mean", "min", "max"]) for c in cols})
+
+    parts: list = []
+    for basis in within:
+        b: str = str(basis)
+        part = pd.DataFrame({"n": agg[(b, "n", "sum")].astype(np.int64),
+                             "avg_age": agg[(b, "age", "mean")],
+                             "avg_ht": agg[(b, "ht_in", "mean")],
+                             "min_ht": agg[(b, "ht_in", "min")],
+                             "max_ht": agg[(b, "ht_in", "max")],
+                             "avg_wt": agg[(b, "wt_lbs", "mean")],
+                             "min_wt": agg[(b, "wt_lbs", "min")],
+                             "max_wt": agg[(b, "wt_lbs", "max")]})
+        parts.append(part[part["n"] > 0])
+
+    return pd.concat(parts, keys=[str(b) for b in within], names=["basis"]
+                     ).reorder_levels(keys + ["basis"])
+
 def athletes_groupby(adf: pd.DataFrame):
     """
-    use dataframe groupby to calculate stats for athletes by team and sport
+    use athlete_stats to calculate stats for athletes by event and gender, in the
+    layout this fx has always returned: one frame for athletes with a height, one for
+    athletes with a weight. adf is not modified.
     :param adf: the teamsdf DataFrame created as part of readfiles - getOlympicdata
     :return: ht_grp and wt_grp: 2 pd.DataFrames with athlete descriptive statistics
     """
-
     print("\n---- athletes_groupby prep athlete data for analysis ----")
-    funcs = {"age": "mean", "ht_in": ["mean", "min", "max"], "wt_lbs": "mean"}
     newcols = ["avg_age", "avg_ht", "min_ht", "max_ht", "avg_wt"]
-
-    print("    creating categorical dtypes for category, event, gender, and NOC")
-    cat_cat = adf.category.unique().tolist()
-    adf["category"] = adf["category"].astype(CategoricalDtype(cat_cat))
-    evt_cat = adf.event.unique().tolist()
-    adf["event"] = adf["event"].astype(CategoricalDtype(evt_cat))
-    gend_cat = adf.gender.unique().tolist()
-    adf["gender"] = adf["gender"].astype(CategoricalDtype(gend_cat))
-    noc_cat = adf.NOC.unique().tolist()
-    adf["NOC"] = adf["NOC"].astype(CategoricalDtype(noc_cat))
-    adf["medal"] = adf.loc[adf["medal"].isna(), ["medal"]] = "No"
-    mdl_cat = adf.medal.unique().tolist()
-    adf["medal"] = adf["medal"].astype(CategoricalDtype(mdl_cat))
-
-    print("    removing precalculated rows and rows with missing height or weight")
-    tdf = adf[adf["NOC"] != "ALL"]
-    ht_df = tdf[tdf['ht_in'].notna()]
-    wt_df = tdf[tdf['wt_lbs'].notna()]
-    print("    %d rows for athlete height, %d rows for athlete weight" %(len(ht_df), len(wt_df)))
-
-    ht_grp = ht_df.groupby(["event", "gender"])
-    ht_grp = ht_grp.agg(funcs)
-    ht_grp.columns = newcols
-    ht_grp = ht_grp.reset_index()
-
-    # same grouping for weight data
-    wt_grp = wt_df.groupby(["event", "gender"])
-    wt_grp = wt_grp.agg(funcs)
-    wt_grp.columns = newcols
-    wt_grp = wt_grp.reset_index()
+    stats: pd.DataFrame = athlete_stats(adf, ["event", "gender"])
+    ht_grp = stats.xs("ht_in", level="basis")[newcols].reset_index()
+    wt_grp = stats.xs("wt_lbs", level="basis")[newcols].reset_index()
+    print("    %d groups with athlete height, %d groups with athlete weight"
+          %(len(ht_grp), len(wt_grp)))
 
     return ht_grp, wt_grp
 
@@ -380,7 +735,7 @@ def prep_precalcs(adf: pd.DataFrame):
     precalcs = precalcs.drop(["dob"], axis=1)
     precalcs = precalcs.reset_index(drop=True)
     gendct: dict = precalcs.gender.value_counts().to_dict()
-    catevts: dict = precalcs.category.value_counts().to_dict()
+    catevts: dict = precalcs.groupby("category", observed=True).size().to_dict()
     print("    weight-height averages in %d events" %sum(catevts.values()))
     print("    in %d groups of sports" %len(catevts))
     print("    %d for Women, %d for Men\n" %(gendct['Women'], gendct['Men']))
@@ -417,66 +772,145 @@ def conv_checkmark_to_bool(strct, chk_cols: list):
 
     return strct
 
-def reconcile_eventdf_wsrc(evts: list, edf: pd.DataFrame):
+def pivot_medalists(evts):
+    """
+    pivot scraped standings into the events_df medal-column layout, one row per event.
+    medal slots come from final_place plus the order within a tied place: first gold is
+    Gold/G_NOC, a second gold is Gold2/G2_NOC, likewise Bronze and Bronze2.
+    :param evts: iterable of list of dict with event results, or a results DataFrame
+    :return: pd.DataFrame indexed (disc_html, evt_html) with the RECON_COLS columns
+    """
+    rdf = evts if isinstance(evts, pd.DataFrame) else results_to_frame(evts)
+    mdl = rdf.loc[rdf["final_place"].between(1, 3),
+                  ["discipline", "event", "NOC", "Name", "final_place"]].copy()
+    for c in ["discipline", "event"]:
+        mdl[c] = mdl[c].astype(str)
+    # an event scraped twice would otherwise look like a tie at every medal place
+    mdl = mdl.drop_duplicates()
+    mdl["tie"] = mdl.groupby(["discipline", "event", "final_place"]).cumcount()
+    mdl = mdl.merge(MEDAL_PLACES, on=["final_place", "tie"], how="inner")
+    wide = mdl.pivot(index=["discipline", "event"], columns="slot", values=["Name", "NOC"])
+    src = pd.DataFrame(index=wide.index)
+    for name_col, noc_col in RECON_PAIRS:
+        src[name_col] = wide["Name"][name_col] if name_col in wide["Name"] else np.nan
+        src[noc_col] = wide["NOC"][name_col] if name_col in wide["NOC"] else np.nan
+    src.index.names = ["disc_html", "evt_html"]
+
+    return src
+
+def apply_changes(edf: pd.DataFrame, report: pd.DataFrame):
+    """
+    write the corrections in a reconcile report into edf, one vectorized assignment per
+    column rather than one .loc write per cell
+    :param edf: events_df DataFrame, modified in place
+    :param report: change report from reconcile_events
+    :return: edf
+    """
+    if len(report) == 0:
+        return edf
+    keys = pd.MultiIndex.from_frame(edf[["disc_html", "evt_html"]])
+    kinds: dict = gsc.SCHEMAS["events"]
+    for col, chg in report.groupby("column", sort=False):
+        rows = keys.get_indexer(pd.MultiIndex.from_frame(chg[["disc_html", "evt_html"]]))
+        if isinstance(edf[col].dtype, CategoricalDtype):
+            # keep the shared dtype: new values are interned in the column's domain
+            if col in kinds and kinds[col] not in ("str", "int", "float", "date"):
+                dtyp: CategoricalDtype = gsc.domain_dtype(kinds[col], chg["new"])
+                edf[col] = edf[col].cat.set_categories(dtyp.categories)
+            else:
+                new = pd.Index(chg["new"].dropna().unique())
+                edf[col] = edf[col].cat.add_categories(new.difference(edf[col].cat.categories))
+        elif not pd.api.types.is_string_dtype(edf[col]):
+            edf[col] = edf[col].astype(object)
+        edf.iloc[rows, edf.columns.get_loc(col)] = chg["new"].to_numpy()
+
+    # other columns of a domain that took new values move up to its final dtype too
+    return gsc.conform(edf, "events")
+
+def reconcile_events(evts, edf: pd.DataFrame):
+    """
+    keyed, vectorized true-up of events_df from scraped standings: one pivot of the
+    scraped medalists, one merge on (disc_html, evt_html), and a column-wise diff.
+    tied golds and double bronzes are matched as pairs, so Gold/Gold2 or Bronze/Bronze2
+    listed in the other order is not reported as a change.
+    :param evts: iterable of list of dict with event results, or a results DataFrame
+    :param edf: events_df DataFrame, left unchanged
+    :return: corrected copy of edf, and change report DataFrame with disc_html, evt_html,
+        column, old, new for every corrected cell
+    """
+    src = pivot_medalists(evts)
+    cur = edf.merge(src, left_on=["disc_html", "evt_html"], right_index=True,
+                    how="inner", suffixes=("", "_src"))
+
+    # align tie pairs: if the source has the pair swapped relative to edf, swap it back
+    for first, second in [(("Gold", "G_NOC"), ("Gold2", "G2_NOC")),
+                          (("Bronze", "B_NOC"), ("Bronze2", "B2_NOC"))]:
+        swap = ((cur[first[1] + "_src"] == cur[second[1]]) &
+                (cur[second[1] + "_src"] == cur[first[1]]) &
+                (cur[first[1]] != cur[second[1]]))
+        swap = swap.to_numpy()
+        for a, b in [(first[0], second[0]), (first[1], second[1])]:
+            a_src = cur[a + "_src"].to_numpy(dtype=object)
+            b_src = cur[b + "_src"].to_numpy(dtype=object)
+            cur[a + "_src"] = np.where(swap, b_src, a_src)
+            cur[b + "_src"] = np.where(swap, a_src, b_src)
+
+    chgs: list = []
+    for col in [c for pair in RECON_PAIRS for c in pair]:
+        old, new = cur[col], cur[col + "_src"]
+        diff = ~((old == new) | (old.isna() & new.isna()))
+        if diff.any():
+            chgs.append(pd.DataFrame({"disc_html": cur.loc[diff, "disc_html"],
+                                      "evt_html": cur.loc[diff, "evt_html"],
+                                      "column": col, "old": old[diff], "new": new[diff]}))
+    report = pd.concat(chgs, ignore_index=True) if chgs else \
+        pd.DataFrame(columns=["disc_html", "evt_html", "column", "old", "new"])
+    corrected = apply_changes(edf.copy(), report)
+
+    return corrected, report
+
+def stage_reconcile(evts, edf: pd.DataFrame, tally: dict = None, batch: int = 64):
+    """
+    pipeline stage: true-up events_df from scraped events as they stream past, events are
+    buffered and reconciled in batches with reconcile_events
+    :param evts: iterable of list of dict, each list has all results for one event
+    :param edf: events_df DataFrame, corrected in place
+    :param tally: optional dict, gets 'rows' and 'cols' counts of corrections
+    :param batch: number of events reconciled together
+    :return: generator passing each event through unchanged
+    """
+    tally = tally if tally is not None else {}
+    tally.update({'rows': 0, 'cols': 0})
+
+    def flush(buf: list):
+        _, report = reconcile_events(buf, edf)
+        apply_changes(edf, report)
+        tally['cols'] += len(report)
+        tally['rows'] += len(report.drop_duplicates(["disc_html", "evt_html"]))
+
+    buf: list = []
+    for evt in evts:
+        buf.append(evt)
+        if len(buf) >= batch:
+            flush(buf)
+            buf = []
+        yield evt
+    if buf:
+        flush(buf)
+    print(" corrected %d entries in %d rows for event DataFrame" %(tally['cols'], tally['rows']))
+
+def reconcile_eventdf_wsrc(evts, edf: pd.DataFrame):
     """
     a utility that compares event results from scraping the Olympic site with
     our event_df which I downloaded from Kaggle and in which I found errors, to my
     bad surprise, the count of medals for a few countries was WRONG!  so, I wrote this
     to true-up from the source data I got from scraping the Olympic site.
-    :param evts: the event_res list with 339 events scraped from the web
+    :param evts: the event_res list (or stream) with 339 events scraped from the web
     :param edf: events_df DataFrame which is a handy layout but has some errors
     :return: corrected DataFrame
     """
-    edf.set_index(['disc_html', 'evt_html'], drop=False, inplace=True, verify_integrity=True)
+    corrected, report = reconcile_events(evts, edf)
+    nrows: int = len(report.drop_duplicates(["disc_html", "evt_html"]))
+    print(" corrected %d entries in %d rows for event DataFrame" %(len(report), nrows))
 
-    row_count: int = 0
-    col_count: int = 0
-    for evt in evts:
-        evt_flag: bool = False
-        if isinstance(evt[0], dict):
-            srcdct: dict = {}
-            for x in range(4):
-                ds: str = evt[x].get('discipline')
-                ev: str = evt[x].get('event')
-                if str(evt[x]['final_place']).startswith("1"):
-                    if x == 0:
-                        srcdct['Gold'] = evt[x]['Name']
-                        srcdct['G_NOC'] = evt[x]['NOC']
-                    elif x == 1:
-                        srcdct['Gold2'] = evt[x]['Name']
-                        srcdct['G2_NOC'] = evt[x]['NOC']
-                elif str(evt[x]['final_place']).startswith("2"):
-                    srcdct['Silver'] = evt[x]['Name']
-                    srcdct['S_NOC'] = evt[x]['NOC']
-                elif str(evt[x]['final_place']).startswith("3"):
-                    if x == 2:
-                        srcdct['Bronze'] = evt[x]['Name']
-                        srcdct['B_NOC'] = evt[x]['NOC']
-                    elif x == 3:
-                        srcdct['Bronze2'] = evt[x]['Name']
-                        srcdct['B2_NOC']= evt[x]['NOC']
-            if srcdct.get('G2_NOC'):
-                rowval: dict = edf.loc[(ds, ev),
-                                       ['Gold', 'G_NOC', 'Gold2', 'G2_NOC', 'Bronze', 'B_NOC']].to_dict()
-            elif srcdct.get('B2_NOC'):
-                rowval: dict = edf.loc[(ds, ev),
-                                       ['Gold', 'G_NOC', 'Silver', 'S_NOC', 'Bronze',
-                                        'B_NOC', 'Bronze2', 'B2_NOC']].to_dict()
-            else:
-                rowval: dict = edf.loc[(ds, ev),
-                                   ['Gold', 'G_NOC', 'Silver', 'S_NOC', 'Bronze', 'B_NOC']].to_dict()
-
-            for k, v in rowval.items():
-                if srcdct[k] == v:
-                    # print("%s-%s matches" %(ds,ev))
-                    continue
-                else:
-                    edf.loc[(ds, ev), k] = srcdct[k]
-                    col_count += 1
-                    if not evt_flag:
-                        row_count += 1
-                        evt_flag = True
-
-    edf.reset_index(drop=True, inplace=True)
-    print(" corrected %d entries in %d rows for event DataFrame" %(col_count, row_count))
-    return edf
+    return corrected
@@ -0,0 +1,191 @@
+"""
+process-wide vocabularies for the keys every dataset shares: NOC codes, discipline
+names, html names and dis_codes, event html names and (disc_html, evt_html) event keys.
+each value is interned once and gets a stable integer id, lookups either way are dict
+or list reads, and each vocabulary has one CategoricalDtype whose codes are those ids.
+gs_schema draws its categoricals from here, so frames built by different modules share
+category codes and can be joined on ints.
+
+    gsv.load_reference(RAWDIR)
+    gsv.vocab("noc").id("USA"), gsv.vocab("noc").value(0)
+    gsv.vocab("noc").ids(rdf["NOC"])
+"""
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from gs_datadict import discf, nocf
+
+# vocabulary name -> (reference file, column) it is seeded from by load_reference
+REFERENCE: dict = {"noc": (nocf, "NOC"), "sport": (discf, "discipline"),
+                   "disc_html": (discf, "htmlq"), "dis_code": (discf, "dis_code")}
+_vocabs: dict = {}
+
+def _blank(val):
+    return val is None or val is pd.NA or val == "" or (isinstance(val, float) and val != val)
+
+class Vocab:
+    """
+    one interned vocabulary. values get ids 0..n-1 in the order they are added and are
+    never removed, so an id handed out keeps its meaning for the life of the process.
+    """
+    def __init__(self, name: str):
+        """
+        :param name: vocabulary name such as noc or disc_html
+        """
+        self.name: str = name
+        self._ids: dict = {}
+        self._vals: list = []
+        self._dtype = None
+        self._sorted = None
+
+    def __len__(self):
+        return len(self._vals)
+
+    def __contains__(self, value):
+        return value in self._ids
+
+    def __iter__(self):
+        return iter(self._vals)
+
+    def add(self, values):
+        """
+        intern values not seen before, blanks and NaN are skipped. new values are
+        appended in sorted order so one batch gets ids independent of its row order
+        :param values: iterable of str (or tuples for event keys)
+        :return: self
+        """
+        new: set = {v for v in values if not _blank(v) and v not in self._ids}
+        if new:
+            for val in sorted(new):
+                self._ids[val] = len(self._vals)
+                self._vals.append(val)
+            self._dtype = None
+            self._sorted = None
+
+        return self
+
+    def id(self, value):
+        """
+        :param value: interned value
+        :return: int id, KeyError if value was never added
+        """
+        return self._ids[value]
+
+    def get(self, value, default: int = -1):
+        """
+        :param value: any value
+        :return: int id, or default if value is not interned
+        """
+        return self._ids.get(value, default)
+
+    def value(self, idx: int):
+        """
+        :param idx: int id
+        :return: the value interned under that id
+        """
+        return self._vals[idx]
+
+    def ids(self, values):
+        """
+        vectorized id lookup
+        :param values: pd.Series, list or array of values. a categorical Series is
+            looked up once per category and its codes mapped through that
+        :return: np.ndarray of int ids, -1 where a value is not interned
+        """
+        if isinstance(values, pd.Series) and isinstance(values.dtype, CategoricalDtype):
+            lut: np.ndarray = np.append(self.ids(values.cat.categories), -1).astype(np.int32)
+            return lut[values.cat.codes.to_numpy()]
+
+        return np.array([self._ids.get(v, -1) for v in values], dtype=np.int32)
+
+    def values(self, ids):
+        """
+        :param ids: iterable of int ids, -1 gives None
+        :return: list of values
+        """
+        return [self._vals[i] if i >= 0 else None for i in ids]
+
+    def present(self, *cols):
+        """
+        the values that occur in any of the columns, interned if new. a categorical
+        column is read from its used codes rather than row by row
+        :param cols: pd.Series or lists of values
+        :return: sorted list of distinct values
+        """
+        found: set = set()
+        for col in cols:
+            if isinstance(col, pd.Series) and isinstance(col.dtype, CategoricalDtype):
+                used: np.ndarray = np.unique(col.cat.codes.to_numpy())
+                found.update(col.cat.categories[used[used >= 0]])
+            else:
+                found.update(v for v in pd.unique(pd.Series(col, dtype=object)) if not _blank(v))
+        self.add(found)
+
+        return sorted(found)
+
+    def sorted(self):
+        """
+        :return: list of values in sorted order, built once per change to the vocabulary
+        """
+        if self._sorted is None:
+            self._sorted = sorted(self._vals)
+
+        return list(self._sorted)
+
+    @property
+    def dtype(self):
+        """
+        :return: CategoricalDtype with categories in id order, so codes are ids
+        """
+        if self._dtype is None:
+            self._dtype = CategoricalDtype(self._vals)
+
+        return self._dtype
+
+def vocab(name: str, values=None):
+    """
+    the registry entry for a vocabulary, created empty on first use
+    :param name: vocabulary name
+    :param values: optional iterable of values to intern
+    :return: Vocab
+    """
+    if name not in _vocabs:
+        _vocabs[name] = Vocab(name)
+    if values is not None:
+        _vocabs[name].add(values)
+
+    return _vocabs[name]
+
+def load_reference(rawdir: str):
+    """
+    seed the noc, sport, disc_html and dis_code vocabularies from country_codes.csv and
+    disciplines.csv, so their ids do not depend on which data file is loaded first.
+    a file that is missing is skipped, values then come from the data as it loads
+    :param rawdir: folder with the reference files
+    :return: dict with key=vocabulary name, val=number of values
+    """
+    cols: dict = {}
+    for name, (fil, col) in REFERENCE.items():
+        fqf: str = os.path.join(rawdir, fil)
+        if not os.path.isfile(fqf):
+            continue
+        if fqf not in cols:
+            with open(fqf, mode='r', encoding='utf-8', newline='') as fh:
+                cols[fqf] = list(csv.DictReader(fh))
+        vocab(name, [row.get(col) for row in cols[fqf]])
+
+    return {name: len(vocab(name)) for name in REFERENCE}
+
+def event_keys(edf: pd.DataFrame):
+    """
+    intern the (disc_html, evt_html) key of every event in events_df
+    :param edf: events_df
+    :return: np.ndarray of event key ids, one per row
+    """
+    keys: list = list(zip(edf["disc_html"].astype(str), edf["evt_html"].astype(str)))
+
+    return vocab("event_key", keys).ids(keys)
@@ -17,113 +17,291 @@ My data schema for the 2020 Tokyo Olympics is:
                 head coach name, country, age, first Olympics.
 """
 
+import argparse
 import os
 import sys
 from datetime import datetime as dt
 
 import pandas as pd
 
-# imports from my modules:
+# imports from my modules, gs_plots is imported only when a plot is asked for:
+import gs_fetch as gsf
 import gs_getters as gsg
-import gs_plots as gsp
+import gs_metrics as gsm
+import gs_schema as gsc
+import gs_snapshots as gss
 import gs_util as gsu
+import gs_vocab as gsv
 from gs_datadict import *
 
-# variables to control what scripts are run:
-source_results: bool = False
-source_medalists: bool = False
-analyze_basics: bool = True
-analyze_athletes: bool = False
-analyze_events: bool = True
-save_entries: bool = False
-
-if os.path.isfile(os.path.join(RAWDIR, evts_byrow_f)):
-    # get list/dict of disciplines and country teams (NOCs) which attended Olympics
-    check_fields: list = ["the_elements", "tallbias", "style", "fast_twitch",
-                          "suffer", "greypoupon", "cool"]
-    disciplines: list = gsg.get_list_file(RAWDIR + discf, chkcols=check_fields)
-    countries: dict = gsg.get_list_file(RAWDIR + nocf)
-    # file of medal events - core data for this app
-    fqf = os.path.join(RAWDIR, evts_byrow_f)
-    events_df: pd.DataFrame = gsg.get_olympic_data(fqf, "events")
-    # timeline of medals by discipline
-    fqf = os.path.join(RAWDIR, timelinef)
-    timeline_df: pd.DataFrame = gsg.get_olympic_data(fqf, "timeline")
-    # team rosters plus selected individual athletes: age, height and weight
-    fqf = os.path.join(RAWDIR, athlete_f)
-    athlete_df: pd.DataFrame = gsg.get_olympic_data(fqf, "athletes")
-    print("finished reading in disciplines, countries, events, timeline, and athlete files\n")
-else:
-    print("problem locating events_byrow file, maybe move it to %s ?" %RAWDIR)
-    sys.exit()
-
-if source_results:
-    # provide all or slice of 'disciplines' to control what event results this collects
-    evt_rslts = gsg.process_disc_and_event(disciplines, events_df)
-else:
-    # get event results from backup, such as 'results_bak_2021-09-26.csv'
-    bakf = os.path.join(OUTDIR, evtresults_f)
-    evt_rslts = gsg.get_events_from_bak(bakf)
-
-if source_medalists:
-    # get all medalists for 'NOC'. defaults to country="united states"
-    medalist_df, medalists = gsg.get_all_medalists()
-else:
-    # get medalist data from backup, medalists_2021_09_25.csv is latest
-    bakf = os.path.join(OUTDIR, medalists_f)
-    medalists = gsg.get_list_file(bakf)
-
-if analyze_basics:
-    # ---- verify event and medal counts, reconcile source files plot medals by NOC ----
-    # reconcile was built to clean initial data- not needed once stable!
-    # events_edf: pd.DataFrame = gsu.reconcile_eventdf_wsrc(evt_rslts, events_df)
-
-    disc_evts: dict = gsu.count_events(evt_rslts)
-    medals: list = gsg.get_noc_medalct(events_df)
-    select_nocs = ['USA', 'CHN', 'JPN', 'GBR', 'ROC', 'AUS']
-    # gsp.medals_barplot(medals, countries, select_nocs)
-
-    if analyze_athletes:
+STAGES: tuple = ("results", "medalists", "tally", "athletes", "groups", "save")
+# what ran when the module-level flags had their usual settings
+DEFAULT_STAGES: list = ["results", "medalists", "tally", "groups"]
+CHECK_FIELDS: list = ["the_elements", "tallbias", "style", "fast_twitch",
+                      "suffer", "greypoupon", "cool"]
+SELECT_NOCS: list = ['USA', 'CHN', 'JPN', 'GBR', 'ROC', 'AUS']
+# input files, each is read only if a selected stage needs it. a prefix rather than a
+# .csv name means the newest dated file with that prefix in RAWDIR
+INPUTS: dict = {
+    "disciplines": (discf, {"chkcols": CHECK_FIELDS}),
+    "countries": (nocf, {}),
+    "events": (evts_byrow_pfx, {"typ": "events"}),
+    "athletes": (athlete_pfx, {"typ": "athletes"}),
+}
+
+def parse_args(argv: list = None):
+    """
+    command line for the olympics analysis, pick stages by name, such as
+        python main.py tally
+        python main.py results groups --plot
+        python main.py results medalists save --scrape-results --scrape-medalists
+        python main.py medalists save --scrape-medalists --nocs all
+        python main.py results save --scrape-results --workers 4 --max-rate 8
+    :param argv: list of args, defaults to sys.argv
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Tokyo 2020 Olympics analysis")
+    parser.add_argument("stages", nargs="*", metavar="stage", help="one or more of: %s, default: %s"
+                                              % (", ".join(STAGES), " ".join(DEFAULT_STAGES)))
+    parser.add_argument("--scrape-results", action="store_true",
+                        help="scrape event results rather than reading the results backup")
+    parser.add_argument("--scrape-medalists", action="store_true",
+                        help="scrape medalists rather than reading the medalists backup")
+    parser.add_argument("--nocs", nargs="+", default=["united-states"],
+                        help="medalist page slugs to scrape, or 'all' for every NOC that won a medal")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="concurrent scrapes: threads for event results (default 1) and "
+                             "pooled connections for medalist pages (default 8)")
+    parser.add_argument("--max-rate", type=float, default=4.0,
+                        help="max requests per second to the results site, 0 for no limit")
+    parser.add_argument("--offline", action="store_true",
+                        help="serve scrapes only from the page cache in CACHEDIR")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="check the events file against the streamed event results")
+    parser.add_argument("--compress", choices=("gz", "bz2", "xz", "zst"), default=None,
+                        help="compress the backups written by the save stage")
+    parser.add_argument("--archive", action="store_true",
+                        help="with save, also archive event results as json lines (.jsonl.gz)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="with save, also file the dated backups in the snapshot store")
+    parser.add_argument("--plot", action="store_true", help="show plots for the selected stages")
+    parser.add_argument("--group", default="combat", help="group to select in the groups stage")
+    parser.add_argument("--metrics", action="store_true",
+                        help="print and save per-stage time and memory, same as GS_METRICS=1")
+
+    args = parser.parse_intermixed_args(argv)
+    unknown: list = [x for x in args.stages if x not in STAGES]
+    if unknown:
+        parser.error("unknown stage %s, choose from %s" % (", ".join(unknown), ", ".join(STAGES)))
+    args.stages = args.stages or list(DEFAULT_STAGES)
+
+    return args
+
+def needed_inputs(args):
+    """
+    :param args: argparse.Namespace from parse_args
+    :return: list of INPUTS keys the selected stages read
+    """
+    stages: set = set(args.stages)
+    needs: set = set()
+    if "results" in stages and args.scrape_results:
+        needs.update(("disciplines", "events"))
+    if stages & {"tally", "save"} or args.reconcile:
+        needs.add("events")
+    if "tally" in stages and args.plot:
+        needs.add("countries")
+    if "medalists" in stages and args.scrape_medalists:
+        needs.add("countries")
+        if args.nocs == ["all"]:
+            needs.add("events")
+    if stages & {"athletes", "save"}:
+        needs.add("athletes")
+    if "groups" in stages:
+        needs.update(("disciplines", "events"))
+
+    return [k for k in INPUTS if k in needs]
+
+def input_file(name: str):
+    """
+    :param name: INPUTS key
+    :return: fq name of the file to read, None if no dated file was found
+    """
+    fil: str = INPUTS[name][0]
+    if fil.endswith(".csv"):
+        return os.path.join(RAWDIR, fil)
+
+    return gss.latest_file(RAWDIR, fil)
+
+def load_inputs(names: list):
+    """
+    read just the input files named, load_cached re-parses a csv only when it changed
+    :param names: list of INPUTS keys
+    :return: dict with key=input name, val=loaded list, dict or pd.DataFrame
+    """
+    data: dict = {}
+    for name in names:
+        kwargs: dict = INPUTS[name][1]
+        with gsm.stage("load_" + name) as st:
+            data[name] = gsg.load_cached(input_file(name), **kwargs)
+            st["rows"] = len(data[name])
+    # a later load may have interned new codes, put every frame on the final shared dtypes
+    for name in names:
+        if INPUTS[name][1].get("typ"):
+            gsc.conform(data[name], gsc.dataset_for(INPUTS[name][1]["typ"]))
+    if names:
+        print("finished reading in %s files\n" % ", ".join(names))
+
+    return data
+
+def main(argv: list = None):
+    args = parse_args(argv)
+    stages: set = set(args.stages)
+    if args.metrics:
+        gsm.enable(True)
+    if args.scrape_results or args.scrape_medalists:
+        gsf.set_cache(gsf.PageCache(CACHEDIR, offline=args.offline))
+
+    names: list = needed_inputs(args)
+    missing: list = [INPUTS[k][0] for k in names
+                     if not input_file(k) or not os.path.isfile(input_file(k))]
+    if missing:
+        print("problem locating %s, maybe move it to %s ?" % (", ".join(missing), RAWDIR))
+        return 1
+    # NOC and discipline codes get their ids from the reference files, not the data
+    gsv.load_reference(RAWDIR)
+    data: dict = load_inputs(names)
+    if args.metrics:
+        gsc.memory_report(data)
+    events_df: pd.DataFrame = data.get("events")
+    today_dt: str = dt.today().strftime("%Y-%m-%d")
+    bak_sfx: str = ".csv." + args.compress if args.compress else ".csv"
+
+    disc_evts: dict = {}
+    if "results" in stages:
+        # event results stream one event at a time, stages below are chained onto the stream
+        if args.scrape_results:
+            # the checkpoint lets an interrupted scrape resume with only the missing events
+            ckpt = os.path.join(OUTDIR, "results_checkpoint.csv")
+            evt_stream = gsg.iter_event_results(data["disciplines"], events_df,
+                                                workers=args.workers or 1,
+                                                max_rate=args.max_rate, checkpoint=ckpt)
+        else:
+            # get event results from the newest backup, such as 'resultsbak_2021-10-04.csv'
+            bakf = gss.latest_file(OUTDIR, evtresults_pfx)
+            if bakf is None:
+                print("no %s<date>.csv results backup in %s" % (evtresults_pfx, OUTDIR))
+                return 1
+            evt_stream = gsg.iter_events_from_bak(bakf)
+        if args.reconcile:
+            # reconcile was built to clean initial data- not needed once stable!
+            evt_stream = gsu.stage_reconcile(evt_stream, events_df)
+        evt_stream = gsu.stage_count(evt_stream, disc_evts)
+        if "save" in stages:
+            # backup results as they stream past rather than after collecting them all
+            bak_name = OUTDIR + evtresults_pfx + today_dt + bak_sfx
+            evt_stream = gsu.stage_backup(evt_stream, bak_name)
+            if args.archive:
+                # one event per line, replay with gsg.iter_events_from_bak
+                evt_stream = gsu.stage_archive(evt_stream, OUTDIR + "results_" + today_dt + ".jsonl.gz")
+        # the stream is lazy, so this stage times the scrape or read plus every chained stage
+        with gsm.stage("results_scrape" if args.scrape_results else "results_from_bak") as st:
+            gsu.drain(evt_stream)
+            st["rows"] = sum(disc_evts.values())
+        if args.scrape_results and os.path.isfile(ckpt):
+            # the scrape finished, a later run must fetch again rather than resume from this
+            os.remove(ckpt)
+
+    medalists: list = None
+    if "medalists" in stages:
+        with gsm.stage("medalists") as st:
+            if args.scrape_medalists:
+                # medalist pages for the NOCs asked for, fetched concurrently into one table
+                if args.nocs == ["all"]:
+                    tally: pd.DataFrame = gsg.tally_noc_medals(events_df)
+                    medalist_df, medalists = gsg.get_medalists(medals=tally,
+                                                               countries=data["countries"],
+                                                               max_conns=args.workers or 8)
+                else:
+                    medalist_df, medalists = gsg.get_medalists(args.nocs,
+                                                               countries=data["countries"],
+                                                               max_conns=args.workers or 8)
+            else:
+                # get medalist data from the newest backup, such as medalists_2021-10-04.csv
+                bakf = gss.latest_file(OUTDIR, medalists_pfx)
+                medalists = gsg.get_list_file(bakf) if bakf else []
+            st["rows"] = len(medalists)
+
+    if "tally" in stages:
+        # ---- verify event and medal counts, plot medals by NOC ----
+        with gsm.stage("medal_tally") as st:
+            medals: list = gsg.get_noc_medalct(events_df)
+            st["rows"] = len(medals[0][1])
+        if args.plot:
+            import gs_plots as gsp
+
+            gsp.medals_barplot(medals, data["countries"], SELECT_NOCS)
+
+    if "athletes" in stages:
         # look at athlete age, height, and weight by team and sport, compare to adult avg
-        gsu.describe_athlete_data(athlete_df)
-        precalcs = gsu.prep_precalcs(athlete_df)
-        by_ht, by_wt = gsu.athletes_groupby(athlete_df)
-        gsp.plot_athlete_avg(precalcs)
-        gsp.height_vs_norm(precalcs)
+        athlete_df: pd.DataFrame = data["athletes"]
+        with gsm.stage("athletes", rows=len(athlete_df)):
+            gsu.describe_athlete_data(athlete_df)
+            precalcs = gsu.prep_precalcs(athlete_df)
+            by_ht, by_wt = gsu.athletes_groupby(athlete_df)
+        if args.plot:
+            import gs_plots as gsp
+
+            gsp.plot_athlete_avg(precalcs)
+            gsp.height_vs_norm(precalcs)
 
-    if analyze_events:
+    if "groups" in stages:
         # organize by primary and secondary groups
+        disciplines: list = data["disciplines"]
         prime_to_dis: dict = gsu.describe_basics(disciplines, events_df)
-        # sportsg_df, meta_dict = gsu.analyze_events(disciplines, events_df)
-        grp_sports, grp_medals = gsu.analyze_groups(disciplines, events_df)
-        grp_nocs = gsu.count_grp_nocs(grp_medals, grp_sports)
+        with gsm.stage("groups", rows=len(events_df)):
+            grp_sports, grp_medals = gsu.analyze_groups(disciplines, events_df)
+            grp_nocs = gsu.count_grp_nocs(grp_medals, grp_sports)
         grps: list = list(grp_sports.keys())
-        # primedf: pd.DataFrame = gsp.plot_groups(prime_to_dis, disc_evts)
-        selected: str = "combat"
-        slct_idx: int = grps.index(selected)
-        slctd_noc: dict = grp_nocs[slct_idx]
+        if args.group in grps:
+            slctd_noc: dict = grp_nocs[grps.index(args.group)]
+            print("    %s: %d NOCs won medals" % (args.group, len(slctd_noc)))
+        if args.plot and disc_evts:
+            import gs_plots as gsp
 
+            primedf: pd.DataFrame = gsp.plot_groups(prime_to_dis, disc_evts)
 
-if save_entries:
-    # backup data that is 'expensive' to source or build
-    # FOUR components: event_summary, results, athletes, medalists
-    # do_event_bak for list of list of dict, save_dcts_tocsv for list of dict
+    if "save" in stages:
+        # backup data that is 'expensive' to source or build
+        # FOUR components: event_summary, results, athletes, medalists
+        # results were already written by stage_backup, save_dcts_tocsv for list of dict
+        athlete_df: pd.DataFrame = data["athletes"]
+        with gsm.stage("backups") as st:
+            if medalists:
+                # TODO: add html discipline and event fields for better matching to other data
+                bak_name = OUTDIR + medalists_pfx + today_dt + bak_sfx
+                gsu.save_dcts_tocsv(medalists, bak_name)
 
-    # TODO: add descriptive text fields for sport and event
-    today_dt: str = dt.today().strftime("%Y-%m-%d")
-    bak_name = OUTDIR + "resultsbak_" + today_dt + ".csv"
-    gsu.do_event_bak(bak_name, evt_rslts)
-
-    # TODO: add html discipline and event fields for better matching to other data
-    medals_dct = athlete_df.to_dict("records")
-    bak_name = OUTDIR + "medalists_" + today_dt + ".csv"
-    gsu.save_dcts_tocsv(medalists, bak_name)
-
-    # move a recent, clean copy of this to RAWDIR for use as input
-    bak_name = OUTDIR + "medalevents_byrow_" + today_dt + ".csv"
-    gsu.save_events_df(events_df, bak_name)
-
-    # TODO: format date as %Y-%m-%d, age and ht_in as %.1f, add
-    bak_name = OUTDIR + "athletes_" + today_dt + ".csv"
-    ath_tolist = athlete_df.to_dict("records")
-    gsu.save_dcts_tocsv(ath_tolist, bak_name)
+            # move a recent, clean copy of this to RAWDIR for use as input
+            bak_name = OUTDIR + evts_byrow_pfx + today_dt + bak_sfx
+            gsu.save_events_df(events_df, bak_name)
+
+            # TODO: format date as %Y-%m-%d, add
+            # measures load as float32, widen and round so they are written as in the source
+            bak_name = OUTDIR + athlete_pfx + today_dt + bak_sfx
+            msrs: dict = {"age": 1, "ht_in": 1, "wt_lbs": 1}
+            ath_tolist = athlete_df.astype({c: "float64" for c in msrs}).round(msrs).to_dict("records")
+            gsu.save_dcts_tocsv(ath_tolist, bak_name)
+            st["rows"] = len(medalists or []) + len(events_df) + len(ath_tolist)
+
+        if args.snapshot:
+            # only rows that changed since the last snapshot take up space in the store
+            for mnf in gss.SnapshotStore(SNAPDIR).ingest(OUTDIR):
+                print("    snapshot %s %s: %d rows, %d new" % (mnf["kind"], mnf["date"],
+                                                            mnf["rows"], mnf["new_rows"]))
+
+    gsm.report(OUTDIR + "metrics_" + today_dt + ".json")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
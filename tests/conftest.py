@@ -0,0 +1,49 @@
+"""
+shared fixtures: a local http.server stand-in for the results site, serving the pages
+in tests/fixtures/site laid out like their urls, and a small events_df to scrape with
+"""
+import functools
+import os
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+HERE: str = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+SITEDIR: str = os.path.join(HERE, "fixtures", "site")
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        return
+
+@pytest.fixture(scope="session")
+def site_url():
+    """
+    :return: base url of the stand-in site, such as http://127.0.0.1:PORT/
+    """
+    handler = functools.partial(QuietHandler, directory=SITEDIR)
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thrd = threading.Thread(target=srv.serve_forever, daemon=True)
+    thrd.start()
+    yield "http://127.0.0.1:%d/" % srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+
+@pytest.fixture
+def events():
+    """
+    :return: tuple of (disciplines list of dict, events_df) for the pages in SITEDIR
+    """
+    dis: list = [{"discipline": "Archery", "htmlq": "archery"},
+                 {"discipline": "Surfing", "htmlq": "surfing"}]
+    gdf = pd.DataFrame({"Sport": ["Archery", "Archery", "Surfing"],
+                        "Event": ["Individual Archery"] * 2 + ["Shortboard"],
+                        "Gender": ["Men", "Women", "Women"],
+                        "Medal_Date": ["7/31/21"] * 3,
+                        "disc_html": ["archery", "archery", "surfing"],
+                        "evt_html": ["men", "women", "women"]})
+
+    return dis, gdf
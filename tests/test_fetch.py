@@ -0,0 +1,32 @@
+"""
+on-disk page cache
+"""
+import os
+
+import gs_fetch as gsf
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = gsf.PageCache(str(tmp_path), max_bytes=25)
+    cache.put("http://x/a", "a" * 10)
+    cache.put("http://x/b", "b" * 10)
+    cache.get("http://x/a")
+    cache.put("http://x/c", "c" * 10)
+
+    assert cache.get("http://x/b") is None
+    assert cache.get("http://x/a")[1] == "a" * 10 and cache.get("http://x/c") is not None
+    assert len(os.listdir(str(tmp_path))) == 4
+
+def test_puts_do_not_rescan_the_folder(tmp_path, monkeypatch):
+    gsf.PageCache(str(tmp_path)).put("http://x/old", "o" * 10)
+    cache = gsf.PageCache(str(tmp_path), max_bytes=25)
+
+    # the index was seeded at init, later puts and evictions never list the folder
+    def no_listdir(path):
+        raise AssertionError("cache folder rescanned")
+    monkeypatch.setattr(gsf.os, "listdir", no_listdir)
+    for n in range(5):
+        cache.put("http://x/%d" % n, str(n) * 10)
+    monkeypatch.undo()
+
+    assert cache.get("http://x/old") is None
+    assert [cache.get("http://x/%d" % n) is not None for n in range(5)] == [False] * 3 + [True] * 2
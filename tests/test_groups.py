@@ -0,0 +1,29 @@
+"""
+sports group medal index
+"""
+import os
+
+import pandas as pd
+
+import gs_getters as gsg
+import gs_util as gsu
+from gs_datadict import MEDAL_SLOTS
+
+RAWDIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rawdata")
+TRAITS: list = ["tallbias", "fasttwitch", "suffer", "greypoupon", "cool"]
+
+def test_shared_htmlq_counts_each_medal_once():
+    dis: list = gsg.get_list_file(os.path.join(RAWDIR, "disciplines.csv"), chkcols=TRAITS)
+    edf = pd.read_csv(os.path.join(RAWDIR, "medalevents_byrow_2021-09-30.csv"))
+    gidx = gsu.build_group_index(dis, edf)
+
+    # dressage, eventing and jumping all have htmlq "equestrian", count by hand
+    eqs = edf[edf["Sport"].str.startswith("Equestrian")]
+    hand = pd.Series(eqs[[c for c in MEDAL_SLOTS if c in eqs.columns]].to_numpy().ravel())
+    hand = hand.dropna().value_counts()
+    assert gsu.group_noc_counts(gidx, "equestrian", "disc_html") == hand.to_dict()
+    assert gsu.group_noc_counts(gidx, "ride")["GBR"] == hand["GBR"]
+    # dressage is the one equestrian discipline in secondary group poise
+    drs = eqs[eqs["Sport"] == "Equestrian Dressage"]
+    poise = gidx.xs(("ride", "poise"), level=["primary", "secondary"])
+    assert poise["Total"].sum() == drs[[c for c in MEDAL_SLOTS if c in drs.columns]].notna().sum().sum()
@@ -0,0 +1,22 @@
+"""
+import-time budget for the light modules, see gs_bench.check_imports
+"""
+import os
+import subprocess
+import sys
+
+import gs_bench as gsb
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_light_modules_within_import_budget():
+    # the budget is pandas' own import time plus gs_bench.IMPORT_SLACK_MS
+    proc = subprocess.run([sys.executable, "gs_bench.py", "--imports"], cwd=ROOT,
+                          capture_output=True, text=True)
+
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+
+def test_import_budget_flags_a_module_over_it():
+    report: dict = gsb.check_imports(("gs_fetch",), slack_ms=-gsb.IMPORT_SLACK_MS * 1000)
+
+    assert report["gs_fetch"]["ok"] is False and report["gs_fetch"]["heavy"] == []
@@ -0,0 +1,72 @@
+"""
+main.py stages, run on the rawdata files with scraping replaced by a stub stream
+"""
+import functools
+import os
+
+import pytest
+
+import gs_fetch as gsf
+import gs_getters as gsg
+import main
+
+RAWDIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rawdata")
+
+@pytest.fixture
+def rundir(tmp_path, monkeypatch):
+    """
+    point main at rawdata for input and tmp_path for output and caches
+    :return: dict that collects the keyword args iter_event_results is called with
+    """
+    monkeypatch.setattr(main, "RAWDIR", RAWDIR + os.sep)
+    monkeypatch.setattr(main, "OUTDIR", str(tmp_path) + os.sep)
+    monkeypatch.setattr(main, "CACHEDIR", str(tmp_path / "pagecache"))
+    monkeypatch.setattr(gsg, "load_cached",
+                        functools.partial(gsg.load_cached, cachedir=str(tmp_path / "loadcache")))
+    calls: dict = {}
+    yield calls
+    gsf.set_cache(None)
+
+def stub_results(calls: dict, crash: bool = False):
+    def iter_event_results(dis, gdf, **kwargs):
+        calls.update(kwargs)
+        with open(kwargs["checkpoint"], "w") as fh:
+            fh.write("discipline,event,NOC,Name,final_place\n")
+        yield [{"discipline": "archery", "event": "men", "NOC": "USA", "Name": "A",
+                "final_place": 1}]
+        if crash:
+            raise KeyboardInterrupt
+    return iter_event_results
+
+def test_finished_scrape_removes_checkpoint(rundir, monkeypatch, tmp_path):
+    monkeypatch.setattr(gsg, "iter_event_results", stub_results(rundir))
+    main.main(["results", "--scrape-results"])
+
+    assert rundir["checkpoint"].startswith(str(tmp_path))
+    assert not os.path.exists(rundir["checkpoint"])
+
+def test_interrupted_scrape_keeps_checkpoint(rundir, monkeypatch):
+    monkeypatch.setattr(gsg, "iter_event_results", stub_results(rundir, crash=True))
+    with pytest.raises(KeyboardInterrupt):
+        main.main(["results", "--scrape-results"])
+
+    assert os.path.isfile(rundir["checkpoint"])
+
+def test_workers_and_rate_reach_the_scrapers(rundir, monkeypatch):
+    monkeypatch.setattr(gsg, "iter_event_results", stub_results(rundir))
+    monkeypatch.setattr(gsg, "get_medalists",
+                        lambda *a, **kw: rundir.update(max_conns=kw["max_conns"]) or (None, []))
+    main.main(["results", "medalists", "--scrape-results", "--scrape-medalists",
+               "--workers", "3", "--max-rate", "0"])
+
+    assert rundir["workers"] == 3 and rundir["max_rate"] == 0
+    assert rundir["max_conns"] == 3
+
+def test_scrapers_default_to_their_own_concurrency(rundir, monkeypatch):
+    monkeypatch.setattr(gsg, "iter_event_results", stub_results(rundir))
+    monkeypatch.setattr(gsg, "get_medalists",
+                        lambda *a, **kw: rundir.update(max_conns=kw["max_conns"]) or (None, []))
+    main.main(["results", "medalists", "--scrape-results", "--scrape-medalists"])
+
+    assert rundir["workers"] == 1 and rundir["max_rate"] == 4.0
+    assert rundir["max_conns"] == 8
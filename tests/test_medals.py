@@ -0,0 +1,19 @@
+"""
+medal tallies by NOC
+"""
+import pandas as pd
+
+import gs_getters as gsg
+
+def test_medalct_ties_keep_first_listed_order():
+    mdf = pd.DataFrame({"G_NOC": ["JPN", "USA", "CHN", "USA"],
+                        "S_NOC": ["GBR", "GBR", "ROC", "ITA"],
+                        "B_NOC": ["ITA", "FRA", "ITA", "FRA"],
+                        "B2_NOC": [None, "KOR", "AUS", None],
+                        "G2_NOC": ["CHN", None, None, None]})
+    mdls: list = gsg.get_noc_medalct(mdf)
+
+    assert [m[0] for m in mdls] == ["Gold", "Silver", "Bronze"]
+    assert list(mdls[0][1].items()) == [("USA", 2), ("CHN", 2), ("JPN", 1)]
+    assert list(mdls[1][1].items()) == [("GBR", 2), ("ROC", 1), ("ITA", 1)]
+    assert list(mdls[2][1].items()) == [("ITA", 2), ("FRA", 2), ("KOR", 1), ("AUS", 1)]
@@ -0,0 +1,63 @@
+"""
+declared dtypes for the Olympic frames
+"""
+import os
+import shutil
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+import gs_getters as gsg
+import gs_schema as gsc
+import gs_util as gsu
+import gs_vocab as gsv
+
+RAWDIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rawdata")
+
+def test_noc_columns_share_one_dtype():
+    edf = gsc.apply_schema(pd.read_csv(os.path.join(RAWDIR, "medalevents_byrow_2021-09-30.csv")),
+                           "events")
+
+    nocs: list = ["G_NOC", "S_NOC", "B_NOC", "B2_NOC", "G2_NOC"]
+    assert all(edf[col].cat.categories.equals(edf["G_NOC"].cat.categories) for col in nocs)
+    # categoricals only compare when their categories match
+    same = edf["G_NOC"] == edf["B_NOC"]
+    assert len(same) == len(edf)
+
+def test_load_cached_misses_after_schema_change(tmp_path, monkeypatch):
+    src: str = str(tmp_path / "medalevents.csv")
+    shutil.copy(os.path.join(RAWDIR, "medalevents_byrow_2021-09-30.csv"), src)
+    cachedir: str = str(tmp_path / "cache")
+    gsg.load_cached(src, "events", cachedir=cachedir)
+
+    # a sidecar or memo entry written under another schema version is not reused
+    monkeypatch.setattr(gsc, "SCHEMA_VERSION", "changed")
+    parsed: list = []
+    real_get = gsg.get_olympic_data
+    monkeypatch.setattr(gsg, "get_olympic_data", lambda *a: parsed.append(a) or real_get(*a))
+    edf = gsg.load_cached(src, "events", cachedir=cachedir)
+
+    assert len(parsed) == 1 and len(edf) > 0
+    assert len(os.listdir(cachedir)) == 2
+
+def test_dtypes_survive_reconcile():
+    edf = gsc.apply_schema(pd.read_csv(os.path.join(RAWDIR, "medalevents_byrow_2021-09-30.csv")),
+                           "events")
+    dtypes = edf.dtypes.copy()
+    row = edf.iloc[0]
+    # the scrape has a new NOC for gold, one no frame has seen before
+    evt: list = [{"discipline": row["disc_html"], "event": row["evt_html"], "NOC": noc,
+                  "Name": name, "final_place": place}
+                 for noc, name, place in [("ZZY", "Nobody", 1), (row["S_NOC"], row["Silver"], 2),
+                                          (row["B_NOC"], row["Bronze"], 3)]]
+    corrected, report = gsu.reconcile_events([evt], edf)
+    assert set(report["column"]) == {"Gold", "G_NOC"}
+    assert corrected.loc[0, "G_NOC"] == "ZZY"
+
+    list(gsu.stage_reconcile([evt], edf))
+    for frame in (corrected, edf):
+        assert all(isinstance(frame[c].dtype, CategoricalDtype) == isinstance(dtypes[c], CategoricalDtype)
+                   for c in frame.columns)
+        assert frame["G_NOC"].cat.categories.equals(frame["B_NOC"].cat.categories)
+        assert frame["G_NOC"].cat.categories.equals(gsv.vocab("noc").dtype.categories)
+    assert edf.loc[0, "G_NOC"] == "ZZY"
@@ -0,0 +1,92 @@
+"""
+event results scraping against the local stand-in site from conftest
+"""
+import gs_fetch as gsf
+import gs_getters as gsg
+
+def rows_by_event(evts: list):
+    return {(e[0]["discipline"], e[0]["event"]): e for e in evts}
+
+def test_process_disc_and_event_parses_rows(site_url, events):
+    dis, gdf = events
+    evts: list = gsg.process_disc_and_event(dis, gdf, base_url=site_url, max_rate=0)
+
+    byevt: dict = rows_by_event(evts)
+    assert sorted(byevt) == [("archery", "men"), ("archery", "women"), ("surfing", "women")]
+    men: list = byevt[("archery", "men")]
+    assert len(men) == 9
+    assert set(men[0]) == {"discipline", "event", "NOC", "Name", "final_place"}
+    assert men[0]["NOC"] == "USA" and men[0]["final_place"] == 1
+    assert men[0]["Name"].endswith("men1")
+    # DNF is kept as place 0
+    assert men[-1]["NOC"] == "FRA" and men[-1]["final_place"] == 0
+
+def test_threaded_scrape_matches_sequential(site_url, events):
+    dis, gdf = events
+    seq: list = gsg.process_disc_and_event(dis, gdf, base_url=site_url, max_rate=0)
+    thr: list = gsg.process_disc_and_event(dis, gdf, workers=3, base_url=site_url, max_rate=0)
+
+    assert thr == seq
+
+def test_missing_page_is_skipped(site_url, events):
+    dis, gdf = events
+    gdf.loc[len(gdf)] = ["Surfing", "Shortboard", "Men", "7/27/21", "surfing", "men"]
+    evts: list = gsg.process_disc_and_event(dis, gdf, base_url=site_url, max_rate=0)
+
+    assert ("surfing", "men") not in rows_by_event(evts)
+    assert len(evts) == 3
+
+def test_offline_cache_miss_is_skipped(site_url, events, tmp_path):
+    dis, gdf = events
+    gsf.set_cache(gsf.PageCache(str(tmp_path / "warm")))
+    try:
+        # warm the cache with one page, then go offline: the other events are misses
+        gsg.simple_event_entry("archery", "men", base_url=site_url)
+        gsf.set_cache(gsf.PageCache(str(tmp_path / "warm"), offline=True))
+        evts: list = gsg.process_disc_and_event(dis, gdf, base_url=site_url, max_rate=0)
+    finally:
+        gsf.set_cache(None)
+
+    assert list(rows_by_event(evts)) == [("archery", "men")]
+
+def test_resumed_scrape_matches_fresh(site_url, events, tmp_path):
+    dis, gdf = events
+    ckpt: str = str(tmp_path / "ckpt.csv")
+    fresh: list = gsg.process_disc_and_event(dis, gdf, base_url=site_url, max_rate=0,
+                                             checkpoint=ckpt)
+    # every event is in the checkpoint now, so this run replays them all from the csv
+    resumed: list = gsg.process_disc_and_event(dis, gdf, base_url=site_url, max_rate=0,
+                                               checkpoint=ckpt)
+
+    assert resumed == fresh
+    assert all(type(rec["final_place"]) is int for evt in resumed for rec in evt)
+
+def test_interrupted_scrape_checkpoints_parsed_events(site_url, events, tmp_path, monkeypatch):
+    dis, gdf = events
+    ckpt: str = str(tmp_path / "ckpt.csv")
+    real_entry = gsg.simple_event_entry
+
+    def crash_on_surfing(disc, event, **kwargs):
+        if disc == "surfing":
+            raise KeyboardInterrupt
+        return real_entry(disc, event, **kwargs)
+
+    # both archery events are parsed but the batch of 16 never fills before the crash
+    monkeypatch.setattr(gsg, "simple_event_entry", crash_on_surfing)
+    try:
+        list(gsg.iter_event_results(dis, gdf, base_url=site_url, max_rate=0, checkpoint=ckpt))
+    except KeyboardInterrupt:
+        pass
+
+    saved: list = list(gsg.iter_events_from_bak(ckpt))
+    assert sorted(rows_by_event(saved)) == [("archery", "men"), ("archery", "women")]
+    assert sum(len(evt) for evt in saved) == 18
+
+def test_tied_places_keep_their_rank(site_url, events):
+    dis, gdf = events
+    evts: list = gsg.process_disc_and_event(dis, gdf, base_url=site_url, max_rate=0)
+
+    surf: list = rows_by_event(evts)[("surfing", "women")]
+    # the page lists the tie for 5th as "=5" on both rows
+    assert [rec["final_place"] for rec in surf] == [1, 2, 3, 4, 5, 5, 7, 8, 0]
+    assert surf[5]["NOC"] == "BRA"
@@ -0,0 +1,48 @@
+"""
+synthetic data sets against the real files they stand in for
+"""
+import os
+
+import pandas as pd
+import pytest
+from pandas.api.types import CategoricalDtype
+
+import gs_getters as gsg
+import gs_synth
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REAL: dict = {"events": os.path.join(ROOT, "rawdata", "medalevents_byrow_2021-09-30.csv"),
+              "athletes": os.path.join(ROOT, "rawdata", "athletes_2021-09-30.csv"),
+              "medalists": os.path.join(ROOT, "output", "medalists_2021-10-04.csv")}
+# columns whose synthetic values must all occur in the real file
+DOMAINS: dict = {"events": ["Sport", "Event", "Gender"],
+                 "athletes": ["category", "event", "gender", "medal"],
+                 "medalists": ["Medal"]}
+
+@pytest.fixture(scope="module")
+def synth(tmp_path_factory):
+    return gs_synth.write_synthetic(str(tmp_path_factory.mktemp("synth")), games=2, seed=5)
+
+def kind(dtype):
+    return "category" if isinstance(dtype, CategoricalDtype) else dtype.kind
+
+@pytest.mark.parametrize("dataset", ["events", "athletes", "medalists"])
+def test_synthetic_frames_match_real_loaders(synth, dataset):
+    real = gsg.get_olympic_data(REAL[dataset], dataset)
+    fake = gsg.get_olympic_data(synth[dataset], dataset)
+
+    assert list(fake.columns) == list(real.columns)
+    assert [kind(t) for t in fake.dtypes] == [kind(t) for t in real.dtypes]
+    for col in DOMAINS[dataset]:
+        extra: set = set(fake[col].dropna()) - set(real[col].dropna())
+        assert not extra, "%s %s values not in the real file: %s" % (dataset, col, sorted(extra)[:5])
+    assert fake[DOMAINS[dataset][-1]].isna().any() == real[DOMAINS[dataset][-1]].isna().any()
+
+def test_medalists_use_real_codes_and_event_names(synth):
+    edf = pd.read_csv(synth["events"])
+    mdf = pd.read_csv(synth["medalists"])
+    dis = pd.read_csv(os.path.join(ROOT, "rawdata", "disciplines.csv"))
+
+    # the real file only has one NOC's medalists, so codes are checked against disciplines
+    assert set(mdf["Sport"]) <= set(dis["dis_code"])
+    assert mdf.loc[0, "Event"] == "%s's %s" % (edf.loc[0, "Gender"], edf.loc[0, "Event"])